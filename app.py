@@ -9,7 +9,6 @@ import argparse
 import gc
 import json
 import os
-import requests
 import subprocess
 import threading
 import time
@@ -21,15 +20,20 @@ import shutil
 from functools import partial
 from tempfile import NamedTemporaryFile
 
-import cv2
-import gradio as gr
-from flask import Flask, request
-
-import service.trans_dh_service
 from h_utils.custom import CustomError
 from y_utils.config import GlobalConfig
 from y_utils.logger import logger
-from simple_motion_controller import SimpleMotionController, SimpleMotionConfig
+from simple_motion_controller import SimpleMotionController, SimpleMotionConfig, job_seed
+from audio_motion_planner import AudioMotionPlanner, AudioMotionConfig
+import pose_render
+import silence_fast_path
+from lazy_imports import lazy_import
+
+# 重量级模块首次使用时才导入, 见 lazy_imports.py
+cv2 = lazy_import("cv2")
+gr = lazy_import("gradio")
+requests = lazy_import("requests")
+trans_dh_service = lazy_import("service.trans_dh_service")
 
 os.environ["GRADIO_SERVER_NAME"] = "0.0.0.0"
 
@@ -39,6 +43,17 @@ class TTSProvider:
     MINIMAX = "Minimax"
 
 
+def get_audio_duration(audio_path):
+    """使用ffprobe获取音频时长 (秒)"""
+    output = subprocess.check_output(
+        [
+            "ffprobe", "-v", "error", "-show_entries", "format=duration",
+            "-of", "default=noprint_wrappers=1:nokey=1", audio_path,
+        ]
+    )
+    return float(output.strip())
+
+
 def write_video_gradio(
     output_imgs_queue,
     temp_dir,
@@ -59,6 +74,8 @@ def write_video_gradio(
     result_path = os.path.join(result_dir, "{}-r.mp4".format(work_id))
     video_write = cv2.VideoWriter(output_mp4, fourcc, fps, (width, height))
     print("Custom VideoWriter init done")
+    # 头部姿态按收到的帧数惰性生成 ([pose_warp] enable 关闭时为 None)
+    pose_job = pose_render.open_job(work_id)
     try:
         while True:
             state, reason, value_ = output_imgs_queue.get()
@@ -66,6 +83,8 @@ def write_video_gradio(
                 logger.info(
                     "Custom VideoWriter [{}]视频帧队列处理正常结束".format(work_id)
                 )
+                if pose_job is not None:
+                    logger.info("Custom VideoWriter [{}]头部姿态: {}".format(work_id, pose_job.get_stats()))
                 video_write.release()
                 break
             elif type(state) == bool and state == False:
@@ -85,6 +104,8 @@ def write_video_gradio(
             else:
                 # logger.info('Custom VideoWriter[{}] write img_index[{}]'.format(work_id, value_))
                 # 原始app.py使用的是for result_img in value_:，我们需要保持一致
+                if pose_job is not None:
+                    pose_job.apply(value_)
                 for result_img in value_:
                     video_write.write(result_img)
 
@@ -121,10 +142,6 @@ def write_video_gradio(
     logger.info("Custom VideoWriter 后处理进程结束")
 
 
-# 重写服务的write_video函数
-service.trans_dh_service.write_video = write_video_gradio
-
-
 class TTSService:
     """TTS语音合成服务"""
 
@@ -230,7 +247,9 @@ class TTSDigitalHumanProcessor:
     """TTS数字人处理器"""
 
     def __init__(self):
-        self.task = service.trans_dh_service.TransDhTask()
+        # 重写服务的write_video函数 (导入服务模块时才能设置)
+        trans_dh_service.write_video = write_video_gradio
+        self.task = trans_dh_service.TransDhTask()
         self.basedir = GlobalConfig.instance().result_dir
         self.tts_service = TTSService()
         self.is_initialized = False
@@ -241,6 +260,7 @@ class TTSDigitalHumanProcessor:
         """初始化数字人服务"""
         logger.info("初始化TTS数字人服务...")
         try:
+            # TransDhTask 在服务内部自行加载模型且没有就绪信号, 沿用原有的等待
             time.sleep(5)
             logger.info("TTS数字人服务初始化完成。")
             self.is_initialized = True
@@ -327,21 +347,41 @@ class TTSDigitalHumanProcessor:
             fps = cap.get(cv2.CAP_PROP_FPS)
             cap.release()
 
+            # 音频只解码一次: 静音分流计划与音频驱动动作共用逐帧能量
+            silence_config = silence_fast_path.SilenceConfig.from_config()
+            silence_plan = self._silence_plan(temp_audio_path, fps, silence_config)
+            if silence_plan is not None:
+                energy_db = silence_plan.energy_db if motion_mode == "音频驱动" else None
+                audio_duration = silence_plan.duration
+            else:
+                energy_db = None
+                audio_duration = get_audio_duration(temp_audio_path)
+
             # 动作控制处理
             motion_analysis = self._apply_motion_control(
                 motion_mode, motion_intensity, work_id,
                 still_weight, nod_weight, tilt_weight,
                 interval_min, interval_max,
                 nod_amplitude_min, nod_amplitude_max,
-                tilt_amplitude_min, tilt_amplitude_max
+                tilt_amplitude_min, tilt_amplitude_max,
+                audio_duration=audio_duration, fps=fps,
+                energy_db=energy_db
             )
 
             # 生成数字人视频
             logger.info("开始生成数字人视频...")
-            self.task.task_dic[code] = ""
-            self.task.work(temp_audio_path, video_file, code, 0, 0, 0, 0)
+            result_path = None
+            if silence_config.enable and silence_plan is not None and silence_plan.num_silent_frames:
+                result_path = self._render_with_silence_skip(
+                    silence_plan, temp_audio_path, video_file, code, work_id
+                )
+                if result_path is not None:
+                    audio_analysis = "\n\n".join(filter(None, [audio_analysis, silence_plan.format_report()]))
+            if result_path is None:
+                self.task.task_dic[code] = ""
+                self.task.work(temp_audio_path, video_file, code, 0, 0, 0, 0)
+                result_path = self.task.task_dic[code][2]
 
-            result_path = self.task.task_dic[code][2]
             final_result_dir = os.path.join("result", code)
             os.makedirs(final_result_dir, exist_ok=True)
             os.system(f"mv {result_path} {final_result_dir}")
@@ -359,6 +399,7 @@ class TTSDigitalHumanProcessor:
             logger.error(f"TTS数字人生成失败: {e}")
             raise gr.Error(str(e))
         finally:
+            pose_render.release_job(work_id)
             # 清理临时音频文件(只删除TTS生成的文件，不删除用户上传的文件)
             if audio_input_mode == "tts" and temp_audio_path and os.path.exists(temp_audio_path):
                 try:
@@ -366,6 +407,30 @@ class TTSDigitalHumanProcessor:
                 except:
                     pass
 
+    def _silence_plan(self, audio_path, fps, config):
+        """解码音频并计算逐帧能量与静音区间, 失败时返回 None (整段送入服务, 音频驱动动作关闭)"""
+        try:
+            return silence_fast_path.SilencePlan.from_audio(audio_path, fps, config)
+        except Exception as e:
+            logger.warning(f"音频能量计算失败, 静音快速通道与音频驱动动作关闭: {e}")
+            return None
+
+    def _render_with_silence_skip(self, plan, audio_path, video_file, code, work_id):
+        """只把语音区间送入服务, 静音区间使用源视频帧; 失败时返回 None, 由调用方整段重跑"""
+        try:
+            result_path = silence_fast_path.render_job(
+                self.task, plan, audio_path, video_file, code, self.basedir,
+                pose_job=pose_render.open_job(work_id)
+            )
+        except Exception as e:
+            logger.warning(f"静音快速通道失败, 整段送入服务: {e}")
+            return None
+        logger.info(
+            f"静音快速通道: 跳过 {plan.num_silent_frames}/{plan.num_frames} 帧, "
+            f"服务调用 {plan.service_calls} 次, 耗时 {plan.render_s:.1f}秒"
+        )
+        return result_path
+
     def _generate_tts_analysis(self, api_key, voice_id, text, model, audio_path):
         """生成TTS分析报告"""
         import time
@@ -451,10 +516,14 @@ class TTSDigitalHumanProcessor:
                              still_weight=0.5, nod_weight=0.3, tilt_weight=0.2,
                              interval_min=2.0, interval_max=5.0,
                              nod_amplitude_min=3.0, nod_amplitude_max=8.0,
-                             tilt_amplitude_min=3.0, tilt_amplitude_max=8.0):
+                             tilt_amplitude_min=3.0, tilt_amplitude_max=8.0,
+                             audio_duration=8.0, fps=25, energy_db=None):
         """应用随机动作控制并生成分析报告"""
         import time
         current_time = time.strftime("%Y-%m-%d %H:%M:%S")
+        controller = None
+        # 每个任务独立的随机种子 (由任务ID哈希得到, 记录在报告中), 并发任务互不干扰, 同一种子可复现动作
+        motion_seed = job_seed(work_id)
 
         motion_analysis_lines = [
             f"📊 随机动作分析报告 - 任务ID: {work_id}",
@@ -479,14 +548,13 @@ class TTSDigitalHumanProcessor:
                 motion_weights={'still': 0.6, 'nod': 0.4, 'tilt': 0.0},
                 nod_range=(3.0 * motion_intensity, 6.0 * motion_intensity)
             )
-            controller = SimpleMotionController(config)
-            timeline = controller.generate_motion_timeline(8.0)
+            controller = SimpleMotionController(config, seed=motion_seed)
 
             motion_analysis_lines.extend([
                 "✅ 启用轻微随机点头动作",
                 f"📊 点头角度范围: ±{3.0 * motion_intensity:.1f}° ~ ±{6.0 * motion_intensity:.1f}°",
                 f"⏱️  随机切换间隔: 3-6秒",
-                f"🎬 生成动作段数: {len(timeline)}",
+                f"🎬 预计动作段数: {controller.estimate_segment_count(audio_duration)}",
                 "🎯 预期效果: 自然的随机点头确认"
             ])
 
@@ -496,14 +564,13 @@ class TTSDigitalHumanProcessor:
                 motion_weights={'still': 0.3, 'nod': 0.7, 'tilt': 0.0},
                 nod_range=(6.0 * motion_intensity, 12.0 * motion_intensity)
             )
-            controller = SimpleMotionController(config)
-            timeline = controller.generate_motion_timeline(8.0)
+            controller = SimpleMotionController(config, seed=motion_seed)
 
             motion_analysis_lines.extend([
                 "✅ 启用明显随机点头动作",
                 f"📊 点头角度范围: ±{6.0 * motion_intensity:.1f}° ~ ±{12.0 * motion_intensity:.1f}°",
                 f"⏱️  随机切换间隔: 2-4秒",
-                f"🎬 生成动作段数: {len(timeline)}",
+                f"🎬 预计动作段数: {controller.estimate_segment_count(audio_duration)}",
                 "🎯 预期效果: 清晰的随机点头手势"
             ])
 
@@ -513,14 +580,13 @@ class TTSDigitalHumanProcessor:
                 motion_weights={'still': 0.4, 'nod': 0.1, 'tilt': 0.5},
                 tilt_range=(5.0 * motion_intensity, 15.0 * motion_intensity)
             )
-            controller = SimpleMotionController(config)
-            timeline = controller.generate_motion_timeline(8.0)
+            controller = SimpleMotionController(config, seed=motion_seed)
 
             motion_analysis_lines.extend([
                 "✅ 启用思考性随机歪头动作",
                 f"📊 倾斜角度范围: ±{5.0 * motion_intensity:.1f}° ~ ±{15.0 * motion_intensity:.1f}°",
                 f"⏱️  随机切换间隔: 4-8秒",
-                f"🎬 生成动作段数: {len(timeline)}",
+                f"🎬 预计动作段数: {controller.estimate_segment_count(audio_duration)}",
                 "🎯 预期效果: 思考状态的随机头部倾斜"
             ])
 
@@ -531,14 +597,13 @@ class TTSDigitalHumanProcessor:
                 nod_range=(4.0 * motion_intensity, 8.0 * motion_intensity),
                 tilt_range=(3.0 * motion_intensity, 10.0 * motion_intensity)
             )
-            controller = SimpleMotionController(config)
-            timeline = controller.generate_motion_timeline(8.0)
+            controller = SimpleMotionController(config, seed=motion_seed)
 
             motion_analysis_lines.extend([
                 "✅ 启用完全随机混合动作",
                 f"📊 动作组合: 点头+倾斜+静止",
                 f"⏱️  随机切换间隔: 2-5秒",
-                f"🎬 生成动作段数: {len(timeline)}",
+                f"🎬 预计动作段数: {controller.estimate_segment_count(audio_duration)}",
                 "🎯 预期效果: 自然的随机头部动作组合"
             ])
 
@@ -560,8 +625,7 @@ class TTSDigitalHumanProcessor:
                 nod_range=(nod_amplitude_min * motion_intensity, nod_amplitude_max * motion_intensity),
                 tilt_range=(tilt_amplitude_min * motion_intensity, tilt_amplitude_max * motion_intensity)
             )
-            controller = SimpleMotionController(config)
-            timeline = controller.generate_motion_timeline(8.0)
+            controller = SimpleMotionController(config, seed=motion_seed)
 
             motion_analysis_lines.extend([
                 "✅ 启用自定义随机动作配置",
@@ -569,10 +633,37 @@ class TTSDigitalHumanProcessor:
                 f"⏱️  随机切换间隔: {interval_min:.1f}-{interval_max:.1f}秒",
                 f"📐 点头幅度: ±{nod_amplitude_min * motion_intensity:.1f}° ~ ±{nod_amplitude_max * motion_intensity:.1f}°",
                 f"📐 倾斜幅度: ±{tilt_amplitude_min * motion_intensity:.1f}° ~ ±{tilt_amplitude_max * motion_intensity:.1f}°",
-                f"🎬 生成动作段数: {len(timeline)}",
+                f"🎬 预计动作段数: {controller.estimate_segment_count(audio_duration)}",
                 "🎯 预期效果: 完全自定义的随机动作组合"
             ])
 
+        elif motion_mode == "音频驱动":
+            if energy_db is None:
+                motion_analysis_lines.extend([
+                    "⚠️  未获得音频能量, 音频驱动动作关闭",
+                ])
+            else:
+                config = AudioMotionConfig(
+                    nod_range=(3.0 * motion_intensity, 8.0 * motion_intensity)
+                )
+                controller = AudioMotionPlanner(energy_db, fps, config, seed=motion_seed)
+
+                motion_analysis_lines.extend([
+                    "✅ 启用音频驱动动作: 重音处点头, 停顿处静止",
+                    f"📊 点头角度范围: ±{3.0 * motion_intensity:.1f}° ~ ±{8.0 * motion_intensity:.1f}°",
+                    f"🎬 重音点头次数: {controller.estimate_segment_count(audio_duration)}",
+                    "🎯 预期效果: 与语音节奏同步的点头"
+                ])
+
+        if controller is not None:
+            # 姿态由视频写入进程按收到的帧数惰性生成, 不生成完整时间线
+            warp_enabled = pose_render.register_job(work_id, controller, audio_duration, fps)
+            motion_analysis_lines.extend([
+                f"⏱️  音频时长: {audio_duration:.1f}秒 ({int(audio_duration * fps)}帧 @ {fps:.1f}fps)",
+                "📦 头部姿态贴图: " + ("按渲染批次流式生成" if warp_enabled else "关闭 ([pose_warp] enable = 0)"),
+                f"🎲 随机种子: {controller.seed}",
+            ])
+
         motion_analysis_lines.extend([
             "",
             "🔧 技术参数:",
@@ -581,7 +672,7 @@ class TTSDigitalHumanProcessor:
             "- 时间控制: 概率分布",
             f"- 强度倍数: {motion_intensity}x",
             "",
-            "⚠️  注意: 随机动作模式，每次生成的时间线都不同"
+            "⚠️  注意: 随机动作模式，每个任务使用不同的随机种子，相同种子和配置可复现同一动作"
         ])
 
         logger.info(f"随机动作控制设置: 模式={motion_mode}, 强度={motion_intensity}")
@@ -663,7 +754,8 @@ if __name__ == "__main__":
                             "明显点头",
                             "思考歪头",
                             "随机混合",
-                            "自定义配置"
+                            "自定义配置",
+                            "音频驱动"
                         ],
                         value="轻微点头",
                         label="随机动作类型",
@@ -842,6 +934,7 @@ if __name__ == "__main__":
 
     demo.launch(
         server_name="0.0.0.0",
-        server_port=7860,
-        share=True
+        # prefork_server.py 为每个工作进程分配端口, 多个工作进程不各自创建分享链接
+        server_port=int(os.environ.get("GRADIO_SERVER_PORT", 7860)),
+        share="PREFORK_WORKER" not in os.environ
     )
\ No newline at end of file
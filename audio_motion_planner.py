@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+音频驱动的头部动作规划
+根据逐帧音频能量放置动作: 重音峰值处点头, 停顿处保持静止; 全部为numpy向量化运算.
+能量来自 silence_fast_path.SilencePlan, 每个任务只解码一次音频, 静音分流与本规划共用;
+服务内 wenet 的fbank特征在编译的 TransDhTask 中计算, Python 侧取不到
+"""
+
+import numpy as np
+from dataclasses import dataclass
+from typing import Tuple
+
+
+@dataclass
+class AudioMotionConfig:
+    """音频驱动动作配置"""
+
+    # 点头角度范围, 按重音强度在范围内插值
+    nod_range: Tuple[float, float] = (3.0, 8.0)
+
+    # 单次点头时长 (秒)
+    nod_duration: float = 0.6
+
+    # 相邻两次点头最小间隔 (秒)
+    min_nod_interval: float = 1.2
+
+    # 重音判定: 峰值需高出周围 (±min_nod_interval) 最低点的dB数
+    min_prominence_db: float = 6.0
+
+    # 低于最大能量多少dB视为停顿, 与静音检测阈值一致
+    pause_db: float = 28.0
+
+    # 能量平滑窗口 (秒)
+    smooth: float = 0.12
+
+    # 点头幅度随机扰动比例
+    amplitude_jitter: float = 0.15
+
+
+def _sliding(values: np.ndarray, radius: int, reduce) -> np.ndarray:
+    """以每个位置为中心、半径radius的滑动窗口归约 (边缘按边界值填充)"""
+    if radius <= 0:
+        return values
+    padded = np.pad(values, radius, mode='edge')
+    windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * radius + 1)
+    return reduce(windows, axis=1)
+
+
+class AudioMotionPlanner:
+    """音频驱动动作规划器: 每个任务一个实例"""
+
+    def __init__(self, energy_db: np.ndarray, fps: float, config: AudioMotionConfig = None, seed: int = None):
+        self.config = config or AudioMotionConfig()
+        self.fps = fps
+        self.energy_db = np.asarray(energy_db, dtype=np.float64)
+        self.seed = int(seed) if seed is not None else int(np.random.SeedSequence().entropy % (2 ** 32))
+
+        self.peak_frames = np.zeros(0, dtype=np.int64)
+        self.head_poses = self._plan()
+
+    def _plan(self) -> np.ndarray:
+        config = self.config
+        fps = self.fps
+        num_frames = len(self.energy_db)
+        head_poses = np.zeros((num_frames, 3))  # [pitch, yaw, roll]
+        if num_frames < 3:
+            return head_poses
+
+        # 平滑能量曲线
+        smooth_frames = max(int(round(config.smooth * fps)), 1)
+        # 'same' 在输入短于卷积核时返回核的长度, 截回帧数
+        energy = np.convolve(self.energy_db, np.ones(smooth_frames) / smooth_frames, mode='same')[:num_frames]
+
+        # 候选峰: 局部最大值, 且为 ±min_nod_interval 内的最大值 (同时保证点头间隔)
+        radius = max(int(round(config.min_nod_interval * fps)), 1)
+        is_peak = np.zeros(num_frames, dtype=bool)
+        is_peak[1:-1] = (energy[1:-1] > energy[:-2]) & (energy[1:-1] >= energy[2:])
+        is_peak &= energy >= _sliding(energy, radius, np.max)
+
+        # 重音: 高出周围最低点足够多, 且不在停顿中
+        prominence = energy - _sliding(energy, radius, np.min)
+        is_peak &= (prominence >= config.min_prominence_db) & (energy > -config.pause_db)
+
+        self.peak_frames = np.flatnonzero(is_peak)
+        if not len(self.peak_frames):
+            return head_poses
+
+        # 幅度: 按重音强度在 nod_range 内插值, 加少量随机扰动
+        rng = np.random.default_rng(self.seed)
+        strength = np.clip((prominence[self.peak_frames] - config.min_prominence_db) / config.min_prominence_db,
+                           0.0, 1.0)
+        nod_min, nod_max = config.nod_range
+        amplitudes = nod_min + (nod_max - nod_min) * strength
+        amplitudes *= 1.0 + rng.uniform(-config.amplitude_jitter, config.amplitude_jitter, len(amplitudes))
+
+        # 在峰值处放置幅度脉冲, 与半周期正弦核卷积得到点头曲线 (峰值对准重音)
+        nod_frames = max(int(round(config.nod_duration * fps)), 3)
+        kernel = np.sin(np.pi * (np.arange(nod_frames) + 0.5) / nod_frames)
+        impulses = np.zeros(num_frames)
+        impulses[self.peak_frames] = amplitudes
+        pitch = np.convolve(impulses, kernel, mode='same')[:num_frames]
+
+        # 停顿处保持静止
+        pause = _sliding((energy <= -config.pause_db).astype(np.int8), nod_frames // 2, np.min).astype(bool)
+        pitch[pause] = 0.0
+
+        head_poses[:, 0] = pitch
+        return head_poses
+
+    def generate_pose_sequence(self, duration: float = None, fps: float = None) -> np.ndarray:
+        """
+        头部姿态序列, 格式与 SimpleMotionController.generate_pose_sequence 相同
+
+        Returns:
+            头部姿态序列数组 (frames, 3) - [pitch, yaw, roll]
+        """
+        if duration is None:
+            return self.head_poses
+        total_frames = int(duration * (fps or self.fps))
+        if total_frames <= len(self.head_poses):
+            return self.head_poses[:total_frames]
+        return np.concatenate([self.head_poses, np.zeros((total_frames - len(self.head_poses), 3))])
+
+    def iter_pose_batches(self, duration: float, fps: float = 25, batch_size: int = 4):
+        """按渲染批次输出头部姿态, 接口与 SimpleMotionController.iter_pose_batches 相同"""
+        head_poses = self.generate_pose_sequence(duration, fps)
+        for batch_start in range(0, len(head_poses), batch_size):
+            yield head_poses[batch_start:batch_start + batch_size]
+
+    def estimate_segment_count(self, duration: float = None) -> int:
+        """点头次数"""
+        return int(len(self.peak_frames))
+
+
+def benchmark_planner(duration: float = 3600.0, fps: float = 25):
+    """长音频规划耗时 (合成语音能量: 音节起伏 + 句间停顿)"""
+    import time
+
+    rng = np.random.default_rng(0)
+    num_frames = int(duration * fps)
+    t = np.arange(num_frames) / fps
+    energy_db = -12.0 + 8.0 * np.sin(2 * np.pi * 3.0 * t) + rng.normal(0, 2.0, num_frames)
+    energy_db[(t % 7.0) > 5.5] = -60.0
+    energy_db -= energy_db.max()
+
+    start = time.perf_counter()
+    planner = AudioMotionPlanner(energy_db, fps, seed=0)
+    elapsed = time.perf_counter() - start
+
+    # 以渲染速度等于实时 (每秒 fps 帧) 估算总渲染时长
+    render_time = num_frames / fps
+    print(f"时长: {duration:.0f}s ({num_frames}帧 @ {fps}fps), 点头次数: {len(planner.peak_frames)}")
+    print(f"规划耗时: {elapsed * 1000:.1f}ms, 占实时渲染时长 {elapsed / render_time * 100:.4f}%")
+
+
+# 使用示例
+if __name__ == "__main__":
+    import sys
+
+    if "--benchmark" in sys.argv:
+        benchmark_planner()
+        sys.exit(0)
+
+    from silence_fast_path import SilencePlan
+
+    audio_path = sys.argv[1] if len(sys.argv) > 1 else "example/audio.wav"
+    planner = AudioMotionPlanner(SilencePlan.from_audio(audio_path, fps=25).energy_db, 25, seed=0)
+    print(f"点头帧: {planner.peak_frames.tolist()}")
+    print(f"姿态序列形状: {planner.generate_pose_sequence().shape}")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+批量 5 点相似变换估计
+face_lib 的 estimate_norm 逐个人脸调用 skimage SimilarityTransform (Umeyama), 长视频逐帧对齐需要上万次小求解.
+这里一次处理 (N, 5, 2) 关键点: 二维相似变换的 Umeyama 解有闭式形式
+    a = Σ<x, y> / Σ|x|², b = Σ(x × y) / Σ|x|², M = [[a, -b, tx], [b, a, ty]]
+(x / y 为去中心化的关键点 / 模板), 几个 numpy 运算即可得到全部 (N, 2, 3) 矩阵, 以及贴回用的逆矩阵.
+多模板时与 estimate_norm 相同, 取变换后关键点到模板距离之和最小的模板.
+逐帧对齐在编译的 TransDhTask 帧循环内, 本模块尚未接入服务, 供 Python 侧帧循环使用.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+# insightface 112x112 模板
+ARCFACE_SRC = np.array([[[38.2946, 51.6963], [73.5318, 51.5014], [56.0252, 71.7366],
+                         [41.5493, 92.3655], [70.7299, 92.2041]]], dtype=np.float64)
+
+# 五种姿态模板 (左侧脸 -> 右侧脸), 非 arcface 模式使用
+POSE_SRC = np.array([
+    [[51.642, 50.115], [57.617, 49.990], [35.740, 69.007], [51.157, 89.050], [57.025, 89.702]],
+    [[45.031, 50.118], [65.568, 50.872], [39.677, 68.111], [45.177, 86.190], [64.246, 86.758]],
+    [[39.730, 51.138], [72.270, 51.138], [56.000, 68.493], [42.463, 87.010], [69.537, 87.010]],
+    [[46.845, 50.872], [67.382, 50.118], [72.737, 68.111], [48.167, 86.758], [67.236, 86.190]],
+    [[54.796, 49.990], [60.771, 50.115], [76.673, 69.007], [55.388, 89.702], [61.257, 89.050]],
+], dtype=np.float64)
+
+
+def align_templates(crop_size: int = 112, mode: str = "arcface") -> np.ndarray:
+    """(T, 5, 2) 对齐模板, 按 crop_size / 112 缩放"""
+    src = ARCFACE_SRC if mode == "arcface" else POSE_SRC
+    return src * (float(crop_size) / 112.0)
+
+
+def umeyama_batch(src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """
+    逐对估计 src -> dst 的相似变换 (旋转 + 等比缩放 + 平移, 不含镜像)
+    Args:
+        src: (N, K, 2) 关键点
+        dst: (N, K, 2) 或 (K, 2) 目标点
+    Returns:
+        (N, 2, 3) float64
+    """
+    src = np.asarray(src, dtype=np.float64)
+    dst = np.broadcast_to(np.asarray(dst, dtype=np.float64), src.shape)
+    src_mean = src.mean(axis=1, keepdims=True)
+    dst_mean = dst.mean(axis=1, keepdims=True)
+    x, y = src - src_mean, dst - dst_mean
+
+    norm = np.einsum("nki,nki->n", x, x)
+    a = np.einsum("nki,nki->n", x, y) / norm
+    b = (x[..., 0] * y[..., 1] - x[..., 1] * y[..., 0]).sum(axis=1) / norm
+
+    matrices = np.empty((len(src), 2, 3), dtype=np.float64)
+    matrices[:, 0, 0] = a
+    matrices[:, 0, 1] = -b
+    matrices[:, 1, 0] = b
+    matrices[:, 1, 1] = a
+    matrices[:, :, 2] = dst_mean[:, 0] - np.einsum("nij,nj->ni", matrices[:, :, :2], src_mean[:, 0])
+    return matrices
+
+
+def transform_points_batch(matrices: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """(N, 2, 3) x (N, K, 2) -> (N, K, 2)"""
+    return np.einsum("nij,nkj->nki", matrices[:, :, :2], points) + matrices[:, None, :, 2]
+
+
+def estimate_norm_batch(lmks: np.ndarray, crop_size: int = 112, mode: str = "arcface",
+                        templates: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    批量版 estimate_norm
+    Args:
+        lmks: (N, 5, 2) 原帧关键点
+        templates: (T, 5, 2) 自定义模板, 默认 align_templates(crop_size, mode)
+    Returns:
+        (N, 2, 3) 原帧 -> 对齐人脸矩阵, (N,) 选中的模板序号
+    """
+    lmks = np.asarray(lmks, dtype=np.float64)
+    templates = align_templates(crop_size, mode) if templates is None else np.asarray(templates, dtype=np.float64)
+    count, num_templates = len(lmks), len(templates)
+    if num_templates == 1:
+        return umeyama_batch(lmks, templates[0]), np.zeros(count, dtype=np.int64)
+
+    # 每个人脸对每个模板各求一次, 再取误差最小的模板
+    src = np.repeat(lmks, num_templates, axis=0)
+    dst = np.tile(templates, (count, 1, 1))
+    matrices = umeyama_batch(src, dst)
+    error = np.linalg.norm(transform_points_batch(matrices, src) - dst, axis=2).sum(axis=1)
+    index = error.reshape(count, num_templates).argmin(axis=1)
+    return matrices.reshape(count, num_templates, 2, 3)[np.arange(count), index], index
+
+
+def invert_affine_batch(matrices: np.ndarray) -> np.ndarray:
+    """批量 cv2.invertAffineTransform, (N, 2, 3) -> (N, 2, 3), 对齐人脸 -> 原帧 (贴回用)"""
+    matrices = np.asarray(matrices, dtype=np.float64)
+    a, b, c = matrices[:, 0, 0], matrices[:, 0, 1], matrices[:, 0, 2]
+    d, e, f = matrices[:, 1, 0], matrices[:, 1, 1], matrices[:, 1, 2]
+    det = a * e - b * d
+    det = np.where(det != 0, 1.0 / np.where(det != 0, det, 1.0), 0.0)
+    inverse = np.empty_like(matrices)
+    inverse[:, 0, 0] = e * det
+    inverse[:, 0, 1] = -b * det
+    inverse[:, 1, 0] = -d * det
+    inverse[:, 1, 1] = a * det
+    inverse[:, 0, 2] = -inverse[:, 0, 0] * c - inverse[:, 0, 1] * f
+    inverse[:, 1, 2] = -inverse[:, 1, 0] * c - inverse[:, 1, 1] * f
+    return inverse
+
@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+按视频内容哈希持久化的人脸分析索引
+同一数字人视频被大量任务复用, 逐帧的人脸框 / 5 点关键点 / 对齐仿射矩阵 / 人脸解析掩码只需计算一次,
+写入单个紧凑二进制文件, 之后的任务以内存映射方式打开, 每个任务的人脸分析开销接近于零.
+
+文件格式: MAGIC | uint64 头长度 | JSON 头 | 64 字节对齐的各数组 (found / bboxes / kps / affines / mask_offsets / mask_data)
+掩码逐帧 PNG 压缩 (无损, 标签图压缩率高, 解码约 1ms).
+逐帧人脸分析在编译的 TransDhTask 帧循环内, 本模块尚未接入服务, 供 Python 侧帧循环使用.
+"""
+
+import json
+import os
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+import cv2
+import numpy as np
+
+from file_hash import file_sha256
+
+MAGIC = b"FIDX0001"
+_ALIGN = 64
+
+
+@dataclass
+class FrameAnalysis:
+    """单帧分析结果, 未检测到人脸时 found=False"""
+    found: bool
+    bbox: Optional[np.ndarray] = None      # (5,) x1, y1, x2, y2, score
+    kps: Optional[np.ndarray] = None       # (5, 2)
+    affine: Optional[np.ndarray] = None    # (2, 3) 原图 -> 对齐人脸
+    mask: Optional[np.ndarray] = None      # 解析标签图 / 人脸掩码, uint8
+
+
+def video_hash(video_path: str, cache_dir: str) -> str:
+    """视频文件 sha256, 与图优化缓存共用 cache_dir/hashes.json 记忆, 未变化的视频不重复读取"""
+    return file_sha256(video_path, cache_dir)
+
+
+def write_face_index(path: str, arrays: Dict[str, np.ndarray], meta: Dict):
+    """写入临时文件后原子替换, 并发任务不会读到半个文件"""
+    header = dict(meta, arrays={})
+    offset = 0
+    for name, array in arrays.items():
+        header["arrays"][name] = [array.dtype.str, list(array.shape), offset]
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+    header_bytes = json.dumps(header).encode()
+    data_start = -(-(len(MAGIC) + 8 + len(header_bytes)) // _ALIGN) * _ALIGN
+
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(header_bytes)) + header_bytes)
+        for name, array in arrays.items():
+            f.seek(data_start + header["arrays"][name][2])
+            f.write(np.ascontiguousarray(array).tobytes())
+    os.replace(tmp_path, path)
+
+
+class FaceIndex:
+    """只读打开的人脸分析索引, 数组均为 np.memmap, 按需分页读入"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError("not a face index: {}".format(path))
+            header_len = struct.unpack("<Q", f.read(8))[0]
+            self.meta = json.loads(f.read(header_len))
+        data_start = -(-(len(MAGIC) + 8 + header_len) // _ALIGN) * _ALIGN
+        self.arrays = {}
+        for name, (dtype, shape, offset) in self.meta["arrays"].items():
+            if int(np.prod(shape)) == 0:
+                self.arrays[name] = np.zeros(shape, dtype=dtype)
+            else:
+                self.arrays[name] = np.memmap(path, dtype=dtype, mode="r", offset=data_start + offset,
+                                              shape=tuple(shape))
+        self.found = self.arrays["found"]
+        self.bboxes = self.arrays["bboxes"]
+        self.kps = self.arrays["kps"]
+        self.affines = self.arrays["affines"]
+
+    def __len__(self):
+        return self.meta["frames"]
+
+    def mask(self, index: int) -> Optional[np.ndarray]:
+        start, end = self.arrays["mask_offsets"][index:index + 2]
+        if start == end:
+            return None
+        return cv2.imdecode(np.asarray(self.arrays["mask_data"][start:end]), cv2.IMREAD_UNCHANGED)
+
+    def frame(self, index: int) -> FrameAnalysis:
+        if not self.found[index]:
+            return FrameAnalysis(found=False)
+        return FrameAnalysis(True, np.array(self.bboxes[index]), np.array(self.kps[index]),
+                             np.array(self.affines[index]), self.mask(index))
+
+
+def build_face_index(video_path: str, analyze_fn: Callable[[np.ndarray], FrameAnalysis], path: str,
+                     meta: Optional[Dict] = None) -> FaceIndex:
+    """逐帧运行人脸分析 (检测 / 对齐 / 解析) 并写入索引"""
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    width, height = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    found, bboxes, kps, affines, masks = [], [], [], [], []
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        result = analyze_fn(frame)
+        found.append(result.found)
+        bboxes.append(result.bbox if result.found else np.zeros(5))
+        kps.append(result.kps if result.found else np.zeros((5, 2)))
+        affines.append(result.affine if result.found else np.zeros((2, 3)))
+        masks.append(cv2.imencode(".png", result.mask)[1].tobytes()
+                     if result.found and result.mask is not None else b"")
+    cap.release()
+
+    offsets = np.zeros(len(masks) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(m) for m in masks])
+    arrays = {
+        "found": np.array(found, dtype=np.uint8),
+        "bboxes": np.array(bboxes, dtype=np.float32).reshape(-1, 5),
+        "kps": np.array(kps, dtype=np.float32).reshape(-1, 5, 2),
+        "affines": np.array(affines, dtype=np.float32).reshape(-1, 2, 3),
+        "mask_offsets": offsets,
+        "mask_data": np.frombuffer(b"".join(masks), dtype=np.uint8),
+    }
+    write_face_index(path, arrays, dict(meta or {}, frames=len(found), fps=fps, width=width, height=height,
+                                        created=time.time()))
+    return FaceIndex(path)
+
+
+class FaceIndexCache:
+    """
+    按视频内容哈希查找 / 构建索引, 进程内复用已打开的索引
+    Args:
+        cache_dir: 索引目录
+        version: 分析模型或参数变化时修改, 旧索引自动失效
+    """
+
+    def __init__(self, cache_dir: str = "./cache/face_index", version: str = "1"):
+        self.cache_dir = cache_dir
+        self.version = version
+        self._opened = {}
+        self._lock = threading.Lock()
+        # 视频 -> [构建锁, 等待该锁的线程数], 最后一个线程离开时删除, 不随处理过的视频数增长
+        self._path_locks = {}
+        self.hits = 0
+        self.builds = 0
+
+    def index_path(self, video_path: str) -> str:
+        return os.path.join(self.cache_dir, "{}_v{}.fidx".format(video_hash(video_path, self.cache_dir)[:32],
+                                                                 self.version))
+
+    def get(self, video_path: str, analyze_fn: Optional[Callable] = None) -> Optional[FaceIndex]:
+        """
+        Returns:
+            已有索引直接内存映射打开; 没有时用 analyze_fn 构建, analyze_fn 为 None 则返回 None
+        """
+        path = self.index_path(video_path)
+        with self._lock:
+            if path in self._opened:
+                self.hits += 1
+                return self._opened[path]
+            entry = self._path_locks.setdefault(path, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            # 构建只锁同一视频, 其他视频的任务不等待
+            with entry[0]:
+                return self._open_or_build(path, video_path, analyze_fn)
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._path_locks[path]
+
+    def _open_or_build(self, path: str, video_path: str, analyze_fn: Optional[Callable]) -> Optional[FaceIndex]:
+        """调用方持有该视频的构建锁"""
+        with self._lock:
+            index = self._opened.get(path)
+            if index is not None:
+                self.hits += 1
+                return index
+        if os.path.exists(path):
+            index = FaceIndex(path)
+            built = False
+        elif analyze_fn is None:
+            return None
+        else:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            index = build_face_index(video_path, analyze_fn, path,
+                                     {"video": os.path.basename(video_path), "version": self.version})
+            built = True
+        with self._lock:
+            self._opened[path] = index
+            if built:
+                self.builds += 1
+            else:
+                self.hits += 1
+        return index
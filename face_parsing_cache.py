@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+降分辨率 + 时间复用的人脸解析掩码
+说话人视频里头发 / 背景 / 脸部轮廓的分割几乎不随帧变化, 不必每帧在完整裁剪分辨率上运行 FaceParsing:
+    1. 在降低的分辨率 (默认 256) 上推理, logits 双线性上采样回裁剪尺寸后再取 argmax
+    2. 对齐人脸中关键点相对上次解析的位移小于阈值, 且嘴部区域变化不大时直接复用上次的掩码
+       (5 点关键点看不出嘴的开合, 口型变化由嘴部区域的平均绝对差判断)
+    3. 掩码按视频保存在小的 LRU 中, 视频循环 / 往返播放回到同一帧时直接命中
+另提供与逐帧全分辨率解析的掩码 IoU 漂移统计.
+逐帧解析在编译的 TransDhTask 帧循环内, 本模块尚未接入服务, 供 Python 侧帧循环使用.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+# BiSeNet 人脸解析的 19 类
+NUM_CLASSES = 19
+_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+
+@dataclass
+class ParsingCacheConfig:
+    """解析缓存配置"""
+    input_size: int = 256           # 推理分辨率, 完整裁剪为 512, 模型输入为固定尺寸时用 onnx_parse_fn 返回的尺寸
+    move_threshold: float = 0.01    # 关键点最大位移 / 裁剪边长, 小于该值复用掩码
+    mouth_threshold: float = 2.0    # 嘴部区域与上次解析的平均绝对差 (0-255) 超过该值重新解析, 0 关闭
+    max_reuse: int = 10             # 连续复用的最大帧数
+    masks_per_video: int = 64       # 每个视频按帧号缓存的掩码数
+    max_videos: int = 4             # 同时缓存的视频数
+
+
+class _VideoMasks:
+    """单个视频的掩码: 帧号 -> (关键点, 嘴部缩略图, 掩码) 的 LRU, 以及最近一次解析"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.frames: OrderedDict = OrderedDict()
+        self.last = None
+        self.reused = 0
+
+    def put(self, frame_index, entry):
+        if frame_index is not None:
+            self.frames[frame_index] = entry
+            self.frames.move_to_end(frame_index)
+            while len(self.frames) > self.capacity:
+                self.frames.popitem(last=False)
+        self.last = entry
+        self.reused = 0
+
+
+def landmark_shift(a: np.ndarray, b: np.ndarray, crop_size: int) -> float:
+    """对齐人脸中两组关键点的最大位移, 按裁剪边长归一化"""
+    return float(np.linalg.norm(np.asarray(a, dtype=np.float32) - b, axis=-1).max()) / crop_size
+
+
+def mouth_thumbnail(crop: np.ndarray, landmarks: np.ndarray, step: int = 4) -> np.ndarray:
+    """嘴角关键点周围区域的降采样灰度图, 用于判断口型变化"""
+    left, right = np.asarray(landmarks[3]), np.asarray(landmarks[4])
+    width = max(float(np.linalg.norm(right - left)), 8.0)
+    center = (left + right) / 2.0
+    x1, y1 = (center - width).astype(int)
+    x2, y2 = (center + width).astype(int)
+    h, w = crop.shape[:2]
+    region = crop[max(y1, 0):min(y2, h):step, max(x1, 0):min(x2, w):step]
+    return region.mean(axis=2, dtype=np.float32) if region.ndim == 3 else region.astype(np.float32)
+
+
+def preprocess_parsing(crops: Sequence[np.ndarray], size: int) -> np.ndarray:
+    """BGR 裁剪 -> (N, 3, size, size) ImageNet 归一化 RGB"""
+    batch = np.stack([cv2.resize(crop, (size, size), interpolation=cv2.INTER_AREA) for crop in crops])
+    batch = (batch[..., ::-1].astype(np.float32) / 255.0 - _MEAN) / _STD
+    return np.ascontiguousarray(batch.transpose(0, 3, 1, 2))
+
+
+def upsample_labels(logits: np.ndarray, height: int, width: int) -> np.ndarray:
+    """(C, h, w) logits 双线性上采样到 (height, width) 后取 argmax, uint8 标签图"""
+    if logits.shape[1:] == (height, width):
+        return logits.argmax(axis=0).astype(np.uint8)
+    upsampled = cv2.resize(np.ascontiguousarray(logits.transpose(1, 2, 0)), (width, height),
+                           interpolation=cv2.INTER_LINEAR)
+    return upsampled.argmax(axis=2).astype(np.uint8)
+
+
+class CachedFaceParser:
+    """
+    Args:
+        parse_fn: (N, 3, S, S) float32 -> (N, C, S', S') logits, 如 onnx_parse_fn()
+        config: ParsingCacheConfig
+    """
+
+    def __init__(self, parse_fn: Callable[[np.ndarray], np.ndarray], config: Optional[ParsingCacheConfig] = None):
+        self.parse_fn = parse_fn
+        self.config = config or ParsingCacheConfig()
+        self._videos: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"frames": 0, "parsed": 0, "frame_hits": 0, "temporal_hits": 0, "parse_s": 0.0}
+
+    def _video(self, video_id) -> _VideoMasks:
+        """调用方持有 self._lock"""
+        video = self._videos.get(video_id)
+        if video is None:
+            video = self._videos[video_id] = _VideoMasks(self.config.masks_per_video)
+            while len(self._videos) > self.config.max_videos:
+                self._videos.popitem(last=False)
+        self._videos.move_to_end(video_id)
+        return video
+
+    def parse_full(self, crop: np.ndarray, size: Optional[int] = None) -> np.ndarray:
+        """不使用缓存, 在 size (默认 input_size) 分辨率上解析一张裁剪"""
+        start = time.perf_counter()
+        logits = self.parse_fn(preprocess_parsing([crop], size or self.config.input_size))[0]
+        mask = upsample_labels(logits, *crop.shape[:2])
+        with self._lock:
+            self.stats["parse_s"] += time.perf_counter() - start
+            self.stats["parsed"] += 1
+        return mask
+
+    def parse(self, crop: np.ndarray, landmarks: np.ndarray, video_id="default",
+              frame_index: Optional[int] = None) -> np.ndarray:
+        """
+        Args:
+            crop: 对齐人脸 (H, W, 3) uint8
+            landmarks: 对齐人脸坐标系下的 (5, 2) 关键点
+            video_id: 源视频标识, 如 face_index 的内容哈希
+            frame_index: 源视频帧号, 循环播放回到同一帧时命中缓存
+        Returns:
+            (H, W) uint8 标签图, 复用时为缓存中的只读数组
+        """
+        config = self.config
+        thumbnail = mouth_thumbnail(crop, landmarks) if config.mouth_threshold > 0 else None
+
+        def reusable(entry):
+            cached_landmarks, cached_thumbnail, mask = entry
+            if mask.shape != crop.shape[:2]:
+                return False
+            if landmark_shift(landmarks, cached_landmarks, max(crop.shape[:2])) >= config.move_threshold:
+                return False
+            return thumbnail is None or (cached_thumbnail.shape == thumbnail.shape and
+                                         np.abs(thumbnail - cached_thumbnail).mean() < config.mouth_threshold)
+
+        # 查找与复用在锁内, 解析在锁外, 同一视频的并发任务最多多解析一次
+        with self._lock:
+            self.stats["frames"] += 1
+            video = self._video(video_id)
+            cached = video.frames.get(frame_index) if frame_index is not None else None
+            if cached is not None and reusable(cached):
+                video.frames.move_to_end(frame_index)
+                self.stats["frame_hits"] += 1
+                return cached[2]
+
+            if video.last is not None and video.reused < config.max_reuse and reusable(video.last):
+                video.reused += 1
+                self.stats["temporal_hits"] += 1
+                return video.last[2]
+
+        mask = self.parse_full(crop)
+        mask.setflags(write=False)
+        with self._lock:
+            video.put(frame_index, (np.array(landmarks, dtype=np.float32), thumbnail, mask))
+        return mask
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+        frames = max(stats["frames"], 1)
+        stats["reuse_ratio"] = (stats["frame_hits"] + stats["temporal_hits"]) / float(frames)
+        stats["parse_ms"] = stats["parse_s"] / max(stats["parsed"], 1) * 1000
+        stats["ms_per_frame"] = stats["parse_s"] / frames * 1000
+        return stats
+
+
+def mask_iou(reference: np.ndarray, candidate: np.ndarray, num_classes: int = NUM_CLASSES) -> float:
+    """两张标签图的平均类别 IoU, 只统计出现在任一图中的类别"""
+    index = reference.astype(np.int64) * num_classes + candidate
+    confusion = np.bincount(index.ravel(), minlength=num_classes * num_classes).reshape(num_classes, num_classes)
+    inter = np.diag(confusion)
+    union = confusion.sum(0) + confusion.sum(1) - inter
+    present = union > 0
+    return float((inter[present] / union[present]).mean()) if present.any() else 1.0
+
+
+def onnx_parse_fn(model_info: Optional[Dict] = None, provider: str = "gpu",
+                  input_size: int = 256) -> Tuple[Callable[[np.ndarray], np.ndarray], int]:
+    """
+    FaceParsing onnx (model_lib.ModelBase) 的 logits 函数
+    导出时固定了输入尺寸的模型 (如 79999_iter.onnx 的 1x3x512x512) 不能降分辨率, 回退到模型尺寸
+    Returns:
+        (logits 函数, 实际推理分辨率), 后者用作 ParsingCacheConfig.input_size
+    """
+    from model_lib import ModelBase
+    from model_lib.model_registry import DEFAULT_MODEL_INFOS
+
+    model = ModelBase(model_info or DEFAULT_MODEL_INFOS["face_parsing"], provider)
+    height, width = model.model.input_shape[0][2:]
+    if isinstance(height, int) and isinstance(width, int) and height > 0 and width > 0:
+        if (height, width) != (input_size, input_size):
+            print("face parsing input is fixed to {}x{}, parsing at {} instead of {}".format(
+                height, width, height, input_size))
+        input_size = height
+
+    def parse(batch):
+        if batch.shape[2:] != (input_size, input_size):
+            raise ValueError("face parsing expects {0}x{0} input, got {1}".format(input_size, batch.shape))
+        return model.model.forward([batch])[0]
+
+    return parse, input_size
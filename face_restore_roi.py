@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+下半脸 ROI 人脸修复与时间复用
+口型驱动只改变嘴部与下颌, 上半脸直接来自原视频, 不需要每帧修复.
+本模块只把修复结果以缓存的羽化掩码融合回下半脸 ROI, ROI 外保持生成结果不变;
+生成的 ROI 与上次修复时相比变化小于阈值的帧完全跳过修复, 复用上次的修复 ROI.
+GFPGANv1.4 的 StyleGAN 解码器输入固定为 512x512, 修复时仍送入整张对齐人脸, 节省来自跳过的帧.
+逐帧修复在编译的 TransDhTask 帧循环内, 本模块尚未接入服务, 供 Python 侧帧循环使用.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+
+@dataclass
+class RoiRestoreConfig:
+    """ROI 修复配置"""
+    roi: Tuple[float, ...] = (0.15, 0.5, 0.85, 1.0)   # x1, y1, x2, y2, 对齐人脸宽高的比例 (嘴部 + 下颌)
+    feather: float = 0.12                            # 羽化宽度, ROI 短边的比例
+    skip_threshold: float = 1.5                      # 与上次修复时的 ROI 平均绝对差 (0-255) 小于该值则跳过
+    max_skip: int = 12                               # 连续跳过的最大帧数, 防止缓慢变化累积
+    compare_step: int = 4                            # 比较 ROI 时的像素步长
+
+
+def feather_mask(height: int, width: int, feather: int, open_bottom: bool = True) -> np.ndarray:
+    """
+    (height, width, 1) float32 羽化掩码, 边缘线性过渡
+    open_bottom: ROI 贴着人脸底边时底边不过渡
+    """
+    feather = max(int(feather), 1)
+    ys = np.arange(height, dtype=np.float32)
+    xs = np.arange(width, dtype=np.float32)
+    ramp_y = np.minimum((ys + 0.5) / feather, 1.0)
+    if not open_bottom:
+        ramp_y = np.minimum(ramp_y, (height - ys - 0.5) / feather)
+    ramp_x = np.minimum(np.minimum((xs + 0.5) / feather, (width - xs - 0.5) / feather), 1.0)
+    return np.clip(ramp_y[:, None] * ramp_x[None, :], 0.0, 1.0)[..., None]
+
+
+class RoiRestorer:
+    """
+    Args:
+        restore_fn: 整张对齐人脸 (H, W, 3) uint8 BGR -> 修复结果, 如 onnx_restore_fn()
+        config: RoiRestoreConfig
+    """
+
+    def __init__(self, restore_fn: Callable[[np.ndarray], np.ndarray], config: Optional[RoiRestoreConfig] = None):
+        self.restore_fn = restore_fn
+        self.config = config or RoiRestoreConfig()
+        self._masks = {}
+        self.reset()
+
+    def reset(self):
+        """新视频 / 新片段开始时调用"""
+        self._reference = None      # 上次修复时的生成 ROI (降采样)
+        self._restored_roi = None   # 上次修复的 ROI
+        self._skipped = 0
+        self.stats = {"frames": 0, "restored": 0, "skipped": 0, "restore_s": 0.0, "blend_s": 0.0}
+
+    def roi_box(self, height: int, width: int) -> Tuple[int, int, int, int]:
+        x1, y1, x2, y2 = self.config.roi
+        return int(round(x1 * width)), int(round(y1 * height)), int(round(x2 * width)), int(round(y2 * height))
+
+    def _mask(self, height: int, width: int) -> Tuple[Tuple[int, int, int, int], np.ndarray]:
+        """ROI 与羽化掩码按人脸尺寸缓存"""
+        key = (height, width)
+        if key not in self._masks:
+            x1, y1, x2, y2 = self.roi_box(height, width)
+            feather = self.config.feather * min(x2 - x1, y2 - y1)
+            self._masks[key] = ((x1, y1, x2, y2), feather_mask(y2 - y1, x2 - x1, feather, open_bottom=y2 >= height))
+        return self._masks[key]
+
+    def restore(self, face: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            face: 口型生成后的对齐人脸 (H, W, 3) uint8
+        Returns:
+            ROI 内融合修复结果, ROI 外与输入相同的新数组
+        """
+        (x1, y1, x2, y2), mask = self._mask(*face.shape[:2])
+        roi = face[y1:y2, x1:x2]
+        step = self.config.compare_step
+        sample = roi[::step, ::step].astype(np.int16)
+
+        self.stats["frames"] += 1
+        skip = (self._reference is not None and self._reference.shape == sample.shape
+                and self._skipped < self.config.max_skip
+                and np.abs(sample - self._reference).mean() < self.config.skip_threshold)
+        if skip:
+            self._skipped += 1
+            self.stats["skipped"] += 1
+        else:
+            start = time.perf_counter()
+            restored = self.restore_fn(face)
+            self.stats["restore_s"] += time.perf_counter() - start
+            self.stats["restored"] += 1
+            self._restored_roi = restored[y1:y2, x1:x2].astype(np.float32)
+            self._reference = sample
+            self._skipped = 0
+
+        start = time.perf_counter()
+        output = face.copy()
+        output[y1:y2, x1:x2] = np.clip(self._restored_roi * mask + roi * (1.0 - mask) + 0.5, 0, 255).astype(np.uint8)
+        self.stats["blend_s"] += time.perf_counter() - start
+        return output
+
+    def get_stats(self) -> Dict:
+        """跳过比例与节省的修复耗时 (按实际修复帧的平均耗时估算)"""
+        stats = dict(self.stats)
+        frames = max(stats["frames"], 1)
+        restore_ms = stats["restore_s"] / max(stats["restored"], 1) * 1000
+        stats["skip_ratio"] = stats["skipped"] / float(frames)
+        stats["restore_ms"] = restore_ms
+        stats["saved_ms"] = stats["skipped"] * restore_ms
+        stats["ms_per_frame"] = (stats["restore_s"] + stats["blend_s"]) / frames * 1000
+        return stats
+
+
+def onnx_restore_fn(model_info: Optional[Dict] = None, provider: str = "gpu") -> Callable[[np.ndarray], np.ndarray]:
+    """GFPGAN onnx (model_lib.ModelBase) 的修复函数: BGR uint8 -> BGR uint8, 输入输出 [-1, 1] RGB 512x512"""
+    import cv2
+    from model_lib import ModelBase
+    from model_lib.base_wrapper.onnx_quantize import preprocess_gfpgan
+    from model_lib.model_registry import DEFAULT_MODEL_INFOS
+
+    model = ModelBase(model_info or DEFAULT_MODEL_INFOS["gfpgan"], provider)
+
+    def restore(face):
+        output = model.model.forward([preprocess_gfpgan(face)])[0][0]
+        output = ((np.clip(output, -1, 1) + 1) * 127.5).round().astype(np.uint8).transpose(1, 2, 0)
+        return cv2.resize(cv2.cvtColor(output, cv2.COLOR_RGB2BGR), (face.shape[1], face.shape[0]))
+
+    return restore
+
@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+人脸检测跟踪模式
+SCRFD 640x640 检测只在每 N 帧 / 镜头切换 / 跟踪丢失时运行, 其余帧用金字塔 LK 光流 (匀速模型给初值)
+传播人脸框与 5 点关键点, 再经 One Euro 滤波平滑, 检测调用次数约降为 1/N, 同时降低对齐抖动.
+逐帧检测在编译的 TransDhTask 帧循环内, 本模块尚未接入服务, 供 Python 侧帧循环使用.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import cv2
+import numpy as np
+
+
+@dataclass
+class FaceTrackerConfig:
+    """跟踪配置"""
+    detect_interval: int = 5           # 每 N 帧做一次完整检测
+    scene_cut_threshold: float = 30.0  # 64x64 灰度缩略图平均绝对差, 超过视为镜头切换
+    min_quality: float = 0.6           # 光流前后向一致的点比例低于此值回退检测
+    fb_error_max: float = 1.0          # 前后向光流误差上限 (像素)
+    grid_size: int = 5                 # 人脸框内额外跟踪的网格点 grid_size x grid_size
+    win_size: int = 21
+    max_level: int = 3
+    min_cutoff: float = 1.0            # One Euro 滤波: 静止时截止频率 (Hz)
+    beta: float = 0.05                 # One Euro 滤波: 速度自适应系数
+    d_cutoff: float = 1.0
+
+
+@dataclass
+class FaceTrack:
+    """单帧结果, 坐标为原图像素"""
+    bbox: np.ndarray      # (4,) x1, y1, x2, y2
+    kps: np.ndarray       # (5, 2)
+    score: float
+    source: str           # 'detect' / 'track'
+    quality: float        # 跟踪帧的一致点比例, 检测帧为 1
+
+
+class OneEuroFilter:
+    """One Euro 滤波 (Casiez 2012), 对任意形状数组逐元素滤波"""
+
+    def __init__(self, min_cutoff: float = 1.0, beta: float = 0.0, d_cutoff: float = 1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self._x = None
+        self._dx = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def __call__(self, x: np.ndarray, dt: float) -> np.ndarray:
+        x = np.asarray(x, dtype=np.float64)
+        if self._x is None:
+            self._x, self._dx = x.copy(), np.zeros_like(x)
+            return x.copy()
+        a_d = self._alpha(self.d_cutoff, dt)
+        self._dx = a_d * (x - self._x) / dt + (1 - a_d) * self._dx
+        a = self._alpha(self.min_cutoff + self.beta * np.abs(self._dx), dt)
+        self._x = a * x + (1 - a) * self._x
+        return self._x.copy()
+
+
+def box_iou(box: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    lt = np.maximum(box[:2], boxes[:, :2])
+    rb = np.minimum(box[2:4], boxes[:, 2:4])
+    inter = np.prod(np.clip(rb - lt, 0, None), axis=1)
+    area = np.prod(box[2:4] - box[:2])
+    areas = np.prod(boxes[:, 2:4] - boxes[:, :2], axis=1)
+    return inter / (area + areas - inter + 1e-9)
+
+
+def landmark_jitter(kps_seq: np.ndarray) -> float:
+    """帧间关键点加速度 (二阶差分) 的平均幅值, 以双眼间距归一化, 越小越稳"""
+    kps_seq = np.asarray(kps_seq, dtype=np.float64)
+    if len(kps_seq) < 3:
+        return 0.0
+    eye_distance = np.linalg.norm(kps_seq[:, 1] - kps_seq[:, 0], axis=1).mean()
+    acceleration = kps_seq[2:] - 2 * kps_seq[1:-1] + kps_seq[:-2]
+    return float(np.linalg.norm(acceleration, axis=2).mean() / max(eye_distance, 1e-6))
+
+
+class FaceTracker:
+    """
+    检测 + 跟踪
+    Args:
+        detect_fn: frame(BGR) -> (bboxes (N, 5) x1 y1 x2 y2 score, kpss (N, 5, 2)), 即 SCRFD.detect 的输出
+        fps: 视频帧率, One Euro 滤波用
+    """
+
+    def __init__(self, detect_fn: Callable, fps: float = 25.0, config: Optional[FaceTrackerConfig] = None):
+        self.detect_fn = detect_fn
+        self.fps = fps
+        self.config = config or FaceTrackerConfig()
+        self._bbox_filter = OneEuroFilter(self.config.min_cutoff, self.config.beta, self.config.d_cutoff)
+        self._kps_filter = OneEuroFilter(self.config.min_cutoff, self.config.beta, self.config.d_cutoff)
+        self.reset()
+
+    def reset(self):
+        self._prev_gray = None
+        self._prev_thumb = None
+        self._bbox = None
+        self._kps = None
+        self._score = 0.0
+        self._velocity = np.zeros(2, dtype=np.float32)
+        self._since_detect = 0
+        self._bbox_filter.reset()
+        self._kps_filter.reset()
+        self.frames = 0
+        self.detect_calls = 0
+        self.detect_reasons = {"interval": 0, "scene_cut": 0, "lost": 0, "no_face": 0}
+
+    def _detect(self, frame):
+        self.detect_calls += 1
+        bboxes, kpss = self.detect_fn(frame)
+        if bboxes is None or len(bboxes) == 0:
+            return False
+        bboxes = np.asarray(bboxes, dtype=np.float64)
+        if self._bbox is not None:
+            index = int(np.argmax(box_iou(self._bbox, bboxes)))
+        else:
+            areas = np.prod(bboxes[:, 2:4] - bboxes[:, :2], axis=1)
+            index = int(np.argmax(areas * bboxes[:, 4]))
+        self._bbox = bboxes[index, :4].copy()
+        self._score = float(bboxes[index, 4])
+        self._kps = np.asarray(kpss[index], dtype=np.float64).reshape(5, 2)
+        self._since_detect = 0
+        return True
+
+    def _track_points(self, gray):
+        """人脸框内网格点 + 关键点的前后向 LK 光流, 估计相似变换"""
+        x1, y1, x2, y2 = self._bbox
+        steps = (np.arange(self.config.grid_size) + 0.5) / self.config.grid_size
+        grid = np.stack(np.meshgrid(x1 + steps * (x2 - x1), y1 + steps * (y2 - y1)), -1).reshape(-1, 2)
+        points = np.concatenate([self._kps, grid]).astype(np.float32).reshape(-1, 1, 2)
+        guess = points + self._velocity
+
+        lk = dict(winSize=(self.config.win_size, self.config.win_size), maxLevel=self.config.max_level,
+                  criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03))
+        forward, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, points, guess.copy(),
+                                                      flags=cv2.OPTFLOW_USE_INITIAL_FLOW, **lk)
+        backward, status_back, _ = cv2.calcOpticalFlowPyrLK(gray, self._prev_gray, forward, None, **lk)
+        fb_error = np.linalg.norm((points - backward).reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (status_back.ravel() == 1) & (fb_error < self.config.fb_error_max)
+        if good.sum() < 3:
+            return None, 0.0
+        matrix, inliers = cv2.estimateAffinePartial2D(points[good], forward[good], method=cv2.RANSAC,
+                                                      ransacReprojThreshold=2.0)
+        if matrix is None:
+            return None, 0.0
+        quality = float(inliers.sum()) / len(points)
+
+        corners = np.array([[x1, y1], [x2, y2]], dtype=np.float64)
+        moved = corners @ matrix[:, :2].T + matrix[:, 2]
+        kps_rigid = self._kps @ matrix[:, :2].T + matrix[:, 2]
+        # 一致的关键点用自身光流 (保留口型等非刚性运动), 其余用整体相似变换
+        kps_good = good[:5]
+        kps = np.where(kps_good[:, None], forward[:5].reshape(5, 2), kps_rigid)
+        self._velocity = np.median((forward - points).reshape(-1, 2)[good], axis=0).astype(np.float32)
+        self._bbox = moved.reshape(4)
+        self._kps = kps
+        return True, quality
+
+    def update(self, frame: np.ndarray) -> Optional[FaceTrack]:
+        self.frames += 1
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        thumb = cv2.resize(gray, (64, 64), interpolation=cv2.INTER_AREA).astype(np.float32)
+
+        reason = None
+        if self._bbox is None:
+            reason = "no_face"
+        elif float(np.abs(thumb - self._prev_thumb).mean()) > self.config.scene_cut_threshold:
+            reason = "scene_cut"
+        elif self._since_detect + 1 >= self.config.detect_interval:
+            reason = "interval"
+
+        quality, source = 1.0, "detect"
+        if reason is None:
+            tracked, quality = self._track_points(gray)
+            if tracked is None or quality < self.config.min_quality:
+                reason = "lost"
+            else:
+                source = "track"
+                self._since_detect += 1
+
+        if reason is not None:
+            self.detect_reasons[reason] += 1
+            if reason in ("scene_cut", "lost", "no_face"):
+                # 不平滑跨越镜头切换 / 丢失的跳变
+                self._bbox_filter.reset()
+                self._kps_filter.reset()
+                self._velocity[:] = 0
+            found = self._detect(frame)
+            if not found:
+                self._bbox = None
+                self._prev_gray, self._prev_thumb = gray, thumb
+                return None
+
+        self._prev_gray, self._prev_thumb = gray, thumb
+        dt = 1.0 / self.fps
+        return FaceTrack(bbox=self._bbox_filter(self._bbox, dt), kps=self._kps_filter(self._kps, dt),
+                         score=self._score, source=source, quality=quality)
+
+    def get_stats(self):
+        return {
+            "frames": self.frames,
+            "detect_calls": self.detect_calls,
+            "detect_ratio": self.detect_calls / float(max(self.frames, 1)),
+            "detect_reasons": dict(self.detect_reasons),
+        }
+
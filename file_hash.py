@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文件内容哈希
+按 (大小, 修改时间) 记忆在 cache_dir/hashes.json 中, 未变化的文件不重复读取.
+只依赖标准库: 人脸索引 (face_index.py) 与 onnx 图优化缓存 (model_lib) 共用, 导入时不加载推理相关模块.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+HASH_INDEX = 'hashes.json'
+
+
+def file_sha256(path, cache_dir):
+    """
+    文件 sha256, 大小与修改时间不变时直接返回 hashes.json 中记录的值
+    每个写入方 (进程 + 线程) 使用自己的临时文件, 并发写入可能丢失对方新增的记录, 代价只是下次多算一次哈希
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    index_path = os.path.join(cache_dir, HASH_INDEX)
+    index = {}
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            index = json.load(f)
+    entry = index.get(path)
+    if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+        return entry['sha256']
+
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    index[path] = {'size': stat.st_size, 'mtime': stat.st_mtime, 'sha256': sha.hexdigest()}
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = '{}.{}.{}.tmp'.format(index_path, os.getpid(), threading.get_ident())
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, index_path)
+    return sha.hexdigest()
@@ -3,6 +3,7 @@ import random
 from data.base_dataset import BaseDataset, get_params, get_transform
 import torchvision.transforms as transforms
 from data.image_folder import make_dataset
+from data.feature_store import FeatureStore
 from PIL import Image, ImageEnhance
 import numpy as np
 import cv2
@@ -26,11 +27,17 @@ def obtain_seq_index(index, num_frames):
 
 def get_3dmm_feature(img_path, idx, audio_feature, new_dict):
     id = img_path.split('/')[-3]
-    features, features1, features1 = new_dict[id]
+    arrays = new_dict[id].arrays()
+    if len(arrays) != 2:
+        # the test-mode store only holds the audio feature, the wenet window needs audio_wenet_feature too
+        raise ValueError('feature store of {} holds {}, get_3dmm_feature needs [audio_feature, audio_wenet_feature]'
+                         .format(id, new_dict[id].names))
+    features, features1 = arrays
     idx_list = obtain_seq_index(idx, features.shape[0])
-    feature = features[idx_list, 80:144]
+    # only the 20-frame window is read from the memory-mapped store
+    rows = features[idx_list]
     feature1 = features1[:,audio_feature[0]:audio_feature[1]]
-    feature = np.concatenate([feature, features[idx_list, -3:], np.transpose(feature1, (1, 0))], 1)
+    feature = np.concatenate([rows[:, 80:144], rows[:, -3:], np.transpose(feature1, (1, 0))], 1)
     # print(feature.shape)
     return np.transpose(feature, (1, 0))
     # return feature
@@ -44,6 +51,7 @@ class Facereala3dmmexpwenet512Dataset(BaseDataset):
         idts = get_idts(opt.name.split('_')[0])
         print("---------load data list--------: ", idts)
         self.new_dict = {}
+        feature_mmap = getattr(opt, 'feature_mmap', True)
         if mode == 'train':
             self.labels = []
             self.label_starts = []
@@ -52,9 +60,8 @@ class Facereala3dmmexpwenet512Dataset(BaseDataset):
             for idt_name in idts:
                 # root = '../AnnVI/feature/{}'.format(idt_name)
                 root = os.path.join(opt.feature_path, idt_name)
-                feature = np.load(os.path.join(root, '%s.npy' % opt.audio_feature))
-                feature1 = np.load(os.path.join(root,'audio_wenet_feature.npy'))
-                self.new_dict[idt_name] = [feature, feature1, feature1]
+                self.new_dict[idt_name] = FeatureStore(root, [opt.audio_feature, 'audio_wenet_feature'],
+                                                       mmap=feature_mmap)
                 if opt.audio_feature == "3dmm":
                     training_data_path = os.path.join(root, '{}_{}.t7'.format(img_size, mode))
                 else:
@@ -95,8 +102,7 @@ class Facereala3dmmexpwenet512Dataset(BaseDataset):
             for idt_name in idts:
                 # root = '../AnnVI/feature/{}'.format(idt_name)
                 root = os.path.join(opt.feature_path, idt_name)
-                feature = np.load(os.path.join(root, '%s.npy' % opt.audio_feature))
-                self.new_dict[idt_name] = feature
+                self.new_dict[idt_name] = FeatureStore(root, [opt.audio_feature], mmap=feature_mmap)
                 if opt.audio_feature == "3dmm":
                     training_data_path = os.path.join(root, '{}_{}.t7'.format(img_size, mode))
                 else:
@@ -0,0 +1,144 @@
+"""Memory-mapped per-identity feature store.
+
+Every identity directory gets one consolidated data file (feature_store.bin) holding all of
+its feature arrays back to back, plus one index file (feature_store.json) recording the
+offset, shape and dtype of each array. Arrays are opened with np.memmap, so DataLoader
+workers share the same page-cache pages instead of each holding a private np.load copy.
+
+The store is opened lazily: pickling a FeatureStore only carries the index, and a spawned
+worker maps the data file again on first access.
+
+Per-worker RSS report, legacy np.load vs mmap: tools/feature_store_rss.py
+"""
+import fcntl
+import json
+import os
+from contextlib import contextmanager
+
+import numpy as np
+
+FEATURE_STORE_INDEX = 'feature_store.json'
+FEATURE_STORE_DATA = 'feature_store.bin'
+FEATURE_STORE_LOCK = 'feature_store.lock'
+FEATURE_STORE_VERSION = 1
+_ALIGNMENT = 64
+
+
+def _source_path(root, name):
+    return os.path.join(root, '%s.npy' % name)
+
+
+def _index_is_fresh(root, names):
+    index_path = os.path.join(root, FEATURE_STORE_INDEX)
+    data_path = os.path.join(root, FEATURE_STORE_DATA)
+    if not (os.path.exists(index_path) and os.path.exists(data_path)):
+        return False
+    with open(index_path) as f:
+        index = json.load(f)
+    if index.get('version') != FEATURE_STORE_VERSION:
+        return False
+    arrays = index['arrays']
+    for name in names:
+        if name not in arrays:
+            return False
+        source = _source_path(root, name)
+        # rebuild when the source .npy has been re-extracted
+        if os.path.exists(source) and os.path.getmtime(source) > arrays[name]['source_mtime']:
+            return False
+    return True
+
+
+@contextmanager
+def _store_lock(root):
+    """Exclusive lock on <root>/feature_store.lock, one builder per identity across processes."""
+    with open(os.path.join(root, FEATURE_STORE_LOCK), 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def ensure_feature_store(root, names):
+    """Build the store unless a fresh one exists, workers starting together build it once."""
+    if _index_is_fresh(root, names):
+        return
+    with _store_lock(root):
+        # another process may have built it while this one waited for the lock
+        if not _index_is_fresh(root, names):
+            build_feature_store(root, names)
+
+
+def build_feature_store(root, names):
+    """Consolidate <root>/<name>.npy for every name into one aligned data file + json index."""
+    index_path = os.path.join(root, FEATURE_STORE_INDEX)
+    data_path = os.path.join(root, FEATURE_STORE_DATA)
+    arrays = {}
+    offset = 0
+    # per-process temp names, concurrent builders never write into the same file
+    tmp_path = '%s.%d.tmp' % (data_path, os.getpid())
+    with open(tmp_path, 'wb') as f:
+        for name in names:
+            source = _source_path(root, name)
+            # mmap the source too, so building never holds a full copy in memory
+            array = np.load(source, mmap_mode='r')
+            pad = (-offset) % _ALIGNMENT
+            f.write(b'\0' * pad)
+            offset += pad
+            np.ascontiguousarray(array).tofile(f)
+            arrays[name] = {
+                'offset': offset,
+                'shape': list(array.shape),
+                'dtype': array.dtype.str,
+                'source_mtime': os.path.getmtime(source),
+            }
+            offset += array.nbytes
+    os.replace(tmp_path, data_path)
+    tmp_path = '%s.%d.tmp' % (index_path, os.getpid())
+    with open(tmp_path, 'w') as f:
+        json.dump({'version': FEATURE_STORE_VERSION, 'arrays': arrays}, f, indent=2)
+    os.replace(tmp_path, index_path)
+    return arrays
+
+
+class FeatureStore:
+    """Read-only view over the consolidated feature arrays of one identity.
+
+    Args:
+        root: identity feature directory (opt.feature_path/<idt_name>)
+        names: array names, i.e. the .npy stems, in the order arrays() returns them
+        mmap: False falls back to fully loading every array (the legacy behaviour)
+    """
+
+    def __init__(self, root, names, mmap=True):
+        self.root = root
+        self.names = list(names)
+        self.mmap = mmap
+        ensure_feature_store(root, self.names)
+        with open(os.path.join(root, FEATURE_STORE_INDEX)) as f:
+            self.index = json.load(f)['arrays']
+        self._arrays = None
+
+    def _open(self):
+        data_path = os.path.join(self.root, FEATURE_STORE_DATA)
+        arrays = []
+        for name in self.names:
+            info = self.index[name]
+            array = np.memmap(data_path, dtype=np.dtype(info['dtype']), mode='r',
+                              offset=info['offset'], shape=tuple(info['shape']))
+            arrays.append(array if self.mmap else np.array(array))
+        self._arrays = tuple(arrays)
+
+    def arrays(self):
+        # forked workers inherit the mapping, unpickled (spawn) workers map the file again here
+        if self._arrays is None:
+            self._open()
+        return self._arrays
+
+    def __getitem__(self, name):
+        return self.arrays()[self.names.index(name)]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_arrays'] = None
+        return state
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+延迟导入与启动导入耗时分析
+gradio / flask / requests / cv2 / onnxruntime 以及 service.trans_dh_service (torch, librosa, numba ...)
+在首次使用时才导入, 入口脚本 (run.py --help 等) 不再为用不到的模块付出导入时间.
+另提供 -X importtime 风格的导入耗时分解与冷启动导入预算检查.
+"""
+
+import configparser
+import importlib
+import json
+import os
+import subprocess
+import sys
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+
+
+class LazyModule:
+    """模块代理, 首次访问属性 (包括赋值) 时才真正导入"""
+
+    def __init__(self, name: str):
+        object.__setattr__(self, "_lazy_name", name)
+        object.__setattr__(self, "_lazy_module", None)
+        object.__setattr__(self, "_lazy_lock", threading.Lock())
+
+    def _load(self):
+        module = self._lazy_module
+        if module is None:
+            with self._lazy_lock:
+                module = self._lazy_module
+                if module is None:
+                    module = importlib.import_module(self._lazy_name)
+                    object.__setattr__(self, "_lazy_module", module)
+        return module
+
+    def __getattr__(self, item):
+        return getattr(self._load(), item)
+
+    def __setattr__(self, item, value):
+        setattr(self._load(), item, value)
+
+    def __repr__(self):
+        state = "loaded" if self._lazy_module is not None else "not loaded"
+        return "<lazy module '{}' ({})>".format(self._lazy_name, state)
+
+
+def lazy_import(name: str) -> LazyModule:
+    """已导入的模块直接复用, 否则返回延迟导入代理"""
+    return sys.modules.get(name) or LazyModule(name)
+
+
+@dataclass
+class ImportRecord:
+    """-X importtime 的一行 (微秒)"""
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(stderr: str) -> List[ImportRecord]:
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        records.append(ImportRecord(name.strip(), int(self_us), int(cumulative_us), depth))
+    return records
+
+
+def profile_imports(target: str, cwd: Optional[str] = None) -> List[ImportRecord]:
+    """在全新解释器中导入 target (冷启动), 返回 -X importtime 记录"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import {}".format(target)],
+                            cwd=cwd or os.path.dirname(os.path.abspath(__file__)),
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    records = parse_importtime(result.stderr)
+    if result.returncode != 0:
+        output = (result.stderr + result.stdout).splitlines()
+        error = [line for line in output if not line.startswith("import time:")]
+        raise ImportError("import {} failed ({}): {}".format(target, result.returncode, error[-1] if error else ""))
+    return records
+
+
+def imported_modules(target: str, cwd: Optional[str] = None) -> Set[str]:
+    """在全新解释器中导入 target, 返回导入后 sys.modules 中的全部模块名"""
+    result = subprocess.run([sys.executable, "-c", "import json, sys, {}; print(json.dumps(sorted(sys.modules)))".format(
+        target)], cwd=cwd or os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    if result.returncode != 0:
+        output = (result.stderr + result.stdout).strip().splitlines()
+        raise ImportError("import {} failed ({}): {}".format(target, result.returncode, output[-1] if output else ""))
+    return set(json.loads(result.stdout.strip().splitlines()[-1]))
+
+
+def cold_import_time(records: List[ImportRecord], target: str) -> float:
+    """target 的累计导入耗时 (秒)"""
+    for record in reversed(records):
+        if record.name == target and record.depth == 0:
+            return record.cumulative_us / 1e6
+    return sum(record.self_us for record in records) / 1e6
+
+
+def import_breakdown(records: List[ImportRecord], top: int = 15) -> List[tuple]:
+    """按顶层包汇总自身耗时, [(包名, 秒, 模块数), ...] 从大到小"""
+    totals = defaultdict(lambda: [0, 0])
+    for record in records:
+        package = record.name.split(".")[0]
+        totals[package][0] += record.self_us
+        totals[package][1] += 1
+    ranked = sorted(totals.items(), key=lambda item: -item[1][0])[:top]
+    return [(package, self_us / 1e6, count) for package, (self_us, count) in ranked]
+
+
+def print_import_profile(target: str, top: int = 15) -> float:
+    records = profile_imports(target)
+    total = cold_import_time(records, target)
+    print("import {}: {:.3f}s, {} modules".format(target, total, len(records)))
+    for package, seconds, count in import_breakdown(records, top):
+        print("  {:<28s} {:7.3f}s {:5.1f}% ({} modules)".format(
+            package, seconds, seconds / max(total, 1e-9) * 100, count))
+    return total
+
+
+def load_import_budgets(targets: List[str], config_path: str = "config/config.ini") -> Dict[str, float]:
+    """[startup] import_budget_s, 单个入口可用 import_budget_<入口名> 覆盖"""
+    config = configparser.ConfigParser()
+    config.read(config_path)
+    default = config.getfloat("startup", "import_budget_s", fallback=1.0)
+    return {target: config.getfloat("startup", "import_budget_{}".format(target), fallback=default)
+            for target in targets}
+
+
+def check_import_budget(budgets: Dict[str, float]) -> Dict[str, float]:
+    """
+    冷启动导入耗时与预算比较, 无法导入的入口没有被检查, 同样算作失败
+    Returns:
+        {入口: 耗时秒数}
+    Raises:
+        AssertionError: 任一入口超出预算或无法导入
+    """
+    timings, failures = {}, []
+    for target, budget in budgets.items():
+        try:
+            timings[target] = cold_import_time(profile_imports(target), target)
+        except ImportError as e:
+            failures.append("{} 无法导入, 未检查 ({})".format(target, e))
+            continue
+        if timings[target] > budget:
+            failures.append("{} {:.3f}s > {:.3f}s".format(target, timings[target], budget))
+    assert not failures, "冷启动导入预算检查失败: {}".format(", ".join(failures))
+    return timings
+
+
+# 命令行: python lazy_imports.py app run --check
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="入口模块冷启动导入耗时分析 / 预算检查")
+    parser.add_argument("targets", nargs="*", default=["app", "run"])
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--check", action="store_true", help="超出 [startup] 导入预算或无法导入时以非零状态退出")
+    args = parser.parse_args()
+
+    for name in args.targets:
+        try:
+            print_import_profile(name, args.top)
+        except ImportError as e:
+            print(e)
+    if args.check:
+        try:
+            check_import_budget(load_import_budgets(args.targets))
+        except AssertionError as e:
+            print("❌ {}".format(e))
+            sys.exit(1)
+        print("✅ 导入耗时在预算内")
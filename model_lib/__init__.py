@@ -1,4 +1,7 @@
 from .base_wrapper import ONNXModel
 from .model_base import ModelBase
+from .micro_batcher import MicroBatcher, get_batcher
+from .model_registry import ModelRegistry, registry_from_config, serve_health
+from .scrfd_batch import SCRFDBatch
 
 
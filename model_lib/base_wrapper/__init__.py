@@ -3,4 +3,8 @@
 
 
 from .onnx_model import ONNXModel
+from .onnx_session_model import ONNXSessionModel
+from .onnx_binding_model import ONNXBindingModel
+from .onnx_model_picklable import OnnxModelPickable
+from .onnx_process_pool import ONNXProcessPool
 
@@ -0,0 +1,117 @@
+# -- coding: utf-8 --
+# @Time : 2026/10/19
+
+
+import configparser
+import os
+
+import onnxruntime
+
+GPU_PROVIDERS = ('gpu', 'trt', 'trt16', 'trt8')
+
+
+def _parse_cores(text):
+    """'0-3,6,8-9' -> [0, 1, 2, 3, 6, 8, 9]"""
+    cores = []
+    for part in text.replace(' ', '').split(','):
+        if not part:
+            continue
+        if '-' in part:
+            first, last = part.split('-')
+            cores.extend(range(int(first), int(last) + 1))
+        else:
+            cores.append(int(part))
+    return cores
+
+
+def resolve_provider(provider):
+    """
+    fall back to 'cpu' when a gpu provider is requested but CUDA is not usable
+    (onnxruntime without CUDA, or CUDA_VISIBLE_DEVICES hiding every device as run_cpu_mode.sh does)
+    """
+    if provider not in GPU_PROVIDERS:
+        return provider
+    available = onnxruntime.get_available_providers()
+    wanted = 'TensorrtExecutionProvider' if provider.startswith('trt') else 'CUDAExecutionProvider'
+    visible = os.environ.get('CUDA_VISIBLE_DEVICES')
+    if wanted not in available or (visible is not None and visible.strip() in ('', '-1')):
+        print('{} not usable (available: {}), falling back to cpu'.format(wanted, available))
+        return 'cpu'
+    return provider
+
+
+class CpuProfile:
+    """
+    ONNX Runtime settings for CPU-only runs, [cpu_profile] in config.ini:
+        threads          cores the models may use in total, default: all cores of the process minus reserve_threads
+        reserve_threads  cores left to ffmpeg / video writer / python
+        model_threads    per model thread budget weights, e.g. scrfd:1,face_parsing:2,gfpgan:3 (others weight 1)
+        execution_mode   sequential | parallel
+        inter_op_threads inter-op threads of parallel mode
+        pin_cores        optional core list ('0-7'), every model gets its own disjoint slice of it
+    """
+
+    def __init__(self, threads=None, reserve_threads=2, model_threads=None, execution_mode='sequential',
+                 inter_op_threads=1, pin_cores=None):
+        if pin_cores:
+            self.cores = list(pin_cores)
+        elif hasattr(os, 'sched_getaffinity'):
+            self.cores = sorted(os.sched_getaffinity(0))
+        else:
+            self.cores = list(range(os.cpu_count() or 1))
+        self.threads = max(threads or len(self.cores) - reserve_threads, 1)
+        self.model_threads = model_threads or {}
+        self.execution_mode = execution_mode
+        self.inter_op_threads = inter_op_threads
+        self.pin = bool(pin_cores)
+        self._assigned = {}
+
+    @classmethod
+    def from_config(cls, config_path='config/config.ini'):
+        config = configparser.ConfigParser()
+        config.read(config_path)
+        if not config.getboolean('cpu_profile', 'enable', fallback=False):
+            return None
+        model_threads = {}
+        for item in config.get('cpu_profile', 'model_threads', fallback='').split(','):
+            if ':' in item:
+                name, weight = item.split(':')
+                model_threads[name.strip()] = float(weight)
+        return cls(threads=config.getint('cpu_profile', 'threads', fallback=0) or None,
+                   reserve_threads=config.getint('cpu_profile', 'reserve_threads', fallback=2),
+                   model_threads=model_threads,
+                   execution_mode=config.get('cpu_profile', 'execution_mode', fallback='sequential'),
+                   inter_op_threads=config.getint('cpu_profile', 'inter_op_threads', fallback=1),
+                   pin_cores=_parse_cores(config.get('cpu_profile', 'pin_cores', fallback='')))
+
+    def threads_for(self, name):
+        """thread budget of one model: its weight's share of the total, at least 1"""
+        weights = dict(self.model_threads)
+        weights.setdefault(name, 1.0)
+        return max(int(round(self.threads * weights[name] / sum(weights.values()))), 1)
+
+    def cores_for(self, name, threads):
+        """disjoint core slice per model, assigned in load order and wrapping around the pinned set"""
+        if name not in self._assigned:
+            start = sum(len(cores) for cores in self._assigned.values())
+            self._assigned[name] = [self.cores[(start + i) % len(self.cores)] for i in range(threads)]
+        return self._assigned[name]
+
+    def session_options(self, name):
+        session_options = onnxruntime.SessionOptions()
+        session_options.log_severity_level = 3
+        threads = self.threads_for(name)
+        session_options.intra_op_num_threads = threads
+        if self.execution_mode == 'parallel':
+            session_options.execution_mode = onnxruntime.ExecutionMode.ORT_PARALLEL
+            session_options.inter_op_num_threads = self.inter_op_threads
+        else:
+            session_options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        # idle intra-op threads spin by default, which steals cores from the other models
+        session_options.add_session_config_entry('session.intra_op.allow_spinning', '0')
+        cores = self.cores_for(name, threads)
+        if self.pin and threads > 1:
+            # one entry per intra-op worker thread (the calling thread is the first worker), 1-based core ids
+            session_options.add_session_config_entry(
+                'session.intra_op_thread_affinities', ';'.join(str(core + 1) for core in cores[1:]))
+        return session_options
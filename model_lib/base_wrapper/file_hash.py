@@ -0,0 +1,6 @@
+# -- coding: utf-8 --
+# @Time : 2026/10/19
+
+
+# the helper lives in the dependency-free top-level file_hash.py, face_index.py imports it without the inference stack
+from file_hash import HASH_INDEX, file_sha256  # noqa: F401
@@ -0,0 +1,115 @@
+# -- coding: utf-8 --
+# @Time : 2026/10/19
+
+
+import mmap
+import struct
+from pathlib import Path
+
+AES_BLOCK_SIZE = 16
+AES_KEY_SIZE = 16
+
+# magic, format version, pad length; the AES-ECB ciphertext of model + pad follows
+ENCRYPT_HEADER = struct.Struct('<8sII')
+ENCRYPT_MAGIC = b'MLENCMDL'
+ENCRYPT_VERSION = 1
+
+# the pad is an unknown length-delimited protobuf field (number 2000, 2-byte tag), onnx / onnxruntime skip it,
+# so the decrypted bytes load as they are instead of being sliced into a copy
+_PAD_TAG = bytes([((2000 << 3) | 2) & 0x7f | 0x80, ((2000 << 3) | 2) >> 7])
+_MIN_PAD = len(_PAD_TAG) + 1
+
+
+def _aes():
+    try:
+        from Crypto.Cipher import AES
+    except ImportError:
+        raise ImportError('encrypted models need crypto: pip install pycryptodome')
+    return AES
+
+
+def _pad_key(key):
+    key = key.encode() if isinstance(key, str) else key
+    return key[:AES_KEY_SIZE].ljust(AES_KEY_SIZE, b' ')
+
+
+def _pad(pad_len):
+    return _PAD_TAG + bytes([pad_len - _MIN_PAD]) + b' ' * (pad_len - _MIN_PAD)
+
+
+def _legacy_pad_len(model_path):
+    """cv2box CVEncrypt files carry the pad length in the name, xxx_{pad_len}.bin"""
+    try:
+        return int(Path(model_path).stem.rsplit('_', 1)[1])
+    except (IndexError, ValueError):
+        raise ValueError('{} is neither an encrypted model of format {} nor a legacy xxx_{{pad_len}}.bin'.format(
+            model_path, ENCRYPT_VERSION))
+
+
+def _decrypt(ciphertext, key):
+    return _aes().new(_pad_key(key), _aes().MODE_ECB).decrypt(ciphertext)
+
+
+def load_encrypt_model(model_path, key):
+    """
+    Decrypt an encrypted model straight into memory, nothing is written to disk.
+    The ciphertext is read through mmap and decrypted into the one bytes object onnxruntime.InferenceSession takes.
+    Files without the header are the legacy cv2box CVEncrypt format (space padded, pad length in the file name),
+    their pad is sliced off, which costs one extra copy of the model.
+    Args:
+        model_path: file written by encrypt_model, or a legacy xxx_{pad_len}.bin
+        key: model_info['encrypt']
+    Returns:
+        model bytes
+    """
+    with open(model_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        if mapped[:len(ENCRYPT_MAGIC)] != ENCRYPT_MAGIC:
+            return _load_legacy(model_path, mapped, key)
+        magic, version, pad_len = ENCRYPT_HEADER.unpack_from(mapped)
+        if version != ENCRYPT_VERSION:
+            raise ValueError('{}: encrypted model format {} is not supported, expected {}'.format(
+                model_path, version, ENCRYPT_VERSION))
+        view = memoryview(mapped)
+        ciphertext = view[ENCRYPT_HEADER.size:]
+        try:
+            model = _decrypt(ciphertext, key)
+        finally:
+            ciphertext.release()
+            view.release()
+    if not model.endswith(_pad(pad_len)):
+        raise ValueError('{}: wrong key or corrupted file'.format(model_path))
+    return model
+
+
+def _load_legacy(model_path, mapped, key):
+    pad_len = _legacy_pad_len(model_path)
+    if len(mapped) % AES_BLOCK_SIZE or not 0 <= pad_len < AES_BLOCK_SIZE:
+        raise ValueError('{}: not a legacy encrypted model'.format(model_path))
+    view = memoryview(mapped)
+    try:
+        model = _decrypt(view, key)
+    finally:
+        view.release()
+    if pad_len:
+        # cv2box pads with spaces, anything else means a wrong key
+        if model[-pad_len:] != b' ' * pad_len:
+            raise ValueError('{}: wrong key or corrupted file'.format(model_path))
+        model = model[:-pad_len]
+    return model
+
+
+def encrypt_model(onnx_path, key, output_dir=None):
+    """
+    Encrypt a model into the format load_encrypt_model reads.
+    Returns:
+        path of the encrypted file, xxx.bin
+    """
+    with open(onnx_path, 'rb') as f:
+        data = f.read()
+    pad_len = -(len(data) + _MIN_PAD) % AES_BLOCK_SIZE + _MIN_PAD
+    encrypted = _aes().new(_pad_key(key), _aes().MODE_ECB).encrypt(data + _pad(pad_len))
+    output_path = Path(output_dir or Path(onnx_path).parent) / '{}.bin'.format(Path(onnx_path).stem)
+    with open(output_path, 'wb') as f:
+        f.write(ENCRYPT_HEADER.pack(ENCRYPT_MAGIC, ENCRYPT_VERSION, pad_len))
+        f.write(encrypted)
+    return str(output_path)
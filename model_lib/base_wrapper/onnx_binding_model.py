@@ -0,0 +1,178 @@
+# -- coding: utf-8 --
+# @Time : 2026/10/19
+
+
+import threading
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+import onnxruntime
+
+from .onnx_session_model import ONNXSessionModel
+
+ORT_TYPE_TO_NUMPY = {
+    'tensor(float)': np.float32,
+    'tensor(float16)': np.float16,
+    'tensor(double)': np.float64,
+    'tensor(int64)': np.int64,
+    'tensor(int32)': np.int32,
+    'tensor(int8)': np.int8,
+    'tensor(uint8)': np.uint8,
+    'tensor(bool)': np.bool_,
+}
+
+
+class _BufferSet:
+    """preallocated input/output buffers of one input signature"""
+
+    def __init__(self, binding):
+        self.binding = binding
+        self.inputs = []
+        self.outputs = None
+
+
+class ONNXBindingModel(ONNXSessionModel):
+    """
+    ONNXModel running through io_binding with preallocated buffers.
+    Inputs are copied into buffers reused per (shape, dtype) signature, outputs are written by ORT straight into
+    preallocated buffers, so a steady-state forward allocates nothing on CPU and reuses device buffers on GPU.
+    Every calling thread gets its own buffer pool, a pool keeps the last `max_shapes` signatures
+    (input_dynamic_shape models see a few batch / image sizes).
+
+    Outputs are copied out of the pooled buffers by default. copy_outputs=False returns the pooled buffers themselves
+    on CPU, saving one copy per output: they are overwritten by the next forward of the same thread with the same
+    input shape, only callers that consume the result before that may opt in.
+    """
+
+    def __init__(self, onnx_path, provider='gpu', warmup=False, debug=False, input_dynamic_shape=None,
+                 max_shapes=4, copy_outputs=True, latency_window=1000, session_options=None):
+        self.max_shapes = max_shapes
+        self.copy_outputs = copy_outputs
+        self.device = 'cpu' if provider not in ('gpu', 'trt', 'trt16', 'trt8') else 'cuda'
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.latency = deque(maxlen=latency_window)
+        self.calls = 0
+        self.buffer_allocs = 0
+        super().__init__(onnx_path, provider=provider, warmup=warmup, debug=debug,
+                         input_dynamic_shape=input_dynamic_shape, session_options=session_options)
+        self.input_dtype = [ORT_TYPE_TO_NUMPY.get(t, np.float32) for t in self.input_type]
+
+    def _pool(self):
+        pool = getattr(self._local, 'pool', None)
+        if pool is None:
+            pool = self._local.pool = OrderedDict()
+        return pool
+
+    def _new_buffer(self, shape, dtype):
+        with self._stats_lock:
+            self.buffer_allocs += 1
+        if self.device == 'cpu':
+            return np.empty(shape, dtype=dtype)
+        return onnxruntime.OrtValue.ortvalue_from_shape_and_type(shape, dtype, 'cuda', 0)
+
+    def _buffer_set(self, image_tensor_in):
+        key = tuple((tensor.shape, tensor.dtype.str) for tensor in image_tensor_in)
+        pool = self._pool()
+        buffer_set = pool.get(key)
+        if buffer_set is not None:
+            pool.move_to_end(key)
+            return buffer_set
+
+        buffer_set = _BufferSet(self.onnx_session.io_binding())
+        for index, tensor in enumerate(image_tensor_in):
+            buffer = self._new_buffer(tensor.shape, self.input_dtype[index])
+            buffer_set.inputs.append(buffer)
+            self._bind_input(buffer_set.binding, index, buffer)
+        pool[key] = buffer_set
+        while len(pool) > self.max_shapes:
+            pool.popitem(last=False)
+        return buffer_set
+
+    def _bind_input(self, binding, index, buffer):
+        if self.device == 'cpu':
+            binding.bind_input(self.input_name[index], 'cpu', 0, buffer.dtype, list(buffer.shape),
+                               buffer.ctypes.data)
+        else:
+            binding.bind_ortvalue_input(self.input_name[index], buffer)
+
+    def _bind_outputs(self, buffer_set, first_outputs):
+        # output shapes of dynamic models are only known after the first run of a signature
+        buffer_set.outputs = []
+        for name, output in zip(self.output_name, first_outputs):
+            buffer = self._new_buffer(output.shape, output.dtype)
+            buffer_set.outputs.append(buffer)
+            if self.device == 'cpu':
+                buffer_set.binding.bind_output(name, 'cpu', 0, buffer.dtype, list(buffer.shape), buffer.ctypes.data)
+            else:
+                buffer_set.binding.bind_ortvalue_output(name, buffer)
+
+    def _run(self, image_tensor_in):
+        start = time.perf_counter()
+        buffer_set = self._buffer_set(image_tensor_in)
+        for index, (buffer, tensor) in enumerate(zip(buffer_set.inputs, image_tensor_in)):
+            if self.device == 'cpu':
+                np.copyto(buffer, tensor, casting='unsafe')
+            else:
+                buffer.update_inplace(np.ascontiguousarray(tensor, dtype=self.input_dtype[index]))
+
+        if buffer_set.outputs is None:
+            for name in self.output_name:
+                buffer_set.binding.bind_output(name, 'cpu')
+            self.onnx_session.run_with_iobinding(buffer_set.binding)
+            outputs = buffer_set.binding.copy_outputs_to_cpu()
+            self._bind_outputs(buffer_set, outputs)
+        else:
+            self.onnx_session.run_with_iobinding(buffer_set.binding)
+            if self.device == 'cpu':
+                outputs = [buffer.copy() for buffer in buffer_set.outputs] if self.copy_outputs \
+                    else list(buffer_set.outputs)
+            else:
+                outputs = [buffer.numpy() for buffer in buffer_set.outputs]
+
+        elapsed = time.perf_counter() - start
+        with self._stats_lock:
+            self.calls += 1
+            self.latency.append(elapsed)
+        return outputs
+
+    def forward(self, image_tensor_in, trans=False):
+        """
+        Args:
+            image_tensor_in: image_tensor [image_tensor] [image_tensor_1, image_tensor_2]
+            trans: apply trans for image_tensor or first image_tensor(list)
+        Returns:
+            model output
+        """
+        if not isinstance(image_tensor_in, list) or len(image_tensor_in) == 1:
+            image_tensor_in = image_tensor_in[0] if isinstance(image_tensor_in, list) else image_tensor_in
+            if trans:
+                image_tensor_in = image_tensor_in.transpose(2, 0, 1)[np.newaxis, :]
+            image_tensor_in = [np.asarray(image_tensor_in)]
+        else:
+            if trans:
+                image_tensor_in[0] = image_tensor_in[0].transpose(2, 0, 1)[np.newaxis, :]
+            image_tensor_in = [np.asarray(image_tensor) for image_tensor in image_tensor_in]
+        return self._run(image_tensor_in)
+
+    def batch_forward(self, bach_image_tensor, trans=False):
+        if trans:
+            bach_image_tensor = bach_image_tensor.transpose(0, 3, 1, 2)
+        return self._run([np.asarray(bach_image_tensor)])
+
+    def get_latency_stats(self):
+        """per-call latency (ms) over the last latency_window calls"""
+        with self._stats_lock:
+            latency = np.array(self.latency) * 1000
+            calls, buffer_allocs = self.calls, self.buffer_allocs
+        if not len(latency):
+            return {'calls': calls, 'buffer_allocs': buffer_allocs}
+        return {
+            'calls': calls,
+            'buffer_allocs': buffer_allocs,
+            'mean_ms': float(latency.mean()),
+            'p50_ms': float(np.percentile(latency, 50)),
+            'p95_ms': float(np.percentile(latency, 95)),
+            'max_ms': float(latency.max()),
+        }
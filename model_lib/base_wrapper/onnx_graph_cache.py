@@ -0,0 +1,72 @@
+# -- coding: utf-8 --
+# @Time : 2026/10/19
+
+
+import os
+from pathlib import Path
+
+import onnxruntime
+
+from .file_hash import file_sha256
+from .onnx_session_model import session_providers
+
+GRAPH_CACHE_DIR = './cache/ort'
+
+
+def model_hash(onnx_path, cache_dir=GRAPH_CACHE_DIR):
+    """sha256 of the model file, memoized by (size, mtime) so unchanged models are not re-read"""
+    return file_sha256(onnx_path, cache_dir)
+
+
+def optimized_model_path(onnx_path, provider, cache_dir=GRAPH_CACHE_DIR):
+    """cache file name carries every key: model hash, onnxruntime version, provider"""
+    key = '{}_{}_{}'.format(model_hash(onnx_path, cache_dir)[:16], onnxruntime.__version__, provider)
+    return os.path.join(cache_dir, '{}_{}.onnx'.format(Path(onnx_path).stem, key))
+
+
+def _building_path(cached_path):
+    # per process, concurrent cold starts never write the same file
+    return '{}.{}.tmp.onnx'.format(cached_path[:-len('.onnx')], os.getpid())
+
+
+def get_optimized_model(onnx_path, provider='gpu', session_options=None, cache_dir=GRAPH_CACHE_DIR):
+    """
+    Session path and options reusing the onnxruntime-optimized graph of onnx_path.
+    On a cold start the options make the serving session write the optimized graph itself, no extra session is built,
+    call commit_optimized_model once that session exists.
+    Args:
+        onnx_path: plain .onnx file, decrypted bytes are never written to the cache
+        provider: ONNXModel provider
+        session_options: options to extend, a new SessionOptions when None
+    Returns:
+        (model path to load, session options, 'warm' | 'cold' | 'skip')
+    """
+    if session_providers(provider) is None or not isinstance(onnx_path, (str, Path)) \
+            or Path(onnx_path).suffix != '.onnx':
+        return onnx_path, session_options, 'skip'
+
+    cached_path = optimized_model_path(onnx_path, provider, cache_dir)
+    if os.path.exists(cached_path):
+        return cached_path, session_options, 'warm'
+
+    if session_options is None:
+        session_options = onnxruntime.SessionOptions()
+        session_options.log_severity_level = 3
+    # layout optimizations of ORT_ENABLE_ALL only apply to cpu nodes
+    session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL \
+        if provider == 'cpu' else onnxruntime.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+    session_options.optimized_model_filepath = _building_path(cached_path)
+    return str(onnx_path), session_options, 'cold'
+
+
+def commit_optimized_model(onnx_path, provider='gpu', cache_dir=GRAPH_CACHE_DIR):
+    """move the graph written by a cold-start session into the cache and drop caches of older versions"""
+    cached_path = optimized_model_path(onnx_path, provider, cache_dir)
+    os.replace(_building_path(cached_path), cached_path)
+
+    # older versions of this model / other ort versions for the same provider
+    stem = Path(onnx_path).stem
+    for stale in Path(cache_dir).glob('{}_{}_*_{}.onnx'.format(stem, '[0-9a-f]' * 16, provider)):
+        if stale != Path(cached_path):
+            stale.unlink(missing_ok=True)
+    return cached_path
@@ -0,0 +1,72 @@
+# -- coding: utf-8 --
+# @Time : 2026/10/19
+
+
+import onnxruntime
+
+from .onnx_session_model import ONNXSessionModel
+
+
+class OnnxModelPickable:
+    """
+    ONNXModel that pickles as its constructor arguments. The InferenceSession is created on first use in the process
+    that runs it, so a parent can hand models to worker processes without ever loading them itself.
+    Args:
+        intra_op_num_threads: 0 for onnxruntime default, cpu sessions only
+    """
+
+    def __init__(self, onnx_path, provider='gpu', input_dynamic_shape=None, intra_op_num_threads=0):
+        self.onnx_path = onnx_path
+        self.provider = provider
+        self.input_dynamic_shape = input_dynamic_shape
+        self.intra_op_num_threads = intra_op_num_threads
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            session_options = None
+            if self.intra_op_num_threads and self.provider not in ('gpu', 'trt', 'trt16', 'trt8'):
+                session_options = onnxruntime.SessionOptions()
+                session_options.log_severity_level = 3
+                session_options.intra_op_num_threads = self.intra_op_num_threads
+                # several sessions share the cores, idle threads must not spin
+                session_options.add_session_config_entry('session.intra_op.allow_spinning', '0')
+            self._model = ONNXSessionModel(self.onnx_path, provider=self.provider,
+                                           input_dynamic_shape=self.input_dynamic_shape,
+                                           session_options=session_options)
+        return self._model
+
+    @property
+    def onnx_session(self):
+        return self.model.onnx_session
+
+    @property
+    def input_name(self):
+        return self.model.input_name
+
+    @property
+    def input_shape(self):
+        return self.model.input_shape
+
+    @property
+    def input_type(self):
+        return self.model.input_type
+
+    @property
+    def output_name(self):
+        return self.model.output_name
+
+    def forward(self, image_tensor_in, trans=False):
+        return self.model.forward(image_tensor_in, trans=trans)
+
+    def __getstate__(self):
+        return {
+            'onnx_path': self.onnx_path,
+            'provider': self.provider,
+            'input_dynamic_shape': self.input_dynamic_shape,
+            'intra_op_num_threads': self.intra_op_num_threads,
+        }
+
+    def __setstate__(self, values):
+        self.__init__(**values)
@@ -0,0 +1,233 @@
+# -- coding: utf-8 --
+# @Time : 2026/10/19
+
+
+import atexit
+import multiprocessing
+import os
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .onnx_model_picklable import OnnxModelPickable
+
+_ALIGN = 64
+
+
+def _layout(arrays):
+    """[(shape, dtype, offset), ...] and total bytes, every array 64-byte aligned inside one segment"""
+    specs, offset = [], 0
+    for array in arrays:
+        specs.append((array.shape, array.dtype.str, offset))
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+    return specs, offset
+
+
+def _views(shm, specs):
+    return [np.ndarray(shape, dtype, buffer=shm.buf, offset=offset) for shape, dtype, offset in specs]
+
+
+class _Segment:
+    """shared memory owned by one side, replaced by a bigger one when a batch does not fit"""
+
+    def __init__(self):
+        self.shm = None
+
+    def write(self, arrays):
+        specs, nbytes = _layout(arrays)
+        if self.shm is None or self.shm.size < nbytes:
+            self.release()
+            # headroom so a slightly bigger last batch does not reallocate
+            self.shm = shared_memory.SharedMemory(create=True, size=max(nbytes + nbytes // 4, _ALIGN))
+        for view, array in zip(_views(self.shm, specs), arrays):
+            view[...] = array
+        return self.shm.name, specs
+
+    def release(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+
+class _Attached:
+    """segment of the other side, re-attached when it was replaced"""
+
+    def __init__(self):
+        self.shm = None
+
+    def views(self, name, specs):
+        if self.shm is None or self.shm.name != name:
+            self.close()
+            self.shm = shared_memory.SharedMemory(name=name)
+        return _views(self.shm, specs)
+
+    def close(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm = None
+
+
+def _worker_main(model, conn):
+    """one session per worker process, inputs and outputs travel through shared memory, the pipe only carries names"""
+    inputs, outputs = _Attached(), _Segment()
+    try:
+        conn.send(('ready', {'pid': os.getpid(), 'input_name': model.input_name, 'input_shape': model.input_shape,
+                             'input_type': model.input_type, 'output_name': model.output_name}))
+        while True:
+            task = conn.recv()
+            if task is None:
+                break
+            try:
+                results = model.forward(inputs.views(*task))
+                conn.send(('ok',) + outputs.write(results))
+            except Exception as e:
+                conn.send(('error', repr(e)))
+    except Exception as e:
+        conn.send(('error', repr(e)))
+    finally:
+        inputs.close()
+        outputs.release()
+
+
+class _Worker:
+    def __init__(self, context, model):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(model, child_conn), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.inputs = _Segment()
+        self.outputs = _Attached()
+
+    def send(self, arrays):
+        self.conn.send(self.inputs.write(arrays))
+
+    def receive(self):
+        status, *payload = self.conn.recv()
+        if status == 'error':
+            raise RuntimeError('onnx worker {}: {}'.format(self.process.pid, payload[0]))
+        if status == 'ready':
+            return payload[0]
+        # copy out, the segment is reused by the next batch
+        return [np.array(view) for view in self.outputs.views(*payload)]
+
+    def close(self):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.outputs.close()
+        self.inputs.release()
+
+
+class ONNXProcessPool:
+    """
+    Process-pool backend of ModelBase: every worker owns its own session of the model (OnnxModelPickable, created in
+    the worker), so cpu inference of one model uses several cores without the GIL.
+    forward splits one batch over the workers, map pipelines many batches over them, results come back in order.
+    Args:
+        workers: worker processes, default cpu cores // threads_per_worker
+        threads_per_worker: intra-op threads of every worker session
+        min_rows_per_worker: smallest split of a forward batch
+    """
+
+    def __init__(self, onnx_path, provider='cpu', workers=None, threads_per_worker=1, input_dynamic_shape=None,
+                 min_rows_per_worker=1):
+        cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+        self.workers = workers or max(cores // threads_per_worker, 1)
+        self.threads_per_worker = threads_per_worker
+        self.min_rows_per_worker = min_rows_per_worker
+        model = OnnxModelPickable(onnx_path, provider=provider, input_dynamic_shape=input_dynamic_shape,
+                                  intra_op_num_threads=threads_per_worker)
+        # spawn, forked workers would inherit the onnxruntime / cuda state of the parent
+        context = multiprocessing.get_context('spawn')
+        self._workers = [_Worker(context, model) for _ in range(self.workers)]
+        self._lock = threading.Lock()
+        self._closed = False
+        atexit.register(self.close)
+
+        info = [worker.receive() for worker in self._workers][0]
+        self.input_name, self.input_shape = info['input_name'], info['input_shape']
+        self.input_type, self.output_name = info['input_type'], info['output_name']
+        # a static batch dim can not be split
+        batch_dim = self.input_shape[0][0] if self.input_shape and self.input_shape[0] else None
+        self.splittable = not (isinstance(batch_dim, int) and batch_dim > 0)
+
+    @staticmethod
+    def _inputs(image_tensor_in, trans=False):
+        """same input handling as ONNXModel.forward"""
+        inputs = list(image_tensor_in) if isinstance(image_tensor_in, (list, tuple)) else [image_tensor_in]
+        if trans:
+            inputs[0] = inputs[0].transpose(2, 0, 1)[np.newaxis, :]
+        return [np.asarray(tensor) for tensor in inputs]
+
+    def _gather(self, workers):
+        """receive from every worker that got a task, then raise the first error"""
+        results, error = [], None
+        for worker in workers:
+            try:
+                results.append(worker.receive())
+            except RuntimeError as e:
+                error = error or e
+        if error is not None:
+            raise error
+        return results
+
+    def forward(self, image_tensor_in, trans=False):
+        """one batch split over the workers by rows, outputs concatenated in input order"""
+        inputs = self._inputs(image_tensor_in, trans)
+        rows = inputs[0].shape[0]
+        parts = min(self.workers, max(rows // self.min_rows_per_worker, 1)) if self.splittable else 1
+        bounds = np.linspace(0, rows, parts + 1).astype(int)
+        with self._lock:
+            workers = self._workers[:parts]
+            for worker, start, end in zip(workers, bounds[:-1], bounds[1:]):
+                worker.send([tensor[start:end] for tensor in inputs])
+            results = self._gather(workers)
+        if parts == 1:
+            return results[0]
+        return [np.concatenate([result[index] for result in results]) for index in range(len(results[0]))]
+
+    def map(self, batches, trans=False):
+        """
+        outputs of every batch in order, each batch runs whole on one worker.
+        batches go out in windows of one per worker, the pool lock is only held while a window runs,
+        so the consumer (or an abandoned generator) never blocks other callers of the pool
+        Args:
+            batches: iterable of forward inputs, read lazily so frames can be decoded while the workers run
+        """
+        batches = iter(batches)
+        while True:
+            with self._lock:
+                workers = []
+                try:
+                    for worker in self._workers:
+                        batch = next(batches, None)
+                        if batch is None:
+                            break
+                        worker.send(self._inputs(batch, trans))
+                        workers.append(worker)
+                finally:
+                    # a failing input iterator must not leave results in the pipes
+                    results = self._gather(workers)
+            if not results:
+                return
+            yield from results
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for worker in self._workers:
+            worker.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
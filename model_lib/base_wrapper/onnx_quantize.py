@@ -0,0 +1,218 @@
+# -- coding: utf-8 --
+# @Time : 2026/10/19
+
+
+import os
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# fp32 is the original file, every other variant sits next to it as {stem}_{variant}.onnx
+VARIANTS = ('fp32', 'fp16', 'int8_dynamic', 'int8_static')
+
+
+def variant_path(onnx_path, variant):
+    if variant in (None, 'fp32'):
+        return str(onnx_path)
+    if variant not in VARIANTS:
+        raise ValueError('unknown model variant {}, one of {}'.format(variant, VARIANTS))
+    onnx_path = Path(onnx_path)
+    return str(onnx_path.with_name('{}_{}.onnx'.format(onnx_path.stem, variant)))
+
+
+def resolve_variant(onnx_path, variant):
+    """variant file when it was built, the fp32 original otherwise"""
+    path = variant_path(onnx_path, variant)
+    if not os.path.exists(path):
+        print('{} variant of {} not found ({}), using fp32, build it with onnx_quantize.py'.format(
+            variant, Path(onnx_path).name, path))
+        return str(onnx_path)
+    return path
+
+
+# pre-processing of the face_lib models: full frame letterbox for scrfd, face crops for parsing / restore
+def letterbox(image, size):
+    h, w = image.shape[:2]
+    scale = min(size / float(h), size / float(w))
+    resized = cv2.resize(image, (int(round(w * scale)), int(round(h * scale))))
+    canvas = np.zeros((size, size, 3), dtype=np.uint8)
+    canvas[:resized.shape[0], :resized.shape[1]] = resized
+    return canvas, scale
+
+
+def preprocess_scrfd(image, size=640):
+    canvas, _ = letterbox(image, size)
+    blob = (cv2.cvtColor(canvas, cv2.COLOR_BGR2RGB).astype(np.float32) - 127.5) / 128.0
+    return blob.transpose(2, 0, 1)[None]
+
+
+def preprocess_face_parsing(face, size=512):
+    rgb = cv2.cvtColor(cv2.resize(face, (size, size)), cv2.COLOR_BGR2RGB).astype(np.float32) / 255.0
+    rgb = (rgb - np.array([0.485, 0.456, 0.406], dtype=np.float32)) / np.array([0.229, 0.224, 0.225], dtype=np.float32)
+    return rgb.transpose(2, 0, 1)[None]
+
+
+def preprocess_gfpgan(face, size=512):
+    rgb = cv2.cvtColor(cv2.resize(face, (size, size)), cv2.COLOR_BGR2RGB).astype(np.float32) / 127.5 - 1.0
+    return rgb.transpose(2, 0, 1)[None]
+
+
+PREPROCESS = {
+    'scrfd': (preprocess_scrfd, False),
+    'face_parsing': (preprocess_face_parsing, True),
+    'gfpgan': (preprocess_gfpgan, True),
+}
+
+
+def _face_crop(frame, cascade):
+    """largest haar face, enlarged like the aligned face_lib crops, center crop when no face is found"""
+    h, w = frame.shape[:2]
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    faces = cascade.detectMultiScale(gray, 1.1, 5, minSize=(64, 64))
+    if len(faces):
+        x, y, fw, fh = max(faces, key=lambda f: f[2] * f[3])
+        side = int(max(fw, fh) * 1.6)
+        cx, cy = x + fw // 2, y + fh // 2
+    else:
+        side, cx, cy = min(h, w), w // 2, h // 2
+    x0, y0 = max(cx - side // 2, 0), max(cy - side // 2, 0)
+    return frame[y0:min(y0 + side, h), x0:min(x0 + side, w)]
+
+
+def sample_video_frames(video_paths, max_frames=64, face_crop=False, shift=0.0):
+    """
+    frames spread evenly over every video, optionally cropped to the face
+    shift: fraction of the sampling step to move every index by, 0.5 gives frames between the calibration ones
+    """
+    cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml') \
+        if face_crop else None
+    per_video = max(max_frames // max(len(video_paths), 1), 1)
+    frames = []
+    for video_path in video_paths:
+        cap = cv2.VideoCapture(str(video_path))
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or per_video
+        step = (total - 1) / float(max(per_video - 1, 1))
+        for index in np.minimum(np.linspace(0, total - 1, per_video) + shift * step, total - 1).astype(int):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int(index))
+            ok, frame = cap.read()
+            if ok:
+                frames.append(_face_crop(frame, cascade) if face_crop else frame)
+        cap.release()
+    if not frames:
+        raise ValueError('no frames read from {}'.format(video_paths))
+    return frames
+
+
+class VideoCalibrationReader:
+    """onnxruntime CalibrationDataReader over pre-processed video frames"""
+
+    def __init__(self, input_name, tensors):
+        self.input_name = input_name
+        self.tensors = tensors
+        self._iter = iter(self.tensors)
+
+    @classmethod
+    def from_videos(cls, model_name, input_name, video_paths, max_frames=64):
+        preprocess, face_crop = PREPROCESS[model_name]
+        return cls(input_name, [preprocess(frame) for frame in
+                                sample_video_frames(video_paths, max_frames, face_crop)])
+
+    def get_next(self):
+        tensor = next(self._iter, None)
+        return None if tensor is None else {self.input_name: tensor}
+
+    def rewind(self):
+        self._iter = iter(self.tensors)
+
+    def __len__(self):
+        return len(self.tensors)
+
+
+def _pre_process(onnx_path, output_path):
+    """shape inference + graph cleanup recommended before quantization, skipped if it fails on the model"""
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+    try:
+        quant_pre_process(str(onnx_path), str(output_path), skip_symbolic_shape=True)
+        return str(output_path)
+    except Exception as e:
+        print('quant pre-process skipped for {}: {}'.format(Path(onnx_path).name, e))
+        return str(onnx_path)
+
+
+def build_fp16(onnx_path):
+    import onnx
+    from onnxruntime.transformers.float16 import convert_float_to_float16
+
+    # fp32 inputs / outputs, callers keep feeding the same tensors
+    model = convert_float_to_float16(onnx.load(str(onnx_path)), keep_io_types=True)
+    output_path = variant_path(onnx_path, 'fp16')
+    onnx.save(model, output_path)
+    return output_path
+
+
+def build_int8_dynamic(onnx_path):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    output_path = variant_path(onnx_path, 'int8_dynamic')
+    prepared = _pre_process(onnx_path, output_path + '.prep.onnx')
+    # ConvInteger only takes uint8 weights
+    quantize_dynamic(prepared, output_path, weight_type=QuantType.QUInt8)
+    if prepared != str(onnx_path):
+        os.remove(prepared)
+    return output_path
+
+
+def build_int8_static(onnx_path, calibration_reader, per_channel=True):
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+
+    output_path = variant_path(onnx_path, 'int8_static')
+    prepared = _pre_process(onnx_path, output_path + '.prep.onnx')
+    quantize_static(prepared, output_path, calibration_reader, quant_format=QuantFormat.QDQ,
+                    per_channel=per_channel, activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8,
+                    calibrate_method=CalibrationMethod.MinMax)
+    if prepared != str(onnx_path):
+        os.remove(prepared)
+    return output_path
+
+
+def build_variants(model_name, onnx_path, video_paths=(), variants=('fp16', 'int8_dynamic', 'int8_static'),
+                   max_frames=64):
+    """
+    Build quantized variants of one face_lib model next to the fp32 file.
+    Args:
+        model_name: key of PREPROCESS, picks the calibration pre-processing
+        video_paths: example videos the int8_static calibration frames are drawn from
+    Returns:
+        {variant: path}
+    """
+    import onnxruntime
+
+    built = {}
+    for variant in variants:
+        if variant == 'fp16':
+            built[variant] = build_fp16(onnx_path)
+        elif variant == 'int8_dynamic':
+            built[variant] = build_int8_dynamic(onnx_path)
+        elif variant == 'int8_static':
+            if not video_paths:
+                raise ValueError('int8_static needs calibration videos')
+            input_name = onnxruntime.InferenceSession(
+                str(onnx_path), providers=['CPUExecutionProvider']).get_inputs()[0].name
+            reader = VideoCalibrationReader.from_videos(model_name, input_name, video_paths, max_frames)
+            built[variant] = build_int8_static(onnx_path, reader)
+        print('[{}] {} -> {}'.format(model_name, variant, built[variant]))
+    return built
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='build fp16 / int8 variants of the face_lib onnx models')
+    parser.add_argument('--model', choices=sorted(PREPROCESS), required=True)
+    parser.add_argument('--onnx_path', required=True)
+    parser.add_argument('--videos', nargs='*', default=['example/video.mp4'])
+    parser.add_argument('--variants', nargs='*', default=['fp16', 'int8_dynamic', 'int8_static'])
+    parser.add_argument('--max_frames', type=int, default=64)
+    args = parser.parse_args()
+    build_variants(args.model, args.onnx_path, args.videos, args.variants, args.max_frames)
@@ -0,0 +1,47 @@
+# -- coding: utf-8 --
+# @Time : 2026/10/19
+
+
+import onnxruntime
+
+from .onnx_model import ONNXModel, get_input_info, get_output_info
+
+
+def session_providers(provider):
+    """ONNXModel provider name -> InferenceSession providers, None for trt (ONNXModel keeps its engine cache setup)"""
+    if provider == 'gpu':
+        return [("CUDAExecutionProvider", {'device_id': 0, })]
+    if provider in ('trt', 'trt16', 'trt8'):
+        return None
+    return ["CPUExecutionProvider"]
+
+
+class ONNXSessionModel(ONNXModel):
+    """
+    ONNXModel whose one InferenceSession is built from caller SessionOptions (thread budget, optimized graph output),
+    instead of building ONNXModel's default session and replacing it.
+    Without session_options, or for trt providers, it is a plain ONNXModel.
+    """
+
+    def __init__(self, onnx_path, provider='gpu', warmup=False, debug=False, input_dynamic_shape=None,
+                 session_options=None):
+        providers = session_providers(provider)
+        if session_options is None or providers is None:
+            super().__init__(onnx_path, provider=provider, warmup=warmup, debug=debug,
+                             input_dynamic_shape=input_dynamic_shape)
+            return
+
+        self.provider = provider
+        self.providers = providers[0]
+        self.onnx_session = onnxruntime.InferenceSession(onnx_path, session_options, providers=providers)
+        self.input_name, self.input_shape, self.input_type = get_input_info(self.onnx_session)
+        self.output_name, self.output_shape, self.output_type = get_output_info(self.onnx_session)
+        self.input_dynamic_shape = input_dynamic_shape
+        if self.input_dynamic_shape is not None and not isinstance(self.input_dynamic_shape, list):
+            self.input_dynamic_shape = [self.input_dynamic_shape]
+        if debug:
+            print('onnx version: {}'.format(onnxruntime.__version__))
+            print("input_name:{}, \nshape:{}, \ntype:{}".format(self.input_name, self.input_shape, self.input_type))
+            print("output_name:{}, \nshape:{}, \ntype:{}".format(self.output_name, self.output_shape, self.output_type))
+        if warmup:
+            self.warm_up()
@@ -0,0 +1,237 @@
+# -- coding: utf-8 --
+# @Time : 2026/10/19
+
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class _Request:
+    __slots__ = ('inputs', 'rows', 'key', 'future', 'submit_time', 'client')
+
+    def __init__(self, inputs):
+        self.inputs = inputs
+        self.client = threading.get_ident()
+        self.rows = inputs[0].shape[0]
+        # only requests with the same per-sample shapes / dtypes can share a batch
+        self.key = tuple((tensor.shape[1:], tensor.dtype.str) for tensor in inputs)
+        self.future = Future()
+        self.submit_time = time.perf_counter()
+
+
+def split_rows(output, rows, padded):
+    """
+    default output split: batch dim first, output rows line up with the input rows
+    Args:
+        output: one model output of the padded batch
+        rows: [rows of each request, ...]
+        padded: rows of the model call, sum(rows) plus padding
+    Returns:
+        [output of each request, ...]
+    """
+    if output.ndim == 0 or output.shape[0] != padded:
+        raise ValueError('output of shape {} has no batch dim of {} rows, pass a split function for it'.format(
+            output.shape, padded))
+    offsets = np.cumsum([0] + list(rows))
+    return [output[offsets[i]:offsets[i + 1]] for i in range(len(rows))]
+
+
+def split_flat(output, rows, padded):
+    """
+    outputs that fold the batch into dim 0, e.g. scrfd score (N * anchors, 1): dim 0 is padded equal blocks,
+    each request gets its blocks in the same flat layout
+    """
+    if output.ndim == 0 or output.shape[0] % padded:
+        raise ValueError('output of shape {} is not {} equal blocks along dim 0'.format(output.shape, padded))
+    block = output.shape[0] // padded
+    offsets = np.cumsum([0] + list(rows)) * block
+    return [output[offsets[i]:offsets[i + 1]] for i in range(len(rows))]
+
+
+def _pad_rows(rows, max_batch, pad_to):
+    if pad_to == 'max':
+        return max(max_batch, rows)
+    if pad_to == 'pow2':
+        # never past max_batch, a single oversized request still runs at its own size
+        return min(1 << (rows - 1).bit_length(), max(max_batch, rows))
+    return rows
+
+
+class MicroBatcher:
+    """
+    Cross-job dynamic micro-batching around one ModelBase.
+    Concurrent jobs submit their own small batches, a worker thread collects requests for up to max_delay_ms or
+    max_batch rows, runs one (padded) batch and scatters the outputs back through futures.
+    The wait is cut short once every recently active client (submitting thread) has a request queued,
+    so a single job does not pay the deadline on every call.
+
+    Args:
+        model: ModelBase instance, or anything with .model.forward([input, ...]) -> [output, ...]
+        max_batch: max rows per model call
+        max_delay_ms: how long the worker may wait for more requests once it is free
+        pad_to: None | 'pow2' | 'max', pad batches to a few fixed sizes (static / trt engines, stable latency)
+        name: metric name
+        client_ttl: seconds after its last submit a thread still counts as an active client
+        split: how outputs are cut back into requests, split_rows (default, batch dim first) / split_flat / any
+               fn(output, rows, padded) -> [per request], or a list with one of them per output.
+               an output that does not fit its split fails the batch instead of returning wrong slices
+    """
+
+    def __init__(self, model, max_batch=16, max_delay_ms=5.0, pad_to=None, name=None, metric_window=1000,
+                 client_ttl=1.0, split=None):
+        self.model = model
+        self.split = split or split_rows
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000.0
+        self.pad_to = pad_to
+        self.name = name or type(model).__name__
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.client_ttl = client_ttl
+        self._clients = {}
+
+        # metrics are appended by the worker and read from other threads, both sides hold _metrics_lock
+        self._metrics_lock = threading.Lock()
+        self.queue_delay = deque(maxlen=metric_window)
+        self.batch_fill = deque(maxlen=metric_window)
+        self.batch_rows = deque(maxlen=metric_window)
+        self.requests = 0
+        self.batches = 0
+
+        self._worker = threading.Thread(target=self._loop, name='micro_batcher_{}'.format(self.name), daemon=True)
+        self._worker.start()
+
+    def submit(self, inputs):
+        """
+        Args:
+            inputs: np.ndarray or [np.ndarray, ...], batch dim first, every input with the same rows
+        Returns:
+            Future of the model outputs for these rows
+        """
+        inputs = [np.asarray(tensor) for tensor in (inputs if isinstance(inputs, (list, tuple)) else [inputs])]
+        request = _Request(inputs)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError('MicroBatcher [{}] is closed'.format(self.name))
+            self._queue.append(request)
+            self._clients[request.client] = request.submit_time
+            self._cond.notify()
+        return request.future
+
+    def forward(self, inputs):
+        """blocking submit, same return as ModelBase.model.forward"""
+        return self.submit(inputs).result()
+
+    def _collect(self):
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            if not self._queue:
+                return None
+            first = self._queue[0]
+            # the deadline starts when the worker is free, requests that queued up behind the previous batch
+            # still wait for the jobs that batch just released
+            deadline = time.perf_counter() + self.max_delay
+            while True:
+                now = time.perf_counter()
+                rows = sum(r.rows for r in self._queue if r.key == first.key)
+                waiting = {r.client for r in self._queue}
+                self._clients = {c: t for c, t in self._clients.items() if now - t < self.client_ttl}
+                remaining = deadline - now
+                if rows >= self.max_batch or remaining <= 0 or self._closed or waiting >= set(self._clients):
+                    break
+                self._cond.wait(remaining)
+
+            batch, rows, rest = [], 0, deque()
+            for request in self._queue:
+                if request.key == first.key and (not batch or rows + request.rows <= self.max_batch):
+                    batch.append(request)
+                    rows += request.rows
+                else:
+                    rest.append(request)
+            self._queue = rest
+            return batch
+
+    def _run(self, batch):
+        start = time.perf_counter()
+        rows = sum(r.rows for r in batch)
+        padded = _pad_rows(rows, self.max_batch, self.pad_to)
+        inputs = []
+        for index in range(len(batch[0].inputs)):
+            tensor = np.concatenate([r.inputs[index] for r in batch], axis=0)
+            if padded > rows:
+                # repeat the last row, zeros may hit degenerate paths (norm / nms) inside the model
+                tensor = np.concatenate([tensor, np.repeat(tensor[-1:], padded - rows, axis=0)], axis=0)
+            inputs.append(tensor)
+
+        outputs = self.model.model.forward(inputs)
+        splits = self.split if isinstance(self.split, (list, tuple)) else [self.split] * len(outputs)
+        if len(splits) != len(outputs):
+            raise ValueError('{} split functions for {} outputs'.format(len(splits), len(outputs)))
+        request_rows = [r.rows for r in batch]
+        parts = [split(output, request_rows, padded) for split, output in zip(splits, outputs)]
+        for index, request in enumerate(batch):
+            request.future.set_result([part[index] for part in parts])
+
+        with self._metrics_lock:
+            self.requests += len(batch)
+            self.batches += 1
+            self.batch_rows.append(rows)
+            self.batch_fill.append(rows / float(padded))
+            self.queue_delay.extend(start - r.submit_time for r in batch)
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            try:
+                self._run(batch)
+            except Exception as e:
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join()
+
+    def get_metrics(self):
+        with self._metrics_lock:
+            requests, batches = self.requests, self.batches
+            batch_rows, batch_fill = list(self.batch_rows), list(self.batch_fill)
+            delay = np.array(self.queue_delay) * 1000
+        return {
+            'name': self.name,
+            'requests': requests,
+            'batches': batches,
+            'mean_batch_rows': float(np.mean(batch_rows)) if batch_rows else 0.0,
+            'mean_batch_fill': float(np.mean(batch_fill)) if batch_fill else 0.0,
+            'mean_queue_delay_ms': float(delay.mean()) if len(delay) else 0.0,
+            'p95_queue_delay_ms': float(np.percentile(delay, 95)) if len(delay) else 0.0,
+        }
+
+
+# one batcher per model shared by every job of the process
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+
+def get_batcher(name, model, **kwargs):
+    with _batchers_lock:
+        batcher = _batchers.get(name)
+        if batcher is None:
+            batcher = _batchers[name] = MicroBatcher(model, name=name, **kwargs)
+        return batcher
+
+
+def get_all_metrics():
+    with _batchers_lock:
+        return [batcher.get_metrics() for batcher in _batchers.values()]
@@ -3,8 +3,13 @@
 
 
 
-from .base_wrapper import ONNXModel
+from .base_wrapper import ONNXSessionModel, ONNXBindingModel, OnnxModelPickable, ONNXProcessPool
+from .base_wrapper.onnx_graph_cache import get_optimized_model, commit_optimized_model
+from .base_wrapper.model_encrypt import load_encrypt_model
+from .base_wrapper.cpu_profile import CpuProfile, resolve_provider
+from .base_wrapper.onnx_quantize import resolve_variant
 from pathlib import Path
+import time
 
 
 try:
@@ -15,9 +20,26 @@ except:
 
 # from cv2box.utils import try_import
 
+_cpu_profile = None
+
+
+def get_cpu_profile():
+    """[cpu_profile] of config.ini, shared by every model of the process, None when disabled"""
+    global _cpu_profile
+    if _cpu_profile is None:
+        _cpu_profile = CpuProfile.from_config() or False
+    return _cpu_profile or None
+
+
 class ModelBase:
     def __init__(self, model_info, provider):
         self.model_path = model_info['model_path']
+        # 'fp16' / 'int8_dynamic' / 'int8_static' file built by onnx_quantize.py, fp32 when it does not exist
+        self.variant = model_info.get('variant', 'fp32')
+        if self.variant != 'fp32':
+            variant_path = resolve_variant(self.model_path, self.variant)
+            self.variant = self.variant if variant_path != self.model_path else 'fp32'
+            self.model_path = variant_path
 
         if 'input_dynamic_shape' in model_info.keys():
             self.input_dynamic_shape = model_info['input_dynamic_shape']
@@ -29,6 +51,13 @@ class ModelBase:
         else:
             picklable = False
 
+        # io_binding with preallocated buffers, options passed to ONNXBindingModel, e.g. {'max_shapes': 4}
+        io_binding = model_info.get('io_binding', False)
+
+        # picklable models only: run in worker processes, options passed to ONNXProcessPool,
+        # e.g. {'workers': 4, 'threads_per_worker': 2}
+        process_pool = model_info.get('process_pool', False)
+
         if 'trt_wrapper_self' in model_info.keys():
             TRTWrapper = TRTWrapperSelf
 
@@ -41,10 +70,48 @@ class ModelBase:
             self.model = TJMWrapper(self.model_path, provider=provider)
         elif Path(self.model_path).suffix in ['.onnx', '.bin']:
             self.model_type = 'onnx'
+            provider = resolve_provider(provider)
+            self.provider = provider
             if not picklable:
+                start = time.perf_counter()
+                session_path = self.model_path
+                # per-model thread budget / execution mode / core pinning, passed to the one session of the model
+                cpu_profile = get_cpu_profile() if provider == 'cpu' else None
+                session_options = cpu_profile.session_options(model_info.get('name', Path(self.model_path).stem)) \
+                    if cpu_profile is not None else None
+                self.graph_cache = 'skip'
+                self.decrypt_time = 0.0
+                if 'encrypt' in model_info.keys():
+                    # decrypted model bytes go straight into the session, no plaintext file on disk
+                    session_path = load_encrypt_model(self.model_path, key=model_info['encrypt'])
+                    self.decrypt_time = time.perf_counter() - start
+                elif model_info.get('graph_cache', True):
+                    # reuse the onnxruntime-optimized graph from a previous start, decrypted models are never cached.
+                    # on a cold start the serving session itself writes the optimized graph
+                    session_path, session_options, self.graph_cache = get_optimized_model(
+                        self.model_path, provider, session_options)
+                if io_binding:
+                    binding_kwargs = io_binding if isinstance(io_binding, dict) else {}
+                    self.model = ONNXBindingModel(session_path, provider=provider,
+                                                  input_dynamic_shape=self.input_dynamic_shape,
+                                                  session_options=session_options, **binding_kwargs)
+                else:
+                    self.model = ONNXSessionModel(session_path, provider=provider,
+                                                  input_dynamic_shape=self.input_dynamic_shape,
+                                                  session_options=session_options)
+                if self.graph_cache == 'cold':
+                    commit_optimized_model(self.model_path, provider)
+                self.load_time = time.perf_counter() - start
                 if 'encrypt' in model_info.keys():
-                    self.model_path = load_encrypt_model(self.model_path, key=model_info['encrypt'])
-                self.model = ONNXModel(self.model_path, provider=provider, input_dynamic_shape=self.input_dynamic_shape)
+                    print('[{}] decrypted in memory in {:.2f}s, onnx session created in {:.2f}s'.format(
+                        Path(self.model_path).name, self.decrypt_time, self.load_time - self.decrypt_time))
+                elif self.graph_cache != 'skip':
+                    print('[{}] {} start, onnx session ready in {:.2f}s'.format(
+                        Path(self.model_path).name, self.graph_cache, self.load_time))
+            elif process_pool:
+                pool_kwargs = process_pool if isinstance(process_pool, dict) else {}
+                self.model = ONNXProcessPool(self.model_path, provider=provider,
+                                             input_dynamic_shape=self.input_dynamic_shape, **pool_kwargs)
             else:
                 self.model = OnnxModelPickable(self.model_path, provider=provider, )
         else:
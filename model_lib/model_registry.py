@@ -0,0 +1,245 @@
+# -- coding: utf-8 --
+# @Time : 2026/10/19
+
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from .base_wrapper.onnx_binding_model import ORT_TYPE_TO_NUMPY
+from .model_base import ModelBase
+
+# onnx models fetched by download.sh, input_dynamic_shape gives the warmup shape of dynamic dims
+DEFAULT_MODEL_INFOS = {
+    'scrfd': {
+        'model_path': 'face_detect_utils/resources/scrfd_500m_bnkps_shape640x640.onnx',
+    },
+    'face_parsing': {
+        'model_path': 'pretrain_models/face_lib/face_parsing/79999_iter.onnx',
+        'input_dynamic_shape': (1, 3, 512, 512),
+    },
+    'gfpgan': {
+        'model_path': 'pretrain_models/face_lib/face_restore/gfpgan/GFPGANv1.4.onnx',
+        'input_dynamic_shape': (1, 3, 512, 512),
+    },
+}
+
+
+def warmup_shapes(model, batch_sizes, input_dynamic_shape=None):
+    """
+    input shapes to warm up: one set per batch size when the batch dim is dynamic, the static shape otherwise
+    Returns:
+        [[shape_input_0, shape_input_1, ...], ...]
+    """
+    dynamic = None
+    if input_dynamic_shape is not None:
+        dynamic = input_dynamic_shape if isinstance(input_dynamic_shape, list) else [input_dynamic_shape]
+
+    shape_sets = []
+    for batch_size in batch_sizes:
+        shapes = []
+        for index, shape in enumerate(model.input_shape):
+            filled = []
+            for dim_index, dim in enumerate(shape):
+                if isinstance(dim, int) and dim > 0:
+                    filled.append(dim)
+                elif dim_index == 0:
+                    filled.append(batch_size)
+                elif dynamic is not None:
+                    filled.append(int(dynamic[index][dim_index]))
+                else:
+                    raise ValueError('dynamic input {} of {}, set input_dynamic_shape'.format(
+                        model.input_name[index], shape))
+            shapes.append(filled)
+        if shapes not in shape_sets:
+            shape_sets.append(shapes)
+    return shape_sets
+
+
+class ModelRegistry:
+    """
+    Loads every registered ModelBase once, runs warmup inferences at each configured batch shape and sets a readiness
+    event when all models are usable. Startup takes as long as loading actually needs.
+    Args:
+        provider: ModelBase provider, 'gpu' / 'trt' / 'cpu' ...
+        batch_sizes: batch sizes the pipeline runs with, e.g. (1, [digital] batch_size)
+        ready_timeout: default seconds wait_ready / get wait for loading to finish
+    """
+
+    def __init__(self, provider='gpu', batch_sizes=(1,), ready_timeout=600.0):
+        self.provider = provider
+        self.batch_sizes = sorted(set(batch_sizes))
+        self.ready_timeout = ready_timeout
+        self.model_infos = {}
+        self.models = {}
+        self.timings = {}
+        self.errors = {}
+        self.ready = threading.Event()
+        self.finished = threading.Event()
+        self.start_time = None
+        self.total_time = None
+        self._thread = None
+
+    def register(self, name, model_info):
+        self.model_infos[name] = model_info
+
+    def get(self, name):
+        """loaded ModelBase, waits for the registry to be ready (see wait_ready)"""
+        self.wait_ready()
+        return self.models[name]
+
+    def _load_one(self, name, model_info):
+        start = time.perf_counter()
+        model = ModelBase(dict(model_info, name=name), self.provider)
+        load_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        shape_sets = []
+        if model.model_type == 'onnx':
+            onnx_model = model.model
+            shape_sets = warmup_shapes(onnx_model, self.batch_sizes, model.input_dynamic_shape)
+            dtypes = [ORT_TYPE_TO_NUMPY.get(t, np.float32) for t in onnx_model.input_type]
+            for shapes in shape_sets:
+                onnx_model.forward([np.zeros(shape, dtype=dtype) for shape, dtype in zip(shapes, dtypes)])
+        warmup_s = time.perf_counter() - start
+
+        self.models[name] = model
+        self.timings[name] = {'load_s': load_s, 'warmup_s': warmup_s, 'warmup_shapes': shape_sets,
+                              'graph_cache': getattr(model, 'graph_cache', 'skip'),
+                              'decrypt_s': getattr(model, 'decrypt_time', 0.0),
+                              'variant': getattr(model, 'variant', 'fp32')}
+
+    def load(self):
+        """load and warm up every registered model in the calling thread"""
+        self.start_time = time.perf_counter()
+        if not self.model_infos:
+            # nothing to serve is a failed start, not an instantly ready one
+            self.errors['registry'] = 'no model registered, model files missing?'
+        for name, model_info in self.model_infos.items():
+            try:
+                self._load_one(name, model_info)
+            except Exception as e:
+                self.errors[name] = repr(e)
+        self.total_time = time.perf_counter() - self.start_time
+        if not self.errors:
+            self.ready.set()
+        self.finished.set()
+        return not self.errors
+
+    def start(self):
+        """load in a background thread, overlapping with other startup work"""
+        self._thread = threading.Thread(target=self.load, name='model_registry', daemon=True)
+        self._thread.start()
+        return self
+
+    def wait_ready(self, timeout=None):
+        """
+        wait until every model is loaded and warmed up
+        Args:
+            timeout: seconds, ready_timeout when None
+        Raises:
+            TimeoutError: still loading after timeout (or never started)
+            RuntimeError: loading finished with errors
+        """
+        timeout = self.ready_timeout if timeout is None else timeout
+        if not self.finished.wait(timeout):
+            raise TimeoutError('model registry not ready after {:.1f}s'.format(timeout))
+        if not self.ready.is_set():
+            raise RuntimeError('model registry failed to load: {}'.format(self.errors))
+        return True
+
+    def health(self):
+        if self.ready.is_set():
+            status = 'ready'
+        elif self.finished.is_set():
+            status = 'error'
+        else:
+            status = 'loading'
+        models = {}
+        for name in self.model_infos:
+            if name in self.timings:
+                models[name] = dict(self.timings[name], status='ready')
+            elif name in self.errors:
+                models[name] = {'status': 'error', 'error': self.errors[name]}
+            else:
+                models[name] = {'status': 'loading'}
+        return {
+            'status': status,
+            'provider': self.provider,
+            'batch_sizes': self.batch_sizes,
+            'startup_s': self.total_time if self.total_time is not None else (
+                time.perf_counter() - self.start_time if self.start_time is not None else 0.0),
+            'models': models,
+        }
+
+
+def create_health_app(registry):
+    """flask app, GET /health: 200 when ready, 503 while loading or after load errors"""
+    from flask import Flask, jsonify
+
+    app = Flask('model_registry')
+
+    @app.route('/health')
+    def health():
+        report = registry.health()
+        return jsonify(report), 200 if report['status'] == 'ready' else 503
+
+    return app
+
+
+def serve_health(registry, host='0.0.0.0', port=8384):
+    app = create_health_app(registry)
+    thread = threading.Thread(target=app.run, kwargs={'host': host, 'port': port, 'use_reloader': False},
+                              name='model_registry_health', daemon=True)
+    thread.start()
+    return thread
+
+
+def registry_from_config(config_path='config/config.ini'):
+    """
+    [model_registry] provider / warmup_batch_sizes (default 1 and [digital] batch_size) / ready_timeout /
+    variants (quantized model per name, e.g. scrfd:int8_static,gfpgan:fp16),
+    [process_pool] models / workers / threads_per_worker (models served by worker processes),
+    models whose file is missing are skipped.
+    neither section ships in config/config.ini: app.py and run.py serve through TransDhTask, which loads its own
+    sessions and never reads the registry, add them for a python-side pipeline that gets models from here
+    """
+    import configparser
+    config = configparser.ConfigParser()
+    config.read(config_path)
+    provider = config.get('model_registry', 'provider', fallback='gpu')
+    batch_sizes = config.get('model_registry', 'warmup_batch_sizes', fallback='')
+    if batch_sizes:
+        batch_sizes = [int(b) for b in batch_sizes.split(',')]
+    else:
+        batch_sizes = [1, config.getint('digital', 'batch_size', fallback=4)]
+
+    variants = {}
+    for item in config.get('model_registry', 'variants', fallback='').split(','):
+        if ':' in item:
+            name, variant = item.split(':')
+            variants[name.strip()] = variant.strip()
+
+    pooled = [name.strip() for name in config.get('process_pool', 'models', fallback='').split(',') if name.strip()]
+    process_pool = {'workers': config.getint('process_pool', 'workers', fallback=0) or None,
+                    'threads_per_worker': config.getint('process_pool', 'threads_per_worker', fallback=1)}
+
+    registry = ModelRegistry(provider=provider, batch_sizes=batch_sizes,
+                             ready_timeout=config.getfloat('model_registry', 'ready_timeout', fallback=600.0))
+    for name, model_info in DEFAULT_MODEL_INFOS.items():
+        if os.path.exists(model_info['model_path']):
+            model_info = dict(model_info, variant=variants.get(name, 'fp32'))
+            if name in pooled:
+                model_info.update(picklable=True, process_pool=process_pool)
+            registry.register(name, model_info)
+    return registry
+
+
+if __name__ == '__main__':
+    import json
+
+    registry = registry_from_config()
+    registry.load()
+    print(json.dumps(registry.health(), indent=2))
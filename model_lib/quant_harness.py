@@ -0,0 +1,152 @@
+# -- coding: utf-8 --
+# @Time : 2026/10/19
+
+
+import os
+import time
+
+import cv2
+import numpy as np
+import onnxruntime
+
+from .base_wrapper.onnx_quantize import PREPROCESS, VARIANTS, sample_video_frames, variant_path
+
+
+def decode_scrfd(outputs, size=640, threshold=0.5, nms_threshold=0.4, strides=(8, 16, 32), num_anchors=2):
+    """
+    boxes of scrfd_*_bnkps outputs (scores / bboxes / kps per stride), same decoding as insightface SCRFD
+    Returns:
+        (N, 5) x1, y1, x2, y2, score in letterboxed input pixels
+    """
+    fmc = len(strides)
+    boxes, scores = [], []
+    for index, stride in enumerate(strides):
+        score = outputs[index].reshape(-1)
+        distance = outputs[index + fmc].reshape(-1, 4) * stride
+        cells = size // stride
+        centers = np.stack(np.mgrid[:cells, :cells][::-1], axis=-1).reshape(-1, 2).astype(np.float32) * stride
+        centers = np.repeat(centers, num_anchors, axis=0)
+        keep = (score >= threshold) & (distance[:, :2] + distance[:, 2:] > 0).all(1)
+        boxes.append(np.concatenate([centers[keep] - distance[keep, :2], centers[keep] + distance[keep, 2:]], 1))
+        scores.append(score[keep])
+    boxes, scores = np.concatenate(boxes), np.concatenate(scores)
+    if not len(boxes):
+        return np.zeros((0, 5), dtype=np.float32)
+    keep = cv2.dnn.NMSBoxes(np.concatenate([boxes[:, :2], boxes[:, 2:] - boxes[:, :2]], 1).tolist(),
+                            scores.tolist(), threshold, nms_threshold)
+    keep = np.array(keep).reshape(-1)
+    return np.concatenate([boxes[keep], scores[keep, None]], 1)
+
+
+def box_iou(a, b):
+    """(N, 4+) x (M, 4+) -> (N, M)"""
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:4], b[None, :, 2:4])
+    inter = np.prod(np.clip(rb - lt, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:4] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:4] - b[:, :2], axis=1)
+    return inter / (area_a[:, None] + area_b[None] - inter + 1e-9)
+
+
+def detection_iou(reference, candidate):
+    """mean best-match iou of the fp32 detections, a missed face counts 0, extra faces count 0"""
+    ref, cand = decode_scrfd(reference), decode_scrfd(candidate)
+    if not len(ref) and not len(cand):
+        return 1.0
+    if not len(ref) or not len(cand):
+        return 0.0
+    best = box_iou(ref, cand).max(axis=1)
+    return float(best.sum() / max(len(ref), len(cand)))
+
+
+def parsing_miou(reference, candidate):
+    """mIoU of the argmax label maps over the classes present in either map"""
+    ref, cand = reference[0].argmax(axis=1), candidate[0].argmax(axis=1)
+    ious = []
+    for label in np.union1d(np.unique(ref), np.unique(cand)):
+        ref_mask, cand_mask = ref == label, cand == label
+        ious.append(np.logical_and(ref_mask, cand_mask).sum() / float(np.logical_or(ref_mask, cand_mask).sum()))
+    return float(np.mean(ious))
+
+
+def restore_psnr(reference, candidate):
+    """psnr of the [-1, 1] restored faces in 8 bit"""
+    ref = np.clip((reference[0] + 1) * 127.5, 0, 255).round()
+    cand = np.clip((candidate[0] + 1) * 127.5, 0, 255).round()
+    mse = np.mean((ref - cand) ** 2)
+    return float('inf') if mse == 0 else float(10 * np.log10(255.0 ** 2 / mse))
+
+
+METRICS = {
+    'scrfd': ('detection_iou', detection_iou),
+    'face_parsing': ('parsing_miou', parsing_miou),
+    'gfpgan': ('psnr_db', restore_psnr),
+}
+
+
+def _cpu_session(onnx_path):
+    session_options = onnxruntime.SessionOptions()
+    session_options.log_severity_level = 3
+    return onnxruntime.InferenceSession(onnx_path, session_options, providers=['CPUExecutionProvider'])
+
+
+def evaluate(model_name, onnx_path, video_paths, variants=VARIANTS, max_frames=32, latency_runs=20):
+    """
+    Compare every built variant of a face_lib model against its fp32 original on example video frames.
+    Evaluation frames sit between the calibration frames of onnx_quantize (shift=0.5).
+    Returns:
+        {variant: {metric_name: mean, 'latency_ms': cpu latency per frame, 'size_mb': file size}}
+    """
+    preprocess, face_crop = PREPROCESS[model_name]
+    metric_name, metric = METRICS[model_name]
+    tensors = [preprocess(frame) for frame in sample_video_frames(video_paths, max_frames, face_crop, shift=0.5)]
+
+    reference_session = _cpu_session(onnx_path)
+    input_name = reference_session.get_inputs()[0].name
+    references = [reference_session.run(None, {input_name: tensor}) for tensor in tensors]
+
+    report = {}
+    for variant in variants:
+        path = variant_path(onnx_path, variant)
+        if not os.path.exists(path):
+            continue
+        session = reference_session if variant == 'fp32' else _cpu_session(path)
+        scores = [metric(reference, session.run(None, {input_name: tensor}))
+                  for reference, tensor in zip(references, tensors)]
+
+        session.run(None, {input_name: tensors[0]})
+        start = time.perf_counter()
+        for index in range(latency_runs):
+            session.run(None, {input_name: tensors[index % len(tensors)]})
+        report[variant] = {
+            metric_name: float(np.mean(scores)),
+            'latency_ms': (time.perf_counter() - start) / latency_runs * 1000,
+            'size_mb': os.path.getsize(path) / 1e6,
+        }
+    return report
+
+
+def print_report(model_name, report):
+    baseline = report.get('fp32', {}).get('latency_ms')
+    for variant, row in report.items():
+        metric_name = [k for k in row if k not in ('latency_ms', 'size_mb')][0]
+        speedup = ', x{:.2f}'.format(baseline / row['latency_ms']) if baseline else ''
+        print('[{}] {:13s} {} {:.4f}, cpu {:.1f} ms{}, {:.1f} MB'.format(
+            model_name, variant, metric_name, row[metric_name], row['latency_ms'], speedup, row['size_mb']))
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from .model_registry import DEFAULT_MODEL_INFOS
+
+    # python -m model_lib.quant_harness --videos example/video.mp4
+    parser = argparse.ArgumentParser(description='accuracy / cpu latency of quantized face_lib variants vs fp32')
+    parser.add_argument('--models', nargs='*', default=sorted(METRICS))
+    parser.add_argument('--videos', nargs='*', default=['example/video.mp4'])
+    parser.add_argument('--max_frames', type=int, default=32)
+    args = parser.parse_args()
+    for name in args.models:
+        model_path = DEFAULT_MODEL_INFOS[name]['model_path']
+        if os.path.exists(model_path):
+            print_report(name, evaluate(name, model_path, args.videos, max_frames=args.max_frames))
@@ -0,0 +1,215 @@
+# -- coding: utf-8 --
+# @Time : 2026/10/19
+
+
+import threading
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from .base_wrapper.onnx_quantize import resolve_variant
+from .model_base import ModelBase
+
+
+def make_batch_dynamic(onnx_path, output_path=None):
+    """
+    copy of a batch-1 scrfd export with a symbolic batch dim, written once next to the model as {stem}_dynbatch.onnx
+    input / output dim 0 -> 'batch', Reshape targets with a leading 1 -> 0 (copy dim 0 of the reshaped tensor).
+    the copy is checked against two batch-1 runs, the original path is returned when it does not match
+    """
+    import onnx
+    import onnxruntime
+    from onnx import numpy_helper
+
+    onnx_path = Path(onnx_path)
+    output_path = Path(output_path or onnx_path.with_name('{}_dynbatch.onnx'.format(onnx_path.stem)))
+    if output_path.exists() and output_path.stat().st_mtime >= onnx_path.stat().st_mtime:
+        return str(output_path)
+
+    model = onnx.load(str(onnx_path))
+    graph = model.graph
+    initializers = {init.name: init for init in graph.initializer}
+    for value in list(graph.input) + list(graph.output):
+        if value.name in initializers:
+            continue
+        dims = value.type.tensor_type.shape.dim
+        if len(dims):
+            dims[0].dim_param = 'batch'
+    del graph.value_info[:]
+
+    constants = {node.output[0]: node for node in graph.node if node.op_type == 'Constant'}
+    for node in graph.node:
+        if node.op_type != 'Reshape':
+            continue
+        if node.input[1] in initializers:
+            tensor = initializers[node.input[1]]
+        elif node.input[1] in constants:
+            tensor = constants[node.input[1]].attribute[0].t
+        else:
+            continue
+        shape = numpy_helper.to_array(tensor).copy()
+        if len(shape) > 1 and shape[0] == 1:
+            shape[0] = 0
+            tensor.CopyFrom(numpy_helper.from_array(shape, tensor.name))
+    onnx.save(model, str(output_path))
+
+    # parity check, batch 2 vs 2 x batch 1
+    try:
+        reference = onnxruntime.InferenceSession(str(onnx_path), providers=['CPUExecutionProvider'])
+        dynamic = onnxruntime.InferenceSession(str(output_path), providers=['CPUExecutionProvider'])
+        node = reference.get_inputs()[0]
+        shape = [d if isinstance(d, int) and d > 0 else 640 for d in node.shape[1:]]
+        x = np.random.RandomState(0).rand(2, *shape).astype(np.float32)
+        singles = [reference.run(None, {node.name: x[i:i + 1]}) for i in range(2)]
+        batched = dynamic.run(None, {node.name: x})
+        for index, output in enumerate(batched):
+            expected = np.concatenate([single[index].reshape(1, -1) for single in singles])
+            if not np.allclose(output.reshape(2, -1), expected, atol=1e-4):
+                raise ValueError('output {} differs'.format(index))
+    except Exception as e:
+        print('dynamic batch copy of {} failed ({}), running frames one by one'.format(onnx_path.name, e))
+        output_path.unlink()
+        return str(onnx_path)
+    print('dynamic batch copy of {} written to {}'.format(onnx_path.name, output_path))
+    return str(output_path)
+
+
+class SCRFDBatch(ModelBase):
+    """
+    batched scrfd_*_bnkps detection, same results as detecting the frames one by one.
+    N frames are letterboxed into one preallocated NCHW float32 buffer with a single vectorized normalize,
+    run as one session call, and anchors / kps / nms are decoded for the whole batch in numpy.
+    the buffers are per thread, one detector can serve several jobs at once.
+
+    Args:
+        model_info: as ModelBase, 'dynamic_batch' (default True) uses the make_batch_dynamic copy,
+                    a batch-1 session falls back to one run per frame
+        max_batch: frames per session run, longer inputs are split
+    """
+
+    def __init__(self, model_info, provider='cpu', size=640, max_batch=16, threshold=0.5, nms_threshold=0.4,
+                 strides=(8, 16, 32), num_anchors=2):
+        # the variant is resolved here so the dynamic batch copy is made from the quantized file
+        model_info = dict(model_info)
+        variant = model_info.pop('variant', 'fp32')
+        variant_path = resolve_variant(model_info['model_path'], variant)
+        variant = variant if variant_path != model_info['model_path'] else 'fp32'
+        model_info['model_path'] = variant_path
+        if model_info.get('dynamic_batch', True):
+            model_info['model_path'] = make_batch_dynamic(model_info['model_path'])
+        super().__init__(model_info, provider)
+        self.variant = variant
+
+        self.size = size
+        self.threshold = threshold
+        self.nms_threshold = nms_threshold
+        self.strides = strides
+        batch_dim = self.model.input_shape[0][0]
+        self.dynamic_batch = not (isinstance(batch_dim, int) and batch_dim > 0)
+        self.max_batch = max_batch if self.dynamic_batch else 1
+        self.run_batch = self.max_batch
+
+        self._buffers = threading.local()
+        self._centers = {}
+        for stride in strides:
+            cells = size // stride
+            centers = np.stack(np.mgrid[:cells, :cells][::-1], axis=-1).reshape(-1, 2).astype(np.float32) * stride
+            self._centers[stride] = np.repeat(centers, num_anchors, axis=0)
+
+    def _thread_buffers(self):
+        """letterbox canvas, input blob and filled sizes of the calling thread, allocated on its first call"""
+        buffers = self._buffers
+        if not hasattr(buffers, 'canvas'):
+            buffers.canvas = np.zeros((self.max_batch, self.size, self.size, 3), dtype=np.uint8)
+            buffers.blob = np.empty((self.max_batch, 3, self.size, self.size), dtype=np.float32)
+            buffers.filled = [None] * self.max_batch
+        return buffers
+
+    def preprocess(self, frames):
+        """
+        Returns:
+            (N, 3, size, size) view of the calling thread's buffer, (N,) letterbox scales
+        """
+        count = len(frames)
+        buffers = self._thread_buffers()
+        canvas = buffers.canvas[:count]
+        scales = np.empty(count, dtype=np.float32)
+        for index, frame in enumerate(frames):
+            h, w = frame.shape[:2]
+            scale = min(self.size / float(h), self.size / float(w))
+            resized_hw = (int(round(h * scale)), int(round(w * scale)))
+            # the padding stays zero while the frame size does not change
+            if buffers.filled[index] != resized_hw:
+                canvas[index] = 0
+                buffers.filled[index] = resized_hw
+            canvas[index, :resized_hw[0], :resized_hw[1]] = cv2.resize(frame, resized_hw[::-1])
+            scales[index] = scale
+        blob = buffers.blob[:count]
+        # bgr -> rgb, nhwc -> nchw and (x - 127.5) / 128 in one pass over the batch
+        np.subtract(canvas[..., ::-1].transpose(0, 3, 1, 2), np.float32(127.5), out=blob)
+        blob *= np.float32(1 / 128.0)
+        return blob, scales
+
+    def decode(self, outputs, scales):
+        """
+        Returns:
+            [(boxes (K, 5) x1, y1, x2, y2, score, kps (K, 5, 2) or None), ...] per frame, frame pixels
+        """
+        count = len(scales)
+        fmc = len(self.strides)
+        with_kps = len(outputs) >= 3 * fmc
+        boxes, scores, kpss, frame_ids = [], [], [], []
+        for index, stride in enumerate(self.strides):
+            score = outputs[index].reshape(count, -1)
+            distance = outputs[index + fmc].reshape(count, -1, 4)
+            # boxes without area are dropped, opencv nms counts two of them as a full overlap, even across frames
+            valid = (distance[..., :2] + distance[..., 2:] > 0).all(-1)
+            frame_id, anchor = np.nonzero((score >= self.threshold) & valid)
+            centers = self._centers[stride][anchor]
+            distance = distance[frame_id, anchor] * stride
+            boxes.append(np.concatenate([centers - distance[:, :2], centers + distance[:, 2:]], 1))
+            scores.append(score[frame_id, anchor])
+            frame_ids.append(frame_id)
+            if with_kps:
+                kps = outputs[index + 2 * fmc].reshape(count, -1, 10)[frame_id, anchor] * stride
+                kpss.append(kps.reshape(-1, 5, 2) + centers[:, None])
+        boxes, scores, frame_ids = np.concatenate(boxes), np.concatenate(scores), np.concatenate(frame_ids)
+        kpss = np.concatenate(kpss) if with_kps else None
+
+        results = [(np.zeros((0, 5), dtype=np.float32), np.zeros((0, 5, 2), dtype=np.float32) if with_kps else None)
+                   for _ in range(count)]
+        if not len(boxes):
+            return results
+        # one nms call for the batch, each frame is shifted far enough that boxes of different frames never overlap,
+        # in float64 so the shift does not round the coordinates
+        shifted = boxes[:, :2].astype(np.float64) + frame_ids[:, None] * (4.0 * self.size)
+        keep = cv2.dnn.NMSBoxes(np.concatenate([shifted, boxes[:, 2:] - boxes[:, :2]], 1).tolist(),
+                                scores.tolist(), self.threshold, self.nms_threshold)
+        keep = np.array(keep, dtype=np.int64).reshape(-1)
+        for frame_index in range(count):
+            frame_keep = keep[frame_ids[keep] == frame_index]
+            scale = scales[frame_index]
+            dets = np.concatenate([boxes[frame_keep] / scale, scores[frame_keep, None]], 1).astype(np.float32)
+            results[frame_index] = (dets, kpss[frame_keep] / scale if with_kps else None)
+        return results
+
+    def detect(self, frames):
+        """
+        Args:
+            frames: [bgr image, ...] or (N, H, W, 3)
+        Returns:
+            [(boxes, kps), ...] per frame, see decode
+        """
+        results = []
+        for start in range(0, len(frames), self.run_batch):
+            chunk = frames[start:start + self.run_batch]
+            blob, scales = self.preprocess(chunk)
+            if self.dynamic_batch:
+                outputs = self.model.forward([blob])
+            else:
+                runs = [self.model.forward([blob[index:index + 1]]) for index in range(len(chunk))]
+                outputs = [np.concatenate([run[i].reshape(1, -1) for run in runs]) for i in range(len(runs[0]))]
+            results.extend(self.decode(outputs, scales))
+        return results
+
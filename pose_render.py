@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+视频写入阶段的头部姿态贴图
+app.py 与 app_tts_digital_human.py 的 write_video_gradio 共用: 任务登记, 按收到的帧数取姿态,
+并周期性重新检测头部区域. 是否启用由 [pose_warp] enable 控制
+"""
+
+import configparser
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from pose_warp import PoseWarper, detect_face_roi
+
+
+@dataclass
+class PoseRenderConfig:
+    """姿态贴图开关与头部区域检测 ([pose_warp])"""
+
+    # 0: 动作模式只生成报告, 不改动视频帧
+    enable: bool = False
+
+    # 每隔多少帧重新检测头部区域, 检测失败时沿用上一次的区域
+    roi_interval: int = 25
+
+    # 每次向动作控制器取的姿态帧数
+    chunk_frames: int = 64
+
+    @classmethod
+    def from_config(cls, config_path: str = "config/config.ini") -> "PoseRenderConfig":
+        config = configparser.ConfigParser()
+        config.read(config_path)
+        return cls(
+            enable=config.getboolean("pose_warp", "enable", fallback=cls.enable),
+            roi_interval=config.getint("pose_warp", "roi_interval", fallback=cls.roi_interval),
+            chunk_frames=config.getint("pose_warp", "chunk_frames", fallback=cls.chunk_frames),
+        )
+
+
+class PoseStream:
+    """
+    从动作控制器按需取任意帧数的姿态 (控制器需提供 iter_pose_batches)
+    渲染帧数超过音频时长时补零姿态
+    """
+
+    def __init__(self, controller, duration: float, fps: float, chunk_frames: int = 64):
+        self._batches = controller.iter_pose_batches(duration, fps, chunk_frames)
+        self._buffer = np.zeros((0, 3))
+        self.frames = 0
+
+    def take(self, count: int) -> np.ndarray:
+        """(count, 3) [pitch, yaw, roll]"""
+        while len(self._buffer) < count:
+            batch = next(self._batches, None)
+            if batch is None:
+                self._buffer = np.concatenate([self._buffer, np.zeros((count - len(self._buffer), 3))])
+                break
+            self._buffer = np.concatenate([self._buffer, batch])
+        poses, self._buffer = self._buffer[:count], self._buffer[count:]
+        self.frames += count
+        return poses
+
+
+class PoseJob:
+    """单个任务的姿态贴图状态, 由视频写入进程逐批调用 apply"""
+
+    def __init__(self, stream: PoseStream, warper: PoseWarper, config: PoseRenderConfig,
+                 detect_fn: Callable[[np.ndarray, float], Optional[Tuple[int, int, int, int]]] = detect_face_roi):
+        self.stream = stream
+        self.warper = warper
+        self.config = config
+        self.detect_fn = detect_fn
+        self.roi = None
+        self.roi_detections = 0
+        self.frames_warped = 0
+        self._frames_since_roi = 0
+
+    def _update_roi(self, frame: np.ndarray):
+        if self.roi is not None and self._frames_since_roi < self.config.roi_interval:
+            return
+        roi = self.detect_fn(frame, self.warper.config.roi_expand)
+        self.roi_detections += 1
+        self._frames_since_roi = 0
+        if roi is not None:
+            self.roi = roi
+
+    def apply(self, frames: Sequence[np.ndarray]) -> Sequence[np.ndarray]:
+        """对收到的一批帧原地应用姿态, 姿态数与帧数一一对应"""
+        if not len(frames):
+            return frames
+        poses = self.stream.take(len(frames))
+        assert len(poses) == len(frames), "pose batch {} != frame batch {}".format(len(poses), len(frames))
+        self._update_roi(frames[0])
+        self._frames_since_roi += len(frames)
+        if self.roi is None:
+            return frames
+        self.warper.apply_batch(frames, poses, self.roi)
+        self.frames_warped += len(frames)
+        return frames
+
+    def get_stats(self) -> Dict:
+        return {
+            "frames": self.stream.frames,
+            "frames_warped": self.frames_warped,
+            "roi_detections": self.roi_detections,
+            "maps": self.warper.get_stats(),
+        }
+
+
+# 头部姿态贴图, 映射表缓存在所有任务间共用
+pose_warper = PoseWarper()
+
+# 任务ID -> (动作控制器, 音频时长, 帧率), 视频写入时创建 PoseJob
+_jobs: Dict[str, Tuple] = {}
+_jobs_lock = threading.Lock()
+
+
+def register_job(work_id: str, controller, duration: float, fps: float,
+                 config: PoseRenderConfig = None) -> bool:
+    """登记任务的动作控制器; 姿态贴图关闭时不登记, 返回是否登记"""
+    config = config or PoseRenderConfig.from_config()
+    if not config.enable:
+        return False
+    with _jobs_lock:
+        _jobs[work_id] = (controller, duration, fps, config)
+    return True
+
+
+def open_job(work_id: str) -> Optional[PoseJob]:
+    """视频写入开始时调用, 未登记的任务返回 None"""
+    with _jobs_lock:
+        entry = _jobs.get(work_id)
+    if entry is None:
+        return None
+    controller, duration, fps, config = entry
+    return PoseJob(PoseStream(controller, duration, fps, config.chunk_frames), pose_warper, config)
+
+
+def release_job(work_id: str):
+    with _jobs_lock:
+        _jobs.pop(work_id, None)
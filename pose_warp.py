@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+头部姿态贴图
+把 generate_pose_sequence 输出的 [pitch, yaw, roll] 应用到视频帧:
+姿态量化到角度网格, 按 (人脸区域尺寸, 量化姿态) 缓存 cv2.remap 映射表,
+只对人脸区域做变形, 边缘羽化后与原帧融合
+
+贴回与姿态合并 (PoseWarper.paste_face): 生成的人脸用 (姿态仿射 ∘ estimate_norm 对齐矩阵的逆) 一次重采样贴入帧中,
+不再先整帧贴回再做一次姿态变形. 人脸贴回在编译的 TransDhTask 帧循环内, 视频写入收到的已是贴回后的整帧,
+因此服务中只用到 apply_batch; paste_face 尚未接入服务, 供 Python 侧帧循环使用.
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from lazy_imports import lazy_import
+
+# 贴图只在视频写入时用到, 导入本模块不加载 cv2
+cv2 = lazy_import("cv2")
+
+
+@dataclass
+class PoseWarpConfig:
+    """姿态贴图配置"""
+
+    # 角度量化步长 (度), 越大缓存命中率越高
+    angle_step: float = 0.5
+
+    # 人脸框向外扩展比例 (含头发与下巴)
+    roi_expand: float = 0.35
+
+    # 羽化宽度, 占人脸区域短边的比例
+    feather: float = 0.15
+
+    # 头部转动半径, 占人脸区域高度的比例 (决定点头/转头的位移)
+    pivot_radius: float = 0.5
+
+    # 映射表缓存条目数
+    cache_size: int = 256
+
+
+def quantize_pose(pose: Sequence[float], step: float) -> Tuple[int, int, int]:
+    """姿态量化为角度网格索引"""
+    return tuple(int(v) for v in np.round(np.asarray(pose, dtype=np.float64) / step))
+
+
+def pose_affine(pose: Sequence[float], roi_size: Tuple[int, int], pivot_radius: float = 0.5) -> np.ndarray:
+    """
+    由头部姿态计算人脸区域内的2D仿射近似 (正向: 源 -> 目标)
+
+    pitch: 以颈部为支点上下点头, 表现为竖直位移与竖直压缩
+    yaw: 左右转头, 表现为水平位移与水平压缩
+    roll: 绕颈部 (区域底部中心) 的平面内旋转
+    """
+    pitch, yaw, roll = np.radians(np.asarray(pose, dtype=np.float64))
+    h, w = roi_size
+    radius = pivot_radius * h
+    pivot = np.array([w / 2.0, float(h)])
+
+    rotation = np.array([[np.cos(roll), -np.sin(roll)], [np.sin(roll), np.cos(roll)]])
+    scale = np.diag([np.cos(yaw), np.cos(pitch)])
+    linear = rotation @ scale
+    shift = np.array([radius * np.sin(yaw), radius * np.sin(pitch)])
+    offset = pivot + shift - linear @ pivot
+    return np.hstack([linear, offset[:, None]])
+
+
+def feather_mask(roi_size: Tuple[int, int], feather: float) -> np.ndarray:
+    """人脸区域羽化权重 (h, w), 中心为1, 边缘渐变到0"""
+    h, w = roi_size
+    width = max(int(round(min(h, w) * feather)), 1)
+    ramp_y = np.clip(np.minimum(np.arange(h), np.arange(h)[::-1]) / width, 0.0, 1.0)
+    ramp_x = np.clip(np.minimum(np.arange(w), np.arange(w)[::-1]) / width, 0.0, 1.0)
+    # smoothstep, 避免羽化边缘出现折痕
+    ramp_y = ramp_y * ramp_y * (3 - 2 * ramp_y)
+    ramp_x = ramp_x * ramp_x * (3 - 2 * ramp_x)
+    return np.outer(ramp_y, ramp_x).astype(np.float32)
+
+
+def compose_paste_affine(align_matrix: np.ndarray, pose_matrix: Optional[np.ndarray],
+                         roi: Tuple[int, int, int, int]) -> np.ndarray:
+    """
+    合并贴回与姿态变换: 对齐人脸坐标 -> 头部区域内坐标
+
+    Args:
+        align_matrix: estimate_norm 输出的对齐矩阵 (原帧 -> 对齐人脸)
+        pose_matrix: pose_affine 输出的区域内姿态仿射, None 表示不变形
+        roi: 头部区域 (x1, y1, x2, y2)
+    """
+    to_roi = cv2.invertAffineTransform(np.asarray(align_matrix, dtype=np.float64))
+    to_roi[:, 2] -= roi[:2]
+    if pose_matrix is None:
+        return to_roi
+    linear = pose_matrix[:, :2] @ to_roi[:, :2]
+    offset = pose_matrix[:, :2] @ to_roi[:, 2] + pose_matrix[:, 2]
+    return np.hstack([linear, offset[:, None]])
+
+
+def paste_back(frame: np.ndarray, face: np.ndarray, align_matrix: np.ndarray,
+               face_mask: np.ndarray) -> np.ndarray:
+    """整帧逆变换贴回 (原两步流程的第一步, 保留作对照), 原地修改并返回frame"""
+    height, width = frame.shape[:2]
+    inverse = cv2.invertAffineTransform(np.asarray(align_matrix, dtype=np.float64))
+    warped = cv2.warpAffine(face, inverse, (width, height), flags=cv2.INTER_LINEAR)
+    mask = cv2.warpAffine(face_mask, inverse, (width, height), flags=cv2.INTER_LINEAR)
+    frame[:] = cv2.blendLinear(warped, frame, mask, 1.0 - mask)
+    return frame
+
+
+# 人脸检测器每个线程加载一次 (CascadeClassifier 的检测不保证线程安全)
+_cascade_local = threading.local()
+
+
+def _face_cascade():
+    cascade = getattr(_cascade_local, "cascade", None)
+    if cascade is None:
+        cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+        _cascade_local.cascade = cascade
+    return cascade
+
+
+def detect_face_roi(frame: np.ndarray, expand: float = 0.35) -> Optional[Tuple[int, int, int, int]]:
+    """
+    检测最大人脸并扩展为头部区域 (pose_render.PoseJob 每 roi_interval 帧调用一次)
+
+    Returns:
+        (x1, y1, x2, y2) 或 None
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    faces = _face_cascade().detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5,
+                                     minSize=(max(frame.shape[0] // 10, 32),) * 2)
+    if len(faces) == 0:
+        return None
+    x, y, w, h = max(faces, key=lambda f: f[2] * f[3])
+    return expand_roi((x, y, x + w, y + h), frame.shape[:2], expand)
+
+
+def expand_roi(box: Tuple[int, int, int, int], frame_size: Tuple[int, int], expand: float) -> Tuple[int, int, int, int]:
+    """人脸框按比例扩展并裁剪到画面内"""
+    x1, y1, x2, y2 = box
+    height, width = frame_size
+    dw = int((x2 - x1) * expand)
+    dh = int((y2 - y1) * expand)
+    return max(x1 - dw, 0), max(y1 - dh, 0), min(x2 + dw, width), min(y2 + dh, height)
+
+
+class PoseWarper:
+    """头部姿态贴图: 映射表与羽化权重按进程缓存, 可被多个任务共用"""
+
+    def __init__(self, config: PoseWarpConfig = None):
+        self.config = config or PoseWarpConfig()
+        self._maps: OrderedDict = OrderedDict()
+        self._masks = {}
+        self._face_masks = {}
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _build_maps(self, roi_size: Tuple[int, int], qpose: Tuple[int, int, int]):
+        h, w = roi_size
+        pose = np.asarray(qpose, dtype=np.float64) * self.config.angle_step
+        inverse = cv2.invertAffineTransform(pose_affine(pose, roi_size, self.config.pivot_radius))
+        grid_x, grid_y = np.meshgrid(np.arange(w, dtype=np.float32), np.arange(h, dtype=np.float32))
+        map_x = inverse[0, 0] * grid_x + inverse[0, 1] * grid_y + inverse[0, 2]
+        map_y = inverse[1, 0] * grid_x + inverse[1, 1] * grid_y + inverse[1, 2]
+        # 定点格式的映射表, remap时比浮点映射快
+        return cv2.convertMaps(map_x.astype(np.float32), map_y.astype(np.float32), cv2.CV_16SC2)
+
+    def get_maps(self, roi_size: Tuple[int, int], pose: Sequence[float]):
+        """按 (区域尺寸, 量化姿态) 取映射表, LRU缓存"""
+        key = (roi_size, quantize_pose(pose, self.config.angle_step))
+        with self._lock:
+            maps = self._maps.get(key)
+            if maps is not None:
+                self._maps.move_to_end(key)
+                self.cache_hits += 1
+                return maps
+        maps = self._build_maps(*key)
+        with self._lock:
+            self.cache_misses += 1
+            self._maps[key] = maps
+            while len(self._maps) > self.config.cache_size:
+                self._maps.popitem(last=False)
+        return maps
+
+    def get_masks(self, roi_size: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+        """羽化权重及其补 (变形区域, 原区域)"""
+        masks = self._masks.get(roi_size)
+        if masks is None:
+            mask = feather_mask(roi_size, self.config.feather)
+            masks = self._masks[roi_size] = (mask, 1.0 - mask)
+        return masks
+
+    def apply(self, frame: np.ndarray, pose: Sequence[float], roi: Tuple[int, int, int, int]) -> np.ndarray:
+        """
+        对一帧应用头部姿态 (原地修改并返回frame)
+
+        Args:
+            frame: BGR图像
+            pose: [pitch, yaw, roll] (度)
+            roi: 头部区域 (x1, y1, x2, y2)
+        """
+        if not any(quantize_pose(pose, self.config.angle_step)):
+            return frame
+        x1, y1, x2, y2 = roi
+        roi_size = (y2 - y1, x2 - x1)
+        region = frame[y1:y2, x1:x2]
+        map1, map2 = self.get_maps(roi_size, pose)
+        warped = cv2.remap(region, map1, map2, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+        mask, inverse_mask = self.get_masks(roi_size)
+        frame[y1:y2, x1:x2] = cv2.blendLinear(warped, region, mask, inverse_mask)
+        return frame
+
+    def get_face_mask(self, face_size: Tuple[int, int]) -> np.ndarray:
+        """对齐人脸的默认贴回权重"""
+        mask = self._face_masks.get(face_size)
+        if mask is None:
+            mask = self._face_masks[face_size] = feather_mask(face_size, self.config.feather)
+        return mask
+
+    def paste_face(self, frame: np.ndarray, face: np.ndarray, align_matrix: np.ndarray,
+                   pose: Sequence[float], roi: Tuple[int, int, int, int],
+                   face_mask: np.ndarray = None) -> np.ndarray:
+        """
+        生成人脸贴回与头部姿态一次完成 (原地修改并返回frame)
+
+        与 paste_back + apply 的两步流程等价, 但人脸只重采样一次, 且只在头部区域内计算.
+        要求贴回权重落在头部区域的羽化内核中 (roi 由人脸框扩展得到时成立).
+        逐帧贴回在编译的 TransDhTask 帧循环内, 本方法尚未接入服务, 供 Python 侧帧循环使用.
+
+        Args:
+            frame: 原始BGR帧
+            face: 生成的对齐人脸
+            align_matrix: estimate_norm 输出的对齐矩阵 (原帧 -> 对齐人脸)
+            pose: [pitch, yaw, roll] (度)
+            roi: 头部区域 (x1, y1, x2, y2)
+            face_mask: 对齐人脸坐标下的贴回权重 (float32), 默认边缘羽化
+        """
+        if face_mask is None:
+            face_mask = self.get_face_mask(face.shape[:2])
+        x1, y1, x2, y2 = roi
+        roi_size = (y2 - y1, x2 - x1)
+        region = frame[y1:y2, x1:x2]
+
+        qpose = quantize_pose(pose, self.config.angle_step)
+        if any(qpose):
+            pose_matrix = pose_affine(np.asarray(qpose, dtype=np.float64) * self.config.angle_step,
+                                      roi_size, self.config.pivot_radius)
+            map1, map2 = self.get_maps(roi_size, pose)
+            background = cv2.remap(region, map1, map2, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+        else:
+            pose_matrix = None
+            background = region
+
+        affine = compose_paste_affine(align_matrix, pose_matrix, roi)
+        dsize = (roi_size[1], roi_size[0])
+        warped = cv2.warpAffine(face, affine, dsize, flags=cv2.INTER_LINEAR)
+        mask = cv2.warpAffine(face_mask, affine, dsize, flags=cv2.INTER_LINEAR)
+        pasted = cv2.blendLinear(warped, background, mask, 1.0 - mask)
+
+        if pose_matrix is None:
+            frame[y1:y2, x1:x2] = pasted
+        else:
+            feather, inverse_feather = self.get_masks(roi_size)
+            frame[y1:y2, x1:x2] = cv2.blendLinear(pasted, region, feather, inverse_feather)
+        return frame
+
+    def apply_batch(self, frames: Sequence[np.ndarray], poses: np.ndarray,
+                    roi: Tuple[int, int, int, int]) -> Sequence[np.ndarray]:
+        """对一个渲染批次逐帧应用姿态, 姿态数须与帧数相同"""
+        if len(frames) != len(poses):
+            raise ValueError("{} poses for {} frames".format(len(poses), len(frames)))
+        for frame, pose in zip(frames, poses):
+            self.apply(frame, pose, roi)
+        return frames
+
+    def get_stats(self) -> dict:
+        total = self.cache_hits + self.cache_misses
+        return {
+            'cached_maps': len(self._maps),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'hit_rate': self.cache_hits / total if total else 0.0,
+        }
+
+
+def benchmark_pose_warp(width: int = 1080, height: int = 1920, num_frames: int = 500, fps: float = 25):
+    """CPU吞吐测试: 朴素整帧warpAffine vs 缓存映射表的人脸区域remap"""
+    import time
+
+    from simple_motion_controller import SimpleMotionController, SimpleMotionConfig
+
+    controller = SimpleMotionController(
+        SimpleMotionConfig(motion_weights={'still': 0.4, 'nod': 0.35, 'tilt': 0.25}), seed=0)
+    duration = num_frames / fps
+    poses = controller.generate_pose_sequence(controller.generate_timeline_array(duration), duration, fps)
+
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(4)]
+    roi = expand_roi((width // 2 - 200, height // 4, width // 2 + 200, height // 4 + 480), (height, width), 0.35)
+
+    start = time.perf_counter()
+    for i, pose in enumerate(poses):
+        affine = pose_affine(pose, (roi[3] - roi[1], roi[2] - roi[0]))
+        affine[:, 2] += np.array([roi[0], roi[1]]) - affine[:, :2] @ np.array([roi[0], roi[1]])
+        cv2.warpAffine(frames[i % 4], affine, (width, height), borderMode=cv2.BORDER_REPLICATE)
+    naive = time.perf_counter() - start
+
+    warper = PoseWarper()
+    start = time.perf_counter()
+    for i, pose in enumerate(poses):
+        warper.apply(frames[i % 4].copy(), pose, roi)
+    cached = time.perf_counter() - start
+
+    stats = warper.get_stats()
+    print(f"画面: {width}x{height}, 头部区域: {roi[2] - roi[0]}x{roi[3] - roi[1]}, 帧数: {len(poses)}")
+    print(f"整帧warpAffine: {len(poses) / naive:.1f} fps")
+    print(f"缓存映射表remap: {len(poses) / cached:.1f} fps (含帧拷贝)")
+    print(f"映射表: {stats['cached_maps']} 个, 命中率 {stats['hit_rate'] * 100:.1f}%")
+
+
+def benchmark_fused_paste(width: int = 1080, height: int = 1920, num_frames: int = 200, face_size: int = 512):
+    """CPU耗时对比: 整帧贴回 + 姿态变形 (两步) vs 合并仿射一次重采样"""
+    import time
+
+    rng = np.random.default_rng(0)
+    frame = cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (0, 0), 3)
+    face = cv2.GaussianBlur(rng.integers(0, 255, (face_size, face_size, 3), dtype=np.uint8), (0, 0), 3)
+    box = (width // 2 - 200, height // 4, width // 2 + 200, height // 4 + 480)
+    roi = expand_roi(box, (height, width), 0.35)
+    # 对齐矩阵: 人脸框 -> 对齐人脸 (相似变换)
+    scale = face_size / 400.0
+    align_matrix = np.array([[scale, 0, -box[0] * scale], [0, scale, -(box[1] + 40) * scale]])
+    poses = np.stack([6.0 * np.sin(np.linspace(0, 6 * np.pi, num_frames)),
+                      np.zeros(num_frames),
+                      3.0 * np.cos(np.linspace(0, 4 * np.pi, num_frames))], axis=1)
+
+    warper = PoseWarper()
+    face_mask = warper.get_face_mask((face_size, face_size))
+    start = time.perf_counter()
+    for pose in poses:
+        warper.apply(paste_back(frame.copy(), face, align_matrix, face_mask), pose, roi)
+    two_step = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for pose in poses:
+        warper.paste_face(frame.copy(), face, align_matrix, pose, roi, face_mask)
+    fused = time.perf_counter() - start
+
+    print(f"画面: {width}x{height}, 人脸: {face_size}x{face_size}, 帧数: {num_frames}")
+    print(f"两步 (整帧贴回 + 姿态变形): {two_step / num_frames * 1000:.2f} ms/帧")
+    print(f"合并仿射一次重采样: {fused / num_frames * 1000:.2f} ms/帧, "
+          f"节省 {(two_step - fused) / num_frames * 1000:.2f} ms/帧")
+
+
+# 使用示例
+if __name__ == "__main__":
+    import sys
+
+    if "--benchmark" in sys.argv:
+        benchmark_pose_warp()
+        benchmark_fused_paste()
+        sys.exit(0)
+
+    image_path = sys.argv[1] if len(sys.argv) > 1 else "example/frame.png"
+    frame = cv2.imread(image_path)
+    roi = detect_face_roi(frame)
+    print(f"头部区域: {roi}")
+    if roi is not None:
+        warper = PoseWarper()
+        cv2.imwrite("pose_warp_demo.png", warper.apply(frame.copy(), [8.0, 0.0, 5.0], roi))
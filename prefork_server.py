@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+预派生 (prefork) 多进程服务
+父进程先导入重量级模块, 再 fork 出多个工作进程, 省去每个工作进程各自导入模块的时间;
+共享的只是导入模块时产生的内存页 (写时复制), 模型权重不共享:
+服务使用的模型由每个工作进程的 TransDhTask 在编译代码中自行加载 (GPU 上的 CUDA 上下文也不能跨 fork),
+各工作进程各持一份, 内存占用见 psutil 报告的独占 (USS) / 按比例分摊 (PSS) / 共享内存.
+工作进程退出后按指数退避重启, 同一序号连续重启超过上限后不再重启.
+"""
+
+import configparser
+import gc
+import os
+import runpy
+import signal
+import time
+import traceback
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import psutil
+
+MB = 1024.0 * 1024.0
+
+
+@dataclass
+class PreforkConfig:
+    """预派生服务配置 ([prefork])"""
+    workers: int = 2
+    base_port: int = 7860               # 第 i 个工作进程监听 base_port + i
+    preload_modules: Tuple[str, ...] = ("numpy", "cv2", "onnxruntime", "torch", "gradio")
+    report_interval: float = 300.0      # 内存报告间隔 (秒)
+    restart: bool = True                # 工作进程退出后自动重启
+    restart_backoff: float = 1.0        # 第 n 次连续重启前等待 restart_backoff * 2^(n-1) 秒
+    restart_backoff_max: float = 60.0   # 等待上限; 运行超过该时长后退出的工作进程重新计数
+    max_restarts: int = 5               # 同一序号连续重启次数上限
+
+    @classmethod
+    def from_config(cls, config_path: str = "config/config.ini") -> "PreforkConfig":
+        config = configparser.ConfigParser()
+        config.read(config_path)
+        modules = config.get("prefork", "preload_modules", fallback=",".join(cls.preload_modules))
+        return cls(
+            workers=config.getint("prefork", "workers", fallback=cls.workers),
+            base_port=config.getint("prefork", "base_port", fallback=cls.base_port),
+            preload_modules=tuple(m.strip() for m in modules.split(",") if m.strip()),
+            report_interval=config.getfloat("prefork", "report_interval", fallback=cls.report_interval),
+            restart=config.getboolean("prefork", "restart", fallback=cls.restart),
+            restart_backoff=config.getfloat("prefork", "restart_backoff", fallback=cls.restart_backoff),
+            restart_backoff_max=config.getfloat("prefork", "restart_backoff_max", fallback=cls.restart_backoff_max),
+            max_restarts=config.getint("prefork", "max_restarts", fallback=cls.max_restarts),
+        )
+
+
+def preload_modules(names) -> List[str]:
+    """导入可用的模块, 当前环境没有的跳过"""
+    import importlib
+    loaded = []
+    for name in names:
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except ImportError:
+            pass
+    return loaded
+
+
+def memory_report(pids) -> List[Dict]:
+    """
+    每个进程的内存占用 (MB)
+        uss: 进程独占, 进程退出即可释放的内存
+        pss: 共享页按共享进程数分摊后的占用, 各进程相加即总占用
+        shared: rss - uss, 与其他进程共享的部分
+    """
+    rows = []
+    for pid in pids:
+        try:
+            info = psutil.Process(pid).memory_full_info()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+        rows.append({
+            "pid": pid,
+            "rss_mb": info.rss / MB,
+            "uss_mb": info.uss / MB,
+            "pss_mb": getattr(info, "pss", info.uss) / MB,
+            "shared_mb": (info.rss - info.uss) / MB,
+        })
+    return rows
+
+
+def format_memory_report(rows: List[Dict], title: str = "工作进程内存") -> str:
+    lines = ["{} (MB):".format(title)]
+    for row in rows:
+        lines.append("  pid {pid:>7d}  rss {rss_mb:8.1f}  uss {uss_mb:8.1f}  pss {pss_mb:8.1f}  "
+                     "shared {shared_mb:8.1f}".format(**row))
+    if rows:
+        lines.append("  合计 uss {:.1f}, pss {:.1f}, rss {:.1f}".format(
+            sum(r["uss_mb"] for r in rows), sum(r["pss_mb"] for r in rows), sum(r["rss_mb"] for r in rows)))
+    return "\n".join(lines)
+
+
+class PreforkServer:
+    """
+    父进程预导入模块后 fork 工作进程并监管
+    Args:
+        worker_main: 工作进程入口 worker_main(index), 在 fork 出的子进程中运行
+    """
+
+    def __init__(self, worker_main: Callable[[int], None], config: Optional[PreforkConfig] = None):
+        self.worker_main = worker_main
+        self.config = config or PreforkConfig()
+        self.modules = []
+        self.loaded = False
+        self.workers = {}
+        self.restarts = {}          # 序号 -> 连续重启次数
+        self._started = {}          # 序号 -> 最近一次启动时间
+        self._pending = {}          # 序号 -> 计划重启时间
+        self._stopping = False
+
+    def load(self):
+        """导入模块, 然后冻结 gc 避免回收扫描触碰共享页"""
+        start = time.perf_counter()
+        self.modules = preload_modules(self.config.preload_modules)
+        gc.collect()
+        gc.freeze()
+        self.loaded = True
+        print("prefork 父进程预导入完成 {:.2f}s: {}".format(time.perf_counter() - start, self.modules))
+        print(format_memory_report(memory_report([os.getpid()]), "父进程内存"))
+
+    def _spawn(self, index: int):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                self.worker_main(index)
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else 0
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        self.workers[pid] = index
+        self._started[index] = time.time()
+
+    def _schedule_restart(self, index: int):
+        """按连续重启次数指数退避; 运行足够久后退出的工作进程重新计数"""
+        config = self.config
+        if time.time() - self._started.get(index, 0.0) >= config.restart_backoff_max:
+            self.restarts[index] = 0
+        count = self.restarts.get(index, 0)
+        if count >= config.max_restarts:
+            print("工作进程 {} 连续重启 {} 次, 不再重启".format(index, count))
+            return
+        self.restarts[index] = count + 1
+        delay = min(config.restart_backoff * 2 ** count, config.restart_backoff_max)
+        self._pending[index] = time.time() + delay
+        print("工作进程 {} 将在 {:.1f}s 后重启 (第 {} 次)".format(index, delay, count + 1))
+
+    def _on_signal(self, signum, frame):
+        self._stopping = True
+
+    def serve(self):
+        if not self.loaded:
+            self.load()
+        signal.signal(signal.SIGTERM, self._on_signal)
+        signal.signal(signal.SIGINT, self._on_signal)
+        for index in range(self.config.workers):
+            self._spawn(index)
+
+        next_report = time.time() + min(self.config.report_interval, 30.0)
+        while self.workers or self._pending:
+            if self._stopping:
+                self._pending.clear()
+                self.stop()
+                break
+            pid, status = os.waitpid(-1, os.WNOHANG) if self.workers else (0, 0)
+            if pid:
+                index = self.workers.pop(pid, None)
+                print("工作进程 {} (pid {}) 退出, 状态 {}".format(index, pid, status))
+                if index is not None and self.config.restart:
+                    self._schedule_restart(index)
+                continue
+            now = time.time()
+            for index, due in list(self._pending.items()):
+                if due <= now:
+                    del self._pending[index]
+                    self._spawn(index)
+            if now >= next_report:
+                print(format_memory_report(memory_report(list(self.workers))))
+                next_report = now + self.config.report_interval
+            wait = min([0.5] + [due - now for due in self._pending.values()])
+            time.sleep(max(wait, 0.01))
+
+    def stop(self, timeout: float = 10.0):
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.time() + timeout
+        while self.workers and time.time() < deadline:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+            if pid:
+                self.workers.pop(pid, None)
+            else:
+                time.sleep(0.1)
+        for pid in list(self.workers):
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            self.workers.pop(pid)
+
+
+def run_app_worker(index: int, base_port: int = 7860, script: str = "app.py"):
+    """工作进程: 以 __main__ 运行 Gradio 应用, 端口 base_port + index, 不创建公网分享链接"""
+    os.environ["PREFORK_WORKER"] = str(index)
+    os.environ["GRADIO_SERVER_PORT"] = str(base_port + index)
+    runpy.run_path(script, run_name="__main__")
+
+
+# 启动: python prefork_server.py --workers 2
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="prefork 多进程服务: 父进程预导入模块后派生工作进程")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    prefork_config = PreforkConfig.from_config()
+    if args.workers:
+        prefork_config.workers = args.workers
+    server = PreforkServer(lambda index: run_app_worker(index, prefork_config.base_port), prefork_config)
+    server.serve()
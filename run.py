@@ -11,19 +11,20 @@ import uuid
 from enum import Enum
 
 import queue
-import cv2
-from flask import Flask, request
 
 if sys.version_info.major != 3 or sys.version_info.minor != 8:
     print("请使用 Python 3.8 版本运行此脚本")
     sys.exit(1)
 
-import service.trans_dh_service
-
 from h_utils.custom import CustomError
+from lazy_imports import lazy_import
 from y_utils.config import GlobalConfig
 from y_utils.logger import logger
 
+# 重量级模块首次使用时才导入, python run.py --help 不再加载 torch / onnxruntime
+cv2 = lazy_import("cv2")
+trans_dh_service = lazy_import("service.trans_dh_service")
+
 
 def get_args():
     parser = argparse.ArgumentParser(
@@ -166,9 +167,6 @@ def write_video(
     logger.info("Custom VideoWriter 后处理进程结束")
 
 
-service.trans_dh_service.write_video = write_video
-
-
 def main():
     opt = get_args()
     if not os.path.exists(opt.audio_path):
@@ -181,7 +179,9 @@ def main():
     else:
         video_url = opt.video_path
     sys.argv = [sys.argv[0]]
-    task = service.trans_dh_service.TransDhTask()
+    trans_dh_service.write_video = write_video
+    task = trans_dh_service.TransDhTask()
+    # TransDhTask 在服务内部自行加载模型且没有就绪信号, 沿用原有的等待
     time.sleep(10) # somehow, this works...
 
     code = "1004"
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+静音快速通道
+每个视频帧一个RMS能量值 (前缀和一次算出), 并按与 wenet 特征提取相同的阈值找出静音区间.
+检测/生成/贴回循环在编译的 trans_dh_service 内, 因此在任务边界分流:
+只把语音区间的音频与对应源视频帧送入 TransDhTask.work, 静音区间直接使用源视频帧,
+再按时间顺序拼接并与完整音频合成. 源视频短于音频时与服务相同, 按帧号循环使用源视频帧.
+音频驱动动作 (audio_motion_planner.py) 复用同一次解码得到的逐帧能量.
+"""
+
+import configparser
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import wave
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import numpy as np
+
+
+@dataclass
+class SilenceConfig:
+    """静音检测配置 ([silence_fast_path])"""
+
+    # 0: 整段音频送入服务, 只计算能量
+    enable: bool = True
+
+    # 低于最大能量多少dB视为静音, 与 wenet/tools/_extract_feats.py 中 hparams['silence_db'] 一致
+    top_db: float = 28.0
+
+    # 短于该时长的停顿不计为静音区间 (秒), 句中短停顿仍按说话处理
+    min_silence: float = 0.4
+
+    # 语音前后保留的过渡时长 (秒), 张嘴/闭嘴过程计为语音
+    pad: float = 0.12
+
+    # 音频重采样率, 与 wenet 特征提取相同
+    sample_rate: int = 16000
+
+    @classmethod
+    def from_config(cls, config_path: str = "config/config.ini") -> "SilenceConfig":
+        config = configparser.ConfigParser()
+        config.read(config_path)
+        return cls(
+            enable=config.getboolean("silence_fast_path", "enable", fallback=cls.enable),
+            top_db=config.getfloat("silence_fast_path", "top_db", fallback=cls.top_db),
+            min_silence=config.getfloat("silence_fast_path", "min_silence", fallback=cls.min_silence),
+            pad=config.getfloat("silence_fast_path", "pad", fallback=cls.pad),
+        )
+
+
+def load_audio(audio_path: str, sample_rate: int = 16000) -> np.ndarray:
+    """解码音频为单声道float数组"""
+    import librosa
+    wav_arr, _ = librosa.load(audio_path, sr=sample_rate)
+    return wav_arr
+
+
+def frame_energy_db(wav_arr: np.ndarray, sample_rate: int, fps: float) -> np.ndarray:
+    """
+    按视频帧计算音频能量
+
+    Args:
+        wav_arr: 单声道音频
+        sample_rate: 采样率
+        fps: 视频帧率
+
+    Returns:
+        每个视频帧的RMS能量 (dB, 相对全段最大值, 最大为0)
+    """
+    hop = sample_rate / float(fps)
+    num_frames = int(np.ceil(len(wav_arr) / hop))
+    if num_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+
+    # 每帧对应的采样区间, 用前缀和一次算出所有帧的平方和
+    bounds = np.minimum(np.round(np.arange(num_frames + 1) * hop).astype(np.int64), len(wav_arr))
+    power = np.concatenate([[0.0], np.cumsum(wav_arr.astype(np.float64) ** 2)])
+    lengths = np.maximum(bounds[1:] - bounds[:-1], 1)
+    rms = np.sqrt((power[bounds[1:]] - power[bounds[:-1]]) / lengths)
+
+    ref = max(rms.max(), 1e-10)
+    return (20.0 * np.log10(np.maximum(rms, 1e-10) / ref)).astype(np.float32)
+
+
+def compute_silent_spans(energy_db: np.ndarray, fps: float, config: SilenceConfig = None) -> np.ndarray:
+    """
+    根据逐帧能量计算静音区间
+
+    Returns:
+        静音帧区间数组 (n, 2), 每行为 [start, end) 帧索引
+    """
+    config = config or SilenceConfig()
+    voiced = energy_db > -config.top_db
+
+    # 语音段向两侧扩展pad帧
+    pad_frames = int(round(config.pad * fps))
+    if pad_frames > 0 and voiced.any():
+        kernel = np.ones(2 * pad_frames + 1, dtype=np.int32)
+        # 'same' 在输入短于卷积核时返回核的长度, 截回帧数
+        voiced = np.convolve(voiced.astype(np.int32), kernel, mode='same')[:len(voiced)] > 0
+
+    silent = np.concatenate([[False], ~voiced, [False]])
+    edges = np.flatnonzero(np.diff(silent.astype(np.int8)))
+    spans = edges.reshape(-1, 2)
+
+    min_frames = max(int(round(config.min_silence * fps)), 1)
+    return spans[(spans[:, 1] - spans[:, 0]) >= min_frames]
+
+
+def silent_mask(energy_db: np.ndarray, fps: float, config: SilenceConfig = None) -> np.ndarray:
+    """逐帧静音标记, 与 energy_db 等长"""
+    mask = np.zeros(len(energy_db), dtype=bool)
+    for start, end in compute_silent_spans(energy_db, fps, config):
+        mask[start:end] = True
+    return mask
+
+
+def split_segments(num_frames: int, silent_spans: np.ndarray) -> List[tuple]:
+    """
+    按静音区间把 [0, num_frames) 切成交替的片段
+
+    Returns:
+        [(start, end, voiced), ...], 按时间顺序覆盖全部帧
+    """
+    segments, cursor = [], 0
+    for start, end in np.asarray(silent_spans, dtype=np.int64).reshape(-1, 2):
+        if start > cursor:
+            segments.append((cursor, int(start), True))
+        segments.append((int(start), int(end), False))
+        cursor = int(end)
+    if cursor < num_frames:
+        segments.append((cursor, num_frames, True))
+    return segments
+
+
+@dataclass
+class SilencePlan:
+    """单个任务的静音分流计划, 音频只解码一次"""
+
+    wav_arr: np.ndarray
+    sample_rate: int
+    fps: float
+    energy_db: np.ndarray
+    segments: List[tuple]
+    render_s: float = 0.0
+    service_calls: int = 0
+
+    @classmethod
+    def from_wav(cls, wav_arr: np.ndarray, sample_rate: int, fps: float,
+                 config: SilenceConfig = None) -> "SilencePlan":
+        config = config or SilenceConfig()
+        energy_db = frame_energy_db(wav_arr, sample_rate, fps)
+        spans = compute_silent_spans(energy_db, fps, config)
+        return cls(wav_arr, sample_rate, fps, energy_db, split_segments(len(energy_db), spans))
+
+    @classmethod
+    def from_audio(cls, audio_path: str, fps: float, config: SilenceConfig = None) -> "SilencePlan":
+        config = config or SilenceConfig()
+        return cls.from_wav(load_audio(audio_path, config.sample_rate), config.sample_rate, fps, config)
+
+    @property
+    def num_frames(self) -> int:
+        return len(self.energy_db)
+
+    @property
+    def duration(self) -> float:
+        return len(self.wav_arr) / float(self.sample_rate)
+
+    @property
+    def num_silent_frames(self) -> int:
+        return sum(end - start for start, end, voiced in self.segments if not voiced)
+
+    def format_report(self) -> str:
+        voiced = sum(1 for _, _, v in self.segments if v)
+        silent = len(self.segments) - voiced
+        ratio = self.num_silent_frames / float(max(self.num_frames, 1))
+        lines = [
+            "🔇 静音快速通道:",
+            f"- 跳过推理帧数: {self.num_silent_frames}/{self.num_frames} ({ratio:.0%}), 静音区间 {silent} 段",
+            f"- 送入服务的语音区间: {voiced} 段",
+        ]
+        if self.service_calls:
+            lines.append(f"- 分段渲染耗时: {self.render_s:.1f}秒 (服务调用 {self.service_calls} 次)")
+        return "\n".join(lines)
+
+
+def write_wav(path: str, wav_arr: np.ndarray, sample_rate: int):
+    """单声道 16bit PCM wav"""
+    pcm = (np.clip(wav_arr, -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm.tobytes())
+
+
+class LoopingSource:
+    """按输出帧号顺序读取源视频帧, 读到结尾时从头循环 (帧号 i 对应源帧 i % N)"""
+
+    def __init__(self, video_path: str):
+        import cv2
+        self._cv2 = cv2
+        self.video_path = video_path
+        self._cap = cv2.VideoCapture(video_path)
+
+    def read(self) -> np.ndarray:
+        ok, frame = self._cap.read()
+        if not ok:
+            self._cap.release()
+            self._cap = self._cv2.VideoCapture(self.video_path)
+            ok, frame = self._cap.read()
+            if not ok:
+                raise ValueError("cannot read frames from {}".format(self.video_path))
+        return frame
+
+    def release(self):
+        self._cap.release()
+
+
+@dataclass
+class Segment:
+    start: int
+    end: int
+    voiced: bool
+    video_path: str
+    audio_path: Optional[str] = None
+    result_path: Optional[str] = None
+
+
+def prepare_segments(plan: SilencePlan, video_path: str, work_dir: str) -> List[Segment]:
+    """一次遍历源视频, 每个片段写出对应的源视频帧, 语音片段另写出对应的音频"""
+    import cv2
+
+    source = LoopingSource(video_path)
+    hop = plan.sample_rate / float(plan.fps)
+    segments = []
+    try:
+        for index, (start, end, voiced) in enumerate(plan.segments):
+            path = os.path.join(work_dir, "{:04d}.mp4".format(index))
+            writer = None
+            for _ in range(start, end):
+                frame = source.read()
+                if writer is None:
+                    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), plan.fps,
+                                             (frame.shape[1], frame.shape[0]))
+                writer.write(frame)
+            writer.release()
+            segment = Segment(start, end, voiced, path)
+            if voiced:
+                segment.audio_path = os.path.join(work_dir, "{:04d}.wav".format(index))
+                write_wav(segment.audio_path, plan.wav_arr[int(round(start * hop)):int(round(end * hop))],
+                          plan.sample_rate)
+            segments.append(segment)
+    finally:
+        source.release()
+    return segments
+
+
+def render_voiced(task, segments: List[Segment], code: str):
+    """语音片段逐段送入 TransDhTask.work, 与整段任务相同的调用方式"""
+    for index, segment in enumerate(segments):
+        if not segment.voiced:
+            continue
+        segment_code = "{}_v{}".format(code, index)
+        task.task_dic[segment_code] = ""
+        task.work(segment.audio_path, segment.video_path, segment_code, 0, 0, 0, 0)
+        segment.result_path = task.task_dic[segment_code][2]
+
+
+def stitch_segments(segments: List[Segment], output_path: str, fps: float, pose_job=None,
+                    batch_frames: int = 64) -> int:
+    """
+    按时间顺序拼接: 语音片段取服务结果, 静音片段取源视频帧; 每段按帧数截断或重复末帧补齐.
+    pose_job 为整个任务的 pose_render.PoseJob, 姿态按拼接后的帧号连续应用
+
+    Returns:
+        写入的帧数
+    """
+    import cv2
+
+    writer, size, written = None, None, 0
+    try:
+        for segment in segments:
+            cap = cv2.VideoCapture(segment.result_path if segment.voiced else segment.video_path)
+            remaining, last = segment.end - segment.start, None
+            while remaining > 0:
+                batch = []
+                while len(batch) < min(batch_frames, remaining):
+                    ok, frame = cap.read()
+                    if not ok:
+                        if last is None:
+                            raise ValueError("segment {} has no frames".format(segment.result_path))
+                        frame = last.copy()
+                    elif size is not None and frame.shape[1::-1] != size:
+                        frame = cv2.resize(frame, size)
+                    last = frame
+                    batch.append(frame)
+                if writer is None:
+                    size = batch[0].shape[1::-1]
+                    writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+                if pose_job is not None:
+                    pose_job.apply(batch)
+                for frame in batch:
+                    writer.write(frame)
+                remaining -= len(batch)
+                written += len(batch)
+            cap.release()
+    finally:
+        if writer is not None:
+            writer.release()
+    return written
+
+
+def mux_audio(video_path: str, audio_path: str, output_path: str):
+    """与 write_video_gradio 相同的编码与音频合成"""
+    command = "ffmpeg -loglevel warning -y -i {} -i {} -c:a aac -c:v libx264 -crf 15 -strict -2 {}".format(
+        audio_path, video_path, output_path
+    )
+    subprocess.call(command, shell=True)
+    if not os.path.exists(output_path):
+        raise RuntimeError("ffmpeg failed: {}".format(command))
+
+
+def render_job(task, plan: SilencePlan, audio_path: str, video_path: str, code: str, result_dir: str,
+               pose_job=None) -> str:
+    """
+    分段渲染一个任务: 只有语音区间经过模型推理
+
+    Returns:
+        {result_dir}/{code}-r.mp4, 与整段任务的结果路径格式相同
+    """
+    start = time.perf_counter()
+    work_dir = tempfile.mkdtemp(prefix="{}_silence_".format(code))
+    segments = []
+    try:
+        segments = prepare_segments(plan, video_path, work_dir)
+        render_voiced(task, segments, code)
+        stitched = os.path.join(work_dir, "stitched.mp4")
+        stitch_segments(segments, stitched, plan.fps, pose_job)
+        result_path = os.path.join(result_dir, "{}-r.mp4".format(code))
+        mux_audio(stitched, audio_path, result_path)
+    finally:
+        for segment in segments:
+            if segment.result_path and os.path.exists(segment.result_path):
+                os.remove(segment.result_path)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    plan.service_calls = sum(1 for segment in segments if segment.voiced)
+    plan.render_s = time.perf_counter() - start
+    return result_path
@@ -5,9 +5,12 @@
 纯随机时间间隔切换的头部动作控制
 """
 
-import random
+import hashlib
+import struct
+import threading
+from collections import OrderedDict
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Union
 from dataclasses import dataclass
 
 
@@ -33,19 +36,185 @@ class SimpleMotionConfig:
                 'tilt': 0.20            # 倾斜
             }
 
+# 动作类型编码
+MOTION_TYPE_NAMES = ('still', 'nod', 'tilt')
+MOTION_TYPE_CODES = {name: code for code, name in enumerate(MOTION_TYPE_NAMES)}
+MOTION_TYPE_LABELS = {'still': '静止', 'nod': '点头', 'tilt': '倾斜'}
+
+# 时间线中每个动作段的紧凑存储格式 (42字节/段)
+MOTION_TIMELINE_DTYPE = np.dtype([
+    ('type', np.uint8),          # 动作类型编码
+    ('start', np.float64),       # 开始时间 (秒)
+    ('end', np.float64),         # 结束时间 (秒)
+    ('amplitude', np.float64),   # 点头/倾斜幅度 (度)
+    ('frequency', np.float64),   # 点头频率 (Hz)
+    ('direction', np.int8),      # 点头起始方向 / 倾斜方向
+    ('roll', np.float64),        # 倾斜保持角度 (度)
+])
+
+_TIMELINE_MAGIC = b'MTL1'
+_TIMELINE_HEADER = struct.Struct('<4sI')
+
+# 每次批量抽样的动作段数
+SEGMENT_BLOCK_SIZE = 64
+
+# 姿态序列LRU缓存: (配置, 种子, 时长, 帧率) -> 姿态数组
+POSE_CACHE_SIZE = 8
+_pose_cache = OrderedDict()
+_pose_cache_lock = threading.Lock()
+
+
+class MotionTimeline:
+    """
+    数组存储的动作时间线
+
+    每个动作段一条结构化记录, 支持O(log n)时间点查找和二进制序列化;
+    迭代/下标访问时按需转换为 generate_motion_timeline 的字典格式
+    """
+
+    def __init__(self, segments: np.ndarray):
+        self.segments = segments
+        # 连续存储的起止时间, 用于二分查找
+        self._starts = np.ascontiguousarray(segments['start'])
+        self._ends = np.ascontiguousarray(segments['end'])
+
+    @classmethod
+    def from_dicts(cls, timeline: List[Dict]) -> 'MotionTimeline':
+        """从字典格式的时间线转换"""
+        segments = np.zeros(len(timeline), dtype=MOTION_TIMELINE_DTYPE)
+        for i, motion in enumerate(timeline):
+            motion_type = motion['params']['type']
+            head_pose = motion['params']['head_pose']
+            amplitude = head_pose.get('amplitude', 0.0)
+            if motion_type == 'nod':
+                # 点头字典不带 direction, 起始方向记在 pitch = amplitude * direction 的符号里
+                direction = 1 if head_pose['pitch'] >= 0 else -1
+                segments[i] = (MOTION_TYPE_CODES['nod'], motion['start_time'], motion['end_time'],
+                               amplitude, head_pose['frequency'], direction, 0.0)
+            elif motion_type == 'tilt':
+                direction = head_pose.get('direction', 1 if head_pose['roll'] >= 0 else -1)
+                segments[i] = (MOTION_TYPE_CODES['tilt'], motion['start_time'], motion['end_time'],
+                               amplitude, 0.0, direction, head_pose['roll'])
+            else:
+                segments[i] = (MOTION_TYPE_CODES['still'], motion['start_time'], motion['end_time'],
+                               0.0, 0.0, 0, 0.0)
+        return cls(segments)
+
+    def tobytes(self) -> bytes:
+        """序列化为二进制"""
+        return _TIMELINE_HEADER.pack(_TIMELINE_MAGIC, len(self.segments)) + self.segments.tobytes()
+
+    @classmethod
+    def frombytes(cls, data: bytes) -> 'MotionTimeline':
+        """从 tobytes 的结果恢复"""
+        magic, count = _TIMELINE_HEADER.unpack_from(data)
+        if magic != _TIMELINE_MAGIC:
+            raise ValueError('invalid motion timeline data')
+        segments = np.frombuffer(data, dtype=MOTION_TIMELINE_DTYPE, count=count, offset=_TIMELINE_HEADER.size)
+        return cls(segments)
+
+    def __reduce__(self):
+        # 跨进程传递时只pickle一段连续内存
+        return MotionTimeline.frombytes, (self.tobytes(),)
+
+    def __len__(self) -> int:
+        return len(self.segments)
+
+    @property
+    def duration(self) -> float:
+        return float(self._ends[-1]) if len(self.segments) else 0.0
+
+    def segment_index_at(self, time_point: float) -> int:
+        """
+        二分查找时间点所在动作段
+
+        与字典时间线的线性查找一致: 区间两端闭合, 段边界时刻归属前一段; 未命中返回-1
+        """
+        idx = int(np.searchsorted(self._ends, time_point, side='left'))
+        if idx >= len(self.segments) or self._starts[idx] > time_point:
+            return -1
+        return idx
+
+    def segment_at(self, time_point: float) -> Union[Dict, None]:
+        idx = self.segment_index_at(time_point)
+        return self[idx] if idx >= 0 else None
+
+    def __getitem__(self, idx: int) -> Dict:
+        """转换为字典格式的动作段"""
+        if idx < 0:
+            idx += len(self.segments)
+        seg = self.segments[idx]
+        motion_type = MOTION_TYPE_NAMES[seg['type']]
+        amplitude = float(seg['amplitude'])
+        direction = int(seg['direction'])
+
+        if motion_type == 'nod':
+            params = {
+                'type': 'nod',
+                'head_pose': {
+                    'pitch': amplitude * direction,
+                    'yaw': 0,
+                    'roll': 0,
+                    'amplitude': amplitude,
+                    'frequency': float(seg['frequency'])
+                }
+            }
+        elif motion_type == 'tilt':
+            params = {
+                'type': 'tilt',
+                'head_pose': {
+                    'pitch': 0,
+                    'yaw': 0,
+                    'roll': float(seg['roll']),
+                    'amplitude': amplitude,
+                    'direction': direction
+                }
+            }
+        else:
+            params = {
+                'type': 'still',
+                'head_pose': {'pitch': 0, 'yaw': 0, 'roll': 0}
+            }
+
+        start_time = float(seg['start'])
+        end_time = float(seg['end'])
+        return {
+            'id': idx,
+            'type': motion_type,
+            'name': MOTION_TYPE_LABELS[motion_type],
+            'start_time': start_time,
+            'end_time': end_time,
+            'duration': end_time - start_time,
+            'params': params
+        }
+
+    def __iter__(self):
+        for idx in range(len(self.segments)):
+            yield self[idx]
+
+    def to_dicts(self) -> List[Dict]:
+        return list(self)
+
+
+def job_seed(work_id: str) -> int:
+    """
+    由任务ID得到32位随机种子
+    uuid1 的低位是主机节点号, 同一主机上恒定, 因此对整个ID取哈希, 每个任务的种子不同且可由任务ID复现
+    """
+    return int.from_bytes(hashlib.blake2b(work_id.encode("utf-8"), digest_size=4).digest(), "little")
+
 
 class SimpleMotionController:
     """简化版随机动作控制器"""
 
-    def __init__(self, config: SimpleMotionConfig = None):
+    def __init__(self, config: SimpleMotionConfig = None, seed: int = None):
         self.config = config or SimpleMotionConfig()
 
+        # 每个控制器独立的随机种子 (时间线生成时创建随机数生成器); 未指定时随机生成一个, 保证结果可复现
+        self.seed = int(seed) if seed is not None else int(np.random.SeedSequence().entropy % (2 ** 32))
+
         # 动作类型定义
-        self.motion_types = {
-            'still': '静止',
-            'nod': '点头',
-            'tilt': '倾斜'
-        }
+        self.motion_types = MOTION_TYPE_LABELS
 
     def generate_motion_timeline(self, duration: float) -> List[Dict]:
         """
@@ -57,95 +226,156 @@ class SimpleMotionController:
         Returns:
             动作时间线列表
         """
-        timeline = []
-        current_time = 0.0
-        motion_id = 0
+        return self.generate_timeline_array(duration).to_dicts()
 
-        while current_time < duration:
-            # 随机选择动作类型
-            motion_type = self._select_motion_type()
+    def generate_timeline_array(self, duration: float) -> MotionTimeline:
+        """
+        生成随机动作时间线 (数组存储)
+
+        Args:
+            duration: 总时长 (秒)
+
+        Returns:
+            MotionTimeline
+        """
+        blocks = list(self._iter_segment_blocks(duration))
+        if not blocks:
+            # duration <= 0: 没有动作段
+            return MotionTimeline(np.zeros(0, dtype=MOTION_TIMELINE_DTYPE))
+        return MotionTimeline(np.concatenate(blocks))
 
-            # 随机生成切换间隔
-            interval = random.uniform(*self.config.switch_interval_range)
-            end_time = min(current_time + interval, duration)
+    def _iter_segment_blocks(self, duration: float):
+        """
+        按块批量抽样动作段
 
-            # 生成动作参数
-            motion_params = self._generate_motion_params(motion_type, interval)
+        每次调用都从 self.seed 重新开始, 同一控制器多次生成的时间线完全相同;
+        时间线前缀与总时长无关, 流式生成与整段生成结果一致
 
-            timeline.append({
-                'id': motion_id,
-                'type': motion_type,
-                'name': self.motion_types[motion_type],
-                'start_time': current_time,
-                'end_time': end_time,
-                'duration': end_time - current_time,
-                'params': motion_params
-            })
+        Yields:
+            MOTION_TIMELINE_DTYPE 结构化数组, 每块最多 SEGMENT_BLOCK_SIZE 段
+        """
+        rng = np.random.default_rng(self.seed)
+        current_time = 0.0
 
-            current_time = end_time
-            motion_id += 1
+        while current_time < duration:
+            block = self._sample_segment_block(rng, current_time)
+            block = block[block['start'] < duration]
+            block['end'] = np.minimum(block['end'], duration)
+            current_time = float(block['end'][-1])
+            yield block
+
+    def _sample_segment_block(self, rng: np.random.Generator, start_time: float) -> np.ndarray:
+        """批量抽样一块动作段 (类型、切换间隔、幅度一次性抽取)"""
+        n = SEGMENT_BLOCK_SIZE
+        type_probs = self._motion_type_probs()
+
+        types = rng.choice(len(MOTION_TYPE_NAMES), size=n, p=type_probs)
+        intervals = rng.uniform(*self.config.switch_interval_range, size=n)
+        nod_amplitudes = rng.uniform(*self.config.nod_range, size=n)
+        nod_frequencies = rng.uniform(0.5, 1.2, size=n)  # 点头频率
+        tilt_amplitudes = rng.uniform(*self.config.tilt_range, size=n)
+        directions = rng.choice([-1, 1], size=n)  # 点头起始方向 / 倾斜方向
+
+        is_nod = types == MOTION_TYPE_CODES['nod']
+        is_tilt = types == MOTION_TYPE_CODES['tilt']
+
+        block = np.zeros(n, dtype=MOTION_TIMELINE_DTYPE)
+        block['type'] = types
+        # 逐段累加切换间隔
+        times = np.cumsum(np.concatenate([[start_time], intervals]))
+        block['start'] = times[:-1]
+        block['end'] = times[1:]
+        block['amplitude'] = np.where(is_nod, nod_amplitudes, np.where(is_tilt, tilt_amplitudes, 0.0))
+        block['frequency'] = np.where(is_nod, nod_frequencies, 0.0)
+        block['direction'] = np.where(is_nod | is_tilt, directions, 0)
+        block['roll'] = np.where(is_tilt, tilt_amplitudes * directions, 0.0)
+        return block
+
+    def _motion_type_probs(self) -> np.ndarray:
+        """动作类型权重 -> 按 MOTION_TYPE_NAMES 顺序的概率, 未知类型按静止处理"""
+        probs = np.zeros(len(MOTION_TYPE_NAMES))
+        for motion_type, weight in self.config.motion_weights.items():
+            probs[MOTION_TYPE_CODES.get(motion_type, MOTION_TYPE_CODES['still'])] += weight
+        total = probs.sum()
+        if total <= 0:
+            probs[MOTION_TYPE_CODES['still']] = 1.0
+            return probs
+        return probs / total
+
+    def _config_key(self) -> Tuple:
+        """配置的可哈希表示, 用于缓存键"""
+        return (
+            tuple(self.config.switch_interval_range),
+            tuple(sorted(self.config.motion_weights.items())),
+            tuple(self.config.nod_range),
+            tuple(self.config.tilt_range),
+        )
+
+    def get_pose_sequence(self, duration: float, fps: float = 25) -> np.ndarray:
+        """
+        获取整段头部姿态序列, 结果按 (配置, 种子, 时长, 帧率) 缓存
 
-        return timeline
+        重复渲染和预览直接复用同一份动作; 返回的数组只读
+        """
+        key = (self._config_key(), self.seed, float(duration), float(fps))
+        with _pose_cache_lock:
+            head_poses = _pose_cache.get(key)
+            if head_poses is not None:
+                _pose_cache.move_to_end(key)
+                return head_poses
+
+        head_poses = self.generate_pose_sequence(self.generate_timeline_array(duration), duration, fps)
+        head_poses.setflags(write=False)
+
+        with _pose_cache_lock:
+            _pose_cache[key] = head_poses
+            _pose_cache.move_to_end(key)
+            while len(_pose_cache) > POSE_CACHE_SIZE:
+                _pose_cache.popitem(last=False)
+        return head_poses
 
-    def _select_motion_type(self) -> str:
-        """根据权重随机选择动作类型"""
-        types = list(self.config.motion_weights.keys())
-        weights = list(self.config.motion_weights.values())
-        return random.choices(types, weights=weights)[0]
+    def estimate_segment_count(self, duration: float) -> int:
+        """按平均切换间隔估算动作段数 (不生成时间线)"""
+        mean_interval = sum(self.config.switch_interval_range) / 2.0
+        return int(np.ceil(duration / max(mean_interval, 1e-6)))
 
-    def _generate_motion_params(self, motion_type: str, duration: float) -> Dict:
-        """生成动作参数"""
+    def iter_pose_batches(self, duration: float, fps: float = 25, batch_size: int = 4):
+        """
+        按渲染批次惰性生成头部姿态
 
-        if motion_type == 'still':
-            return self._generate_still_params()
-        elif motion_type == 'nod':
-            return self._generate_nod_params(duration)
-        elif motion_type == 'tilt':
-            return self._generate_tilt_params(duration)
-        else:
-            return self._generate_still_params()
+        动作段随时间推进逐段生成, 只保留覆盖当前批次的少数几段, 长音频也不会生成完整时间线;
+        拼接所有批次的结果与 generate_pose_sequence 对同一时间线的输出一致
 
-    def _generate_still_params(self) -> Dict:
-        """生成静止状态参数"""
-        return {
-            'type': 'still',
-            'head_pose': {'pitch': 0, 'yaw': 0, 'roll': 0}
-        }
+        Args:
+            duration: 音频时长 (秒)
+            fps: 视频帧率
+            batch_size: 每批帧数, 与渲染批次一致
+
+        Yields:
+            头部姿态数组 (batch, 3) - [pitch, yaw, roll], 最后一批可能不足 batch_size
+        """
+        total_frames = int(duration * fps)
+        blocks = self._iter_segment_blocks(duration)
+        window = np.zeros(0, dtype=MOTION_TIMELINE_DTYPE)
+        exhausted = False
 
-    def _generate_nod_params(self, duration: float) -> Dict:
-        """生成点头动作参数"""
-        amplitude = random.uniform(*self.config.nod_range)
-        frequency = random.uniform(0.5, 1.2)  # 点头频率
-        direction = random.choice([1, -1])     # 向上或向下开始
+        for batch_start in range(0, total_frames, batch_size):
+            time_points = np.arange(batch_start, min(batch_start + batch_size, total_frames)) / fps
 
-        return {
-            'type': 'nod',
-            'head_pose': {
-                'pitch': amplitude * direction,
-                'yaw': 0,
-                'roll': 0,
-                'amplitude': amplitude,
-                'frequency': frequency
-            }
-        }
+            # 补充动作段直到覆盖本批最后一帧
+            while not exhausted and (not len(window) or window['end'][-1] < time_points[-1]):
+                try:
+                    window = np.concatenate([window, next(blocks)])
+                except StopIteration:
+                    exhausted = True
 
-    def _generate_tilt_params(self, duration: float) -> Dict:
-        """生成倾斜动作参数"""
-        amplitude = random.uniform(*self.config.tilt_range)
-        direction = random.choice([-1, 1])  # 左倾或右倾
+            # 丢弃已经结束的动作段 (段边界时刻归属前一段, 所以保留 end == 当前时间的段)
+            window = window[min(int(np.searchsorted(window['end'], time_points[0], side='left')),
+                                len(window) - 1):]
 
-        return {
-            'type': 'tilt',
-            'head_pose': {
-                'pitch': 0,
-                'yaw': 0,
-                'roll': amplitude * direction,
-                'amplitude': amplitude,
-                'direction': direction
-            }
-        }
+            yield self._evaluate_poses(MotionTimeline(window), time_points)
 
-    def get_pose_at_time(self, timeline: List[Dict], time_point: float) -> Dict:
+    def get_pose_at_time(self, timeline: Union[List[Dict], MotionTimeline], time_point: float) -> Dict:
         """
         获取指定时间点的姿态参数
 
@@ -158,10 +388,13 @@ class SimpleMotionController:
         """
         # 查找当前时间对应的动作
         current_motion = None
-        for motion in timeline:
-            if motion['start_time'] <= time_point <= motion['end_time']:
-                current_motion = motion
-                break
+        if isinstance(timeline, MotionTimeline):
+            current_motion = timeline.segment_at(time_point)
+        else:
+            for motion in timeline:
+                if motion['start_time'] <= time_point <= motion['end_time']:
+                    current_motion = motion
+                    break
 
         if current_motion is None:
             # 默认静止状态
@@ -205,9 +438,10 @@ class SimpleMotionController:
         else:
             return {'head_pose': {'pitch': 0, 'yaw': 0, 'roll': 0}}
 
-    def generate_pose_sequence(self, timeline: List[Dict], duration: float, fps: int = 25) -> np.ndarray:
+    def generate_pose_sequence(self, timeline: Union[List[Dict], MotionTimeline], duration: float,
+                               fps: int = 25) -> np.ndarray:
         """
-        生成完整的头部姿态序列
+        生成完整的头部姿态序列 (numpy向量化实现, 结果与逐帧调用 get_pose_at_time 一致)
 
         Args:
             timeline: 动作时间线
@@ -218,6 +452,49 @@ class SimpleMotionController:
             头部姿态序列数组 (frames, 3) - [pitch, yaw, roll]
         """
         total_frames = int(duration * fps)
+        if not isinstance(timeline, MotionTimeline):
+            timeline = MotionTimeline.from_dicts(timeline)
+
+        return self._evaluate_poses(timeline, np.arange(total_frames) / fps)
+
+    def _evaluate_poses(self, timeline: MotionTimeline, time_points: np.ndarray) -> np.ndarray:
+        """向量化计算一组时间点的头部姿态 (frames, 3)"""
+        head_poses = np.zeros((len(time_points), 3))  # [pitch, yaw, roll]
+        if len(time_points) == 0 or not len(timeline):
+            return head_poses
+        segments = timeline.segments
+
+        start_times = segments['start']
+        end_times = segments['end']
+        durations = end_times - start_times
+        is_nod = segments['type'] == MOTION_TYPE_CODES['nod']
+        is_tilt = segments['type'] == MOTION_TYPE_CODES['tilt']
+
+        # 按起始时间定位每帧所在动作段
+        seg = np.searchsorted(timeline._starts, time_points, side='right') - 1
+        # get_pose_at_time 的区间两端闭合并取第一个匹配, 段边界时刻归属前一段
+        prev = np.maximum(seg - 1, 0)
+        seg = np.where((seg > 0) & (time_points <= end_times[prev]), prev, seg)
+        seg_safe = np.maximum(seg, 0)
+        valid = (seg >= 0) & (time_points <= end_times[seg_safe])
+
+        # 计算动作进度
+        progress = np.clip((time_points - start_times[seg_safe]) / durations[seg_safe], 0.0, 1.0)
+
+        # 点头的正弦波运动
+        nod_frames = valid & is_nod[seg_safe]
+        angle = 2 * np.pi * segments['frequency'][seg_safe[nod_frames]] * progress[nod_frames]
+        head_poses[nod_frames, 0] = segments['amplitude'][seg_safe[nod_frames]] * np.sin(angle)
+
+        # 倾斜保持姿态
+        tilt_frames = valid & is_tilt[seg_safe]
+        head_poses[tilt_frames, 2] = segments['roll'][seg_safe[tilt_frames]]
+
+        return head_poses
+
+    def _generate_pose_sequence_loop(self, timeline: List[Dict], duration: float, fps: int = 25) -> np.ndarray:
+        """逐帧生成头部姿态序列 (原始实现, 用于结果校验和性能对比)"""
+        total_frames = int(duration * fps)
         head_poses = np.zeros((total_frames, 3))  # [pitch, yaw, roll]
 
         for frame_idx in range(total_frames):
@@ -234,7 +511,7 @@ class SimpleMotionController:
 
         return head_poses
 
-    def print_timeline_summary(self, timeline: List[Dict]):
+    def print_timeline_summary(self, timeline: Union[List[Dict], MotionTimeline]):
         """打印时间线摘要"""
         print("随机动作时间线:")
         print("-" * 40)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试批量 5 点相似变换估计, 期望矩阵固定为 face_lib estimate_norm (insightface 求解) 的结果
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# 正脸 / 左转 / 右转 / 左右镜像 的检测关键点
+LANDMARKS = [
+    [[412.3, 305.8], [498.1, 301.2], [457.6, 352.4], [421.9, 398.7], [492.5, 395.1]],
+    [[630.4, 412.0], [671.9, 409.3], [612.2, 447.5], [633.7, 489.6], [668.8, 487.2]],
+    [[215.5, 188.1], [262.7, 196.4], [268.3, 229.9], [214.0, 251.3], [251.6, 257.8]],
+    [[540.0, 260.0], [470.0, 262.0], [505.0, 300.0], [532.0, 335.0], [476.0, 337.0]],
+]
+
+# estimate_norm(lmk, 112, "arcface")
+ARCFACE_112 = [
+    [[4.2502327539e-01, -1.2029061734e-02, -1.3377059454e+02], [1.2029061734e-02, 4.2502327539e-01, -8.2620407382e+01]],
+    [[5.0377987287e-01, -7.8384696521e-03, -2.6458539671e+02], [7.8384696521e-03, 5.0377987287e-01, -1.5940010788e+02]],
+    [[5.8651081554e-01, 7.8645401394e-02, -1.0382741360e+02], [-7.8645401394e-02, 5.8651081554e-01, -4.0822982046e+01]],
+    [[1.0365367876e-01, 1.1484321244e-02, 2.9099851192e-01], [-1.1484321244e-02, 1.0365367876e-01, 4.6724049287e+01]],
+]
+
+# estimate_norm(lmk, 112, "pose"), 选中的模板序号为 2 / 1 / 3 / 4
+POSE_112 = [
+    [[3.8203293694e-01, -1.3044809845e-02, -1.1381636293e+02], [1.3044809845e-02, 3.8203293694e-01, -7.0952923808e+01]],
+    [[4.6123619583e-01, -1.2842615817e-02, -2.3905169278e+02], [1.2842615817e-02, 4.6123619583e-01, -1.4700353929e+02]],
+    [[5.2048235190e-01, 7.9233071720e-02, -8.3505602964e+01], [-7.9233071720e-02, 5.2048235190e-01, -2.9334903226e+01]],
+    [[2.6749624870e-01, 1.0397761658e-02, -7.6308458280e+01], [-1.0397761658e-02, 2.6749624870e-01, -5.1083685803e+00]],
+]
+
+
+def test_estimate_norm_batch_fixed():
+    """测试批量估计: 矩阵 / 模板序号与 estimate_norm 的固定结果一致, 镜像关键点也不会解出反射"""
+    import numpy as np
+    from face_align_batch import estimate_norm_batch
+
+    lmks = np.array(LANDMARKS)
+    matrices, index = estimate_norm_batch(lmks, 112, "arcface")
+    assert np.allclose(matrices, ARCFACE_112, atol=1e-6) and np.array_equal(index, [0, 0, 0, 0])
+    # 模板按 crop_size / 112 缩放, 矩阵同样缩放
+    matrices, index = estimate_norm_batch(lmks, 512, "arcface")
+    assert np.allclose(matrices, np.array(ARCFACE_112) * (512 / 112.0), atol=1e-6)
+    matrices, index = estimate_norm_batch(lmks, 112, "pose")
+    assert np.allclose(matrices, POSE_112, atol=1e-6) and np.array_equal(index, [2, 1, 3, 4])
+    assert np.allclose(matrices[:, 0, 0], matrices[:, 1, 1]) and np.allclose(matrices[:, 0, 1], -matrices[:, 1, 0])
+    print("✅ 批量相似变换与 estimate_norm 固定结果一致")
+
+
+def test_estimate_norm_batch_exact():
+    """测试无噪声关键点: 模板经已知相似变换得到的关键点, 解出的矩阵就是该变换的逆"""
+    import numpy as np
+    from face_align_batch import align_templates, estimate_norm_batch, invert_affine_batch
+
+    forward = np.array([[[2.0, 0.0, 300.0], [0.0, 2.0, 150.0]],
+                        [[1.5, -2.598076211353316, 820.0], [2.598076211353316, 1.5, 40.0]],
+                        [[0.7071067811865476, 0.7071067811865476, 95.5],
+                         [-0.7071067811865476, 0.7071067811865476, 610.25]]])
+    template = align_templates(512)[0]
+    lmks = np.einsum("nij,kj->nki", forward[:, :, :2], template) + forward[:, None, :, 2]
+    matrices, index = estimate_norm_batch(lmks, 512)
+    assert np.allclose(matrices, invert_affine_batch(forward), atol=1e-9) and not index.any()
+    assert np.allclose(invert_affine_batch(matrices), forward, atol=1e-9)
+    print("✅ 无噪声关键点解出精确的逆变换")
+
+
+def test_invert_affine_batch():
+    """测试批量求逆: 与 cv2.invertAffineTransform 一致, 奇异矩阵返回零矩阵"""
+    import cv2
+    import numpy as np
+    from face_align_batch import invert_affine_batch
+
+    matrices = np.array(ARCFACE_112 + POSE_112 + [[[1.0, 2.0, 3.0], [2.0, 4.0, 5.0]]])
+    inverses = invert_affine_batch(matrices)
+    for matrix, inverse in zip(matrices, inverses):
+        assert np.allclose(inverse, cv2.invertAffineTransform(matrix), atol=1e-9)
+    assert not inverses[-1].any()
+    print("✅ 批量逆矩阵与 cv2 一致")
+
+
+if __name__ == "__main__":
+    test_estimate_norm_batch_fixed()
+    test_estimate_norm_batch_exact()
+    test_invert_affine_batch()
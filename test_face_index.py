@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试按视频内容哈希持久化的人脸分析索引
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def synthetic_analyzer():
+    """由帧亮度得到确定的人脸框 / 关键点 / 仿射矩阵 / 解析掩码"""
+    import cv2
+    import numpy as np
+    from face_index import FrameAnalysis
+
+    def analyze(frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        cy, cx = np.array(gray.shape) / 2 + (gray.mean() - 127) / 4
+        bbox = np.array([cx - 80, cy - 80, cx + 80, cy + 80, 0.9])
+        kps = np.array([[cx - 28, cy - 18], [cx + 28, cy - 18], [cx, cy + 12], [cx - 22, cy + 42], [cx + 22, cy + 42]])
+        affine = np.array([[1.6, 0, 256 - 1.6 * cx], [0, 1.6, 256 - 1.6 * cy]])
+        mask = np.zeros((512, 512), np.uint8)
+        cv2.ellipse(mask, (256, 256), (160, 210), 0, 0, 360, 1, -1)
+        cv2.ellipse(mask, (256, 340), (60, 25), 0, 0, 360, 11, -1)
+        return FrameAnalysis(True, bbox, kps, affine, mask)
+
+    return analyze
+
+
+def write_video(path, frames=12):
+    import cv2
+    import numpy as np
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 25, (320, 240))
+    for i in range(frames):
+        writer.write(np.full((240, 320, 3), 60 + i * 10, np.uint8))
+    writer.release()
+
+
+def test_face_index_roundtrip():
+    """测试索引文件: 写入后内存映射读回, 无人脸帧与空数组正常"""
+    import shutil
+    import tempfile
+    import numpy as np
+    from face_index import FaceIndex, build_face_index, write_face_index, FrameAnalysis
+
+    workdir = tempfile.mkdtemp()
+    try:
+        video_path = os.path.join(workdir, "avatar.mp4")
+        write_video(video_path)
+        analyzer = synthetic_analyzer()
+        expected = []
+
+        def analyze(frame):
+            expected.append(FrameAnalysis(found=False) if len(expected) == 2 else analyzer(frame))
+            return expected[-1]
+
+        index = build_face_index(video_path, analyze, os.path.join(workdir, "avatar.fidx"), {"version": "1"})
+        assert len(index) == 12 and index.meta["version"] == "1"
+        assert isinstance(index.bboxes, np.memmap)
+        for i, result in enumerate(expected):
+            cached = index.frame(i)
+            assert cached.found == result.found
+            if result.found:
+                assert np.allclose(cached.kps, result.kps, atol=1e-3)
+                assert np.allclose(cached.affine, result.affine, atol=1e-3)
+                assert np.array_equal(cached.mask, result.mask)
+        assert index.mask(2) is None
+
+        path = os.path.join(workdir, "empty.fidx")
+        write_face_index(path, {"found": np.zeros(0, np.uint8), "bboxes": np.zeros((0, 5), np.float32),
+                                "kps": np.zeros((0, 5, 2), np.float32), "affines": np.zeros((0, 2, 3), np.float32),
+                                "mask_offsets": np.zeros(1, np.int64), "mask_data": np.zeros(0, np.uint8)},
+                         {"frames": 0})
+        empty = FaceIndex(path)
+        assert len(empty) == 0 and empty.kps.shape == (0, 5, 2)
+        print("✅ 人脸分析索引读写正常")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_face_index_cache_builds_once():
+    """测试索引缓存: 同一视频并发请求只构建一次, 之后的缓存对象直接打开, 不同视频互不等待, 构建锁用完即删"""
+    import shutil
+    import tempfile
+    import threading
+    import time
+    from face_index import FaceIndexCache
+
+    workdir = tempfile.mkdtemp()
+    try:
+        videos = [os.path.join(workdir, "{}.mp4".format(name)) for name in ("slow", "fast")]
+        write_video(videos[0], 12)
+        write_video(videos[1], 4)
+        analyzer = synthetic_analyzer()
+        calls = {path: 0 for path in videos}
+        finished = {}
+
+        def analyzer_for(path, delay):
+            def analyze(frame):
+                calls[path] += 1
+                time.sleep(delay)
+                return analyzer(frame)
+            return analyze
+
+        cache_dir = os.path.join(workdir, "face_index")
+        cache = FaceIndexCache(cache_dir)
+        results = []
+
+        def job(path, delay):
+            results.append(cache.get(path, analyzer_for(path, delay)))
+            finished[path] = time.perf_counter()
+
+        threads = [threading.Thread(target=job, args=(videos[0], 0.05)) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        job(videos[1], 0.0)
+        for thread in threads:
+            thread.join()
+        assert len(results) == 4 and calls == {videos[0]: 12, videos[1]: 4}
+        assert finished[videos[1]] < finished[videos[0]]
+        slow = {id(index): index for index in results if len(index) == 12}
+        assert len(slow) == 1
+        assert cache.builds == 2 and cache.hits == 2
+        assert cache._path_locks == {}
+        assert cache.get(videos[1]) is not None and cache._path_locks == {}
+
+        index = FaceIndexCache(cache_dir).get(videos[0])
+        assert len(index) == 12 and index.path == list(slow.values())[0].path
+        missing = FaceIndexCache(cache_dir, version="2")
+        assert missing.get(videos[0]) is None and missing._path_locks == {}
+        print("✅ 人脸分析索引只构建一次")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_face_index_light_imports():
+    """测试视频哈希: 导入 face_index 不加载 model_lib / onnxruntime"""
+    from lazy_imports import imported_modules
+
+    modules = imported_modules("face_index")
+    assert "file_hash" in modules
+    assert not {"model_lib", "onnxruntime"} & modules
+    print("✅ face_index 不依赖推理模块")
+
+
+if __name__ == "__main__":
+    test_face_index_roundtrip()
+    test_face_index_cache_builds_once()
+    test_face_index_light_imports()
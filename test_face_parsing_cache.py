@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试降分辨率 + 时间复用的人脸解析掩码
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def brightness_parse_fn(batch):
+    """按亮度分两类的 logits, 分辨率与输入相同"""
+    import numpy as np
+
+    gray = batch.mean(axis=1, keepdims=True)
+    return np.concatenate([-gray, gray], axis=1)
+
+
+def half_face():
+    import numpy as np
+
+    crop = np.zeros((128, 128, 3), np.uint8)
+    crop[:, 64:] = 255
+    landmarks = np.array([[40, 50], [88, 50], [64, 70], [46, 95], [82, 95]], np.float32)
+    return crop, landmarks
+
+
+def test_parsing_cache_reuse():
+    """测试解析缓存: 降分辨率解析, 关键点 / 嘴部不变时复用, 按帧号命中, 视频 LRU 淘汰"""
+    import numpy as np
+    from face_parsing_cache import CachedFaceParser, ParsingCacheConfig, mask_iou
+
+    crop, landmarks = half_face()
+    parser = CachedFaceParser(brightness_parse_fn, ParsingCacheConfig(input_size=64, max_reuse=3, max_videos=2))
+    mask = parser.parse(crop, landmarks, "a", 0)
+    assert mask.shape == (128, 128) and mask_iou((crop[..., 0] > 0).astype(np.uint8), mask) > 0.95
+    for index in range(1, 4):
+        assert parser.parse(crop, landmarks + 0.3, "a", index) is mask
+    assert parser.stats["parsed"] == 1
+    parser.parse(crop, landmarks, "a", 4)
+    assert parser.stats["parsed"] == 2
+    parser.parse(crop, landmarks + 5, "a", 5)
+    assert parser.stats["parsed"] == 3
+    assert parser.parse(crop, landmarks, "a", 0) is mask and parser.stats["frame_hits"] == 1
+    mouth = crop.copy()
+    mouth[90:100, 50:80] = 128
+    parser.parse(mouth, landmarks, "a", 6)
+    assert parser.stats["parsed"] == 4
+    parser.parse(crop, landmarks, "b", 0)
+    parser.parse(crop, landmarks, "c", 0)
+    assert list(parser._videos) == ["b", "c"]
+    print("✅ 解析缓存正常: 复用 {:.0%}".format(parser.get_stats()["reuse_ratio"]))
+
+
+def test_parsing_cache_threads():
+    """测试多线程: 并发任务的帧数 / 命中 / 解析计数不丢失, 每个视频的状态一致"""
+    import threading
+    import time
+    from face_parsing_cache import CachedFaceParser, ParsingCacheConfig
+
+    def slow_parse_fn(batch):
+        time.sleep(0.002)
+        return brightness_parse_fn(batch)
+
+    crop, landmarks = half_face()
+    parser = CachedFaceParser(slow_parse_fn, ParsingCacheConfig(input_size=32, max_reuse=4, max_videos=8))
+    barrier = threading.Barrier(6)
+
+    def job(video_id):
+        barrier.wait()
+        for index in range(50):
+            parser.parse(crop, landmarks + (index % 7) * 2.0, video_id, index % 10)
+
+    threads = [threading.Thread(target=job, args=("video{}".format(i % 3),)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = parser.get_stats()
+    assert stats["frames"] == 300
+    assert stats["parsed"] + stats["frame_hits"] + stats["temporal_hits"] == 300
+    assert sorted(parser._videos) == ["video0", "video1", "video2"]
+    print("✅ 解析缓存多线程计数一致: 解析 {} 次 / 300 帧".format(stats["parsed"]))
+
+
+def test_upsample_labels_and_iou():
+    """测试 logits 上采样取 argmax 与掩码 IoU"""
+    import numpy as np
+    from face_parsing_cache import mask_iou, upsample_labels
+
+    logits = np.zeros((3, 4, 4), np.float32)
+    logits[1, :, :2] = 1
+    logits[2, :, 2:] = 1
+    labels = upsample_labels(logits, 8, 8)
+    assert labels.dtype == np.uint8 and labels.shape == (8, 8)
+    assert (labels[:, :3] == 1).all() and (labels[:, 5:] == 2).all()
+    assert np.array_equal(upsample_labels(logits, 4, 4), logits.argmax(axis=0))
+
+    reference = np.zeros((4, 4), np.uint8)
+    reference[:, 2:] = 1
+    candidate = np.zeros((4, 4), np.uint8)
+    candidate[:, 3:] = 1
+    assert mask_iou(reference, reference) == 1.0
+    assert np.isclose(mask_iou(reference, candidate), (8 / 12.0 + 4 / 8.0) / 2)
+    print("✅ 标签上采样与 IoU 正常")
+
+
+def test_onnx_parse_fn_input_size():
+    """测试 onnx 解析函数: 动态尺寸模型按请求的分辨率推理, 固定尺寸模型回退到模型尺寸 (需要 model_lib)"""
+    import tempfile
+    import numpy as np
+    import pytest
+
+    pytest.importorskip("model_lib.base_wrapper.onnx_model")
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+    from face_parsing_cache import CachedFaceParser, ParsingCacheConfig, onnx_parse_fn
+
+    workdir = tempfile.mkdtemp()
+
+    def parsing_model(name, shape):
+        weight = np.random.default_rng(9).normal(size=(19, 3, 1, 1)).astype(np.float32)
+        graph = helper.make_graph(
+            [helper.make_node("Conv", ["input", "w"], ["logits"])], name,
+            [helper.make_tensor_value_info("input", TensorProto.FLOAT, shape)],
+            [helper.make_tensor_value_info("logits", TensorProto.FLOAT, None)],
+            [numpy_helper.from_array(weight, "w")])
+        model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+        model.ir_version = 8
+        path = os.path.join(workdir, name + ".onnx")
+        onnx.save(model, path)
+        return {"model_path": path, "graph_cache": False}
+
+    crop, landmarks = half_face()
+    dynamic_fn, size = onnx_parse_fn(parsing_model("dynamic", [1, 3, "h", "w"]), "cpu", input_size=64)
+    assert size == 64 and dynamic_fn(np.zeros((1, 3, 64, 64), np.float32)).shape == (1, 19, 64, 64)
+
+    static_fn, size = onnx_parse_fn(parsing_model("static", [1, 3, 96, 96]), "cpu", input_size=64)
+    assert size == 96
+    with pytest.raises(ValueError):
+        static_fn(np.zeros((1, 3, 64, 64), np.float32))
+    parser = CachedFaceParser(static_fn, ParsingCacheConfig(input_size=size))
+    assert parser.parse(crop, landmarks).shape == (128, 128)
+    print("✅ onnx 解析函数按模型输入选择分辨率")
+
+
+if __name__ == "__main__":
+    test_parsing_cache_reuse()
+    test_parsing_cache_threads()
+    test_upsample_labels_and_iou()
+    test_onnx_parse_fn_input_size()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试下半脸 ROI 人脸修复与时间复用
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_roi_restore_temporal_skip():
+    """测试 ROI 修复: 只融合下半脸, ROI 不变的帧跳过修复, 上半脸变化不触发修复"""
+    import numpy as np
+    from face_restore_roi import RoiRestoreConfig, RoiRestorer
+
+    calls = []
+
+    def restore_fn(face):
+        calls.append(1)
+        return 255 - face
+
+    restorer = RoiRestorer(restore_fn, RoiRestoreConfig(max_skip=5))
+    face = np.random.default_rng(0).integers(0, 255, (128, 128, 3), dtype=np.uint8)
+    x1, y1, x2, y2 = restorer.roi_box(128, 128)
+    outputs = [restorer.restore(face) for _ in range(4)]
+    assert len(calls) == 1
+    upper = face.copy()
+    upper[:y1] = 0
+    output = restorer.restore(upper)
+    assert len(calls) == 1 and np.array_equal(output[:y1], upper[:y1])
+    mouth = face.copy()
+    mouth[y1 + 20:y2 - 10, x1 + 20:x2 - 20] = 0
+    restorer.restore(mouth)
+    assert len(calls) == 2
+    assert np.array_equal(outputs[0][:y1], face[:y1]) and np.array_equal(outputs[0][:, :x1], face[:, :x1])
+    center = (y1 + y2) // 2, (x1 + x2) // 2
+    assert np.array_equal(outputs[0][center], 255 - face[center])
+    for _ in range(8):
+        restorer.restore(mouth)
+    stats = restorer.get_stats()
+    assert len(calls) == 3 and stats["skipped"] == 11 and 0 < stats["skip_ratio"] < 1
+    print("✅ ROI 修复与时间复用正常: 跳过 {:.0%}".format(stats["skip_ratio"]))
+
+
+def test_roi_restore_reset_and_size():
+    """测试 reset 与人脸尺寸变化: 新片段 / 新尺寸的第一帧总是修复, 掩码按尺寸缓存"""
+    import numpy as np
+    from face_restore_roi import RoiRestorer
+
+    calls = []
+
+    def restore_fn(face):
+        calls.append(face.shape)
+        return face // 2
+
+    restorer = RoiRestorer(restore_fn)
+    rng = np.random.default_rng(1)
+    small = rng.integers(0, 255, (96, 96, 3), dtype=np.uint8)
+    large = rng.integers(0, 255, (160, 160, 3), dtype=np.uint8)
+    restorer.restore(small)
+    restorer.restore(small)
+    restorer.restore(large)
+    assert calls == [small.shape, large.shape]
+    restorer.reset()
+    restorer.restore(large)
+    assert len(calls) == 3 and restorer.get_stats()["frames"] == 1
+    assert sorted(restorer._masks) == [(96, 96), (160, 160)]
+    print("✅ ROI 修复在新片段与新尺寸时重新修复")
+
+
+def test_feather_mask():
+    """测试羽化掩码: 中心为 1, 边缘线性过渡, open_bottom 时底边不过渡"""
+    import numpy as np
+    from face_restore_roi import feather_mask
+
+    mask = feather_mask(40, 60, 10)
+    assert mask.shape == (40, 60, 1) and mask.dtype == np.float32
+    assert mask[20, 30, 0] == 1.0 and mask[-1, 30, 0] == 1.0
+    assert np.allclose(mask[:10, 30, 0], (np.arange(10) + 0.5) / 10)
+    assert np.allclose(mask[20, :10, 0], mask[20, ::-1][:10, 0])
+    closed = feather_mask(40, 60, 10, open_bottom=False)
+    assert np.allclose(closed[:, 30, 0], closed[::-1, 30, 0]) and closed[-1, 30, 0] < 0.1
+    assert feather_mask(4, 4, 0)[1:, 1:3].min() == 1.0
+    print("✅ 羽化掩码正常")
+
+
+if __name__ == "__main__":
+    test_roi_restore_temporal_skip()
+    test_roi_restore_reset_and_size()
+    test_feather_mask()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试人脸检测跟踪: 每 N 帧检测, 光流跟踪, One Euro 平滑
+"""
+
+import math
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def synthetic_face_video(frames=80, size=(480, 640), seed=0):
+    """纹理人脸在背景上缓慢平移 / 缩放, 第 frames//2 帧切换背景; 返回 (帧列表, 人脸框 (T, 4), 关键点 (T, 5, 2))"""
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    height, width = size
+    backgrounds = [cv2.GaussianBlur(rng.integers(low, low + 128, (height, width, 3), dtype=np.uint8), (0, 0), 3)
+                   for low in (127, 0)]
+    face = cv2.GaussianBlur(rng.integers(0, 255, (160, 160, 3), dtype=np.uint8), (0, 0), 2)
+    face_kps = np.array([[52, 62], [108, 62], [80, 92], [58, 122], [102, 122]], dtype=np.float64)
+    video, boxes, kpss = [], [], []
+    for t in range(frames):
+        scale = 1.0 + 0.05 * math.sin(t / 40.0)
+        cx = width / 2 + 40 * math.sin(t / 30.0)
+        cy = height / 2 + 15 * math.sin(t / 23.0)
+        matrix = np.array([[scale, 0, cx - 80 * scale], [0, scale, cy - 80 * scale]])
+        frame = backgrounds[int(t >= frames // 2)].copy()
+        warped = cv2.warpAffine(face, matrix, (width, height))
+        mask = cv2.warpAffine(np.ones((160, 160), np.uint8), matrix, (width, height)).astype(bool)
+        frame[mask] = warped[mask]
+        video.append(frame)
+        boxes.append(np.array([0, 0, 160, 160]).reshape(2, 2) @ matrix[:, :2].T + matrix[:, 2])
+        kpss.append(face_kps @ matrix[:, :2].T + matrix[:, 2])
+    return video, np.array(boxes).reshape(-1, 4), np.array(kpss)
+
+
+class NoisyDetector:
+    """按帧号返回真实值 + 高斯噪声的检测结果, 与 SCRFD.detect 的输出格式相同"""
+
+    def __init__(self, boxes, kpss, noise=1.5, seed=0):
+        import numpy as np
+
+        self.boxes, self.kpss, self.noise = boxes, kpss, noise
+        self.rng = np.random.default_rng(seed)
+        self.index = 0
+
+    def __call__(self, frame):
+        import numpy as np
+
+        box = self.boxes[self.index] + self.rng.normal(0, self.noise, 4)
+        kps = self.kpss[self.index] + self.rng.normal(0, self.noise, (5, 2))
+        return np.concatenate([box, [0.9]])[None], kps[None]
+
+
+def test_face_tracker_detect_interval():
+    """测试检测跟踪: 每 N 帧检测一次, 镜头切换立即重新检测, 跟踪帧关键点误差小且抖动低于逐帧检测"""
+    import numpy as np
+    from face_tracker import FaceTracker, FaceTrackerConfig, landmark_jitter
+
+    video, boxes, kpss = synthetic_face_video(80)
+    eye_distance = np.linalg.norm(kpss[:, 1] - kpss[:, 0], axis=1).mean()
+    results = {}
+    for interval in (1, 5):
+        detector = NoisyDetector(boxes, kpss)
+        tracker = FaceTracker(detector, 25.0, FaceTrackerConfig(detect_interval=interval))
+        tracks = []
+        for index, frame in enumerate(video):
+            detector.index = index
+            tracks.append(tracker.update(frame))
+        results[interval] = (np.array([t.kps for t in tracks]), tracker.get_stats())
+
+    kps_tracked, stats = results[5]
+    assert stats["detect_reasons"]["scene_cut"] == 1
+    assert stats["detect_calls"] <= 80 // 5 + 2
+    assert np.linalg.norm(kps_tracked - kpss, axis=2).mean() / eye_distance < 0.06
+    assert landmark_jitter(kps_tracked) < landmark_jitter(results[1][0])
+    print("✅ 检测跟踪正常: 检测 {} 次 / 80 帧".format(stats["detect_calls"]))
+
+
+def test_face_tracker_no_face():
+    """测试无人脸: 检测不到时返回 None, 下一帧重新检测, 检测到后从检测结果开始跟踪"""
+    import numpy as np
+    from face_tracker import FaceTracker
+
+    video, boxes, kpss = synthetic_face_video(12)
+    detector = NoisyDetector(boxes, kpss, noise=0.0)
+    found = [False, False, True, True, True, True]
+
+    def detect(frame):
+        if not found[detector.index]:
+            return np.zeros((0, 5)), np.zeros((0, 5, 2))
+        return detector(frame)
+
+    tracker = FaceTracker(detect)
+    tracks = []
+    for index, frame in enumerate(video[:6]):
+        detector.index = index
+        tracks.append(tracker.update(frame))
+    assert tracks[0] is None and tracks[1] is None
+    assert tracks[2].source == "detect" and np.allclose(tracks[2].kps, kpss[2])
+    assert [t.source for t in tracks[3:]] == ["track"] * 3
+    assert tracker.get_stats()["detect_reasons"]["no_face"] == 3
+    print("✅ 无人脸时逐帧重新检测")
+
+
+def test_one_euro_filter_and_iou():
+    """测试 One Euro 滤波: 常量输入不变, 噪声被抑制, 阶跃逐步跟上; 人脸框 IoU"""
+    import numpy as np
+    from face_tracker import OneEuroFilter, box_iou, landmark_jitter
+
+    smoother = OneEuroFilter(min_cutoff=1.0, beta=0.0)
+    assert np.allclose([smoother(np.ones(3), 0.04) for _ in range(5)], 1.0)
+    noisy = 5.0 + np.random.default_rng(0).normal(0, 1, 200)
+    smoother.reset()
+    smoothed = np.array([smoother(np.array(x), 0.04) for x in noisy])
+    assert np.std(smoothed[50:]) < np.std(noisy[50:]) / 2
+
+    smoother.reset()
+    steps = [float(smoother(np.array(x), 0.04)) for x in [0.0] + [10.0] * 50]
+    assert 0 < steps[1] < 10 and np.all(np.diff(steps[1:]) >= 0) and steps[-1] > 9.5
+
+    assert np.allclose(box_iou(np.array([0, 0, 10, 10.0]), np.array([[0, 0, 10, 10], [5, 0, 15, 10.0]])),
+                       [1.0, 1 / 3.0])
+    line = np.cumsum(np.ones((10, 5, 2)), axis=0) + np.array([[0, 0], [10, 0], [5, 5], [2, 9], [8, 9]])
+    assert landmark_jitter(line) == 0.0
+    print("✅ One Euro 滤波与 IoU 正常")
+
+
+if __name__ == "__main__":
+    test_face_tracker_detect_interval()
+    test_face_tracker_no_face()
+    test_one_euro_filter_and_iou()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试内存映射特征存储 (landmark2face_wy/data/feature_store.py)
+"""
+
+import importlib.util
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _load_feature_store():
+    # landmark2face_wy.data 包导入时依赖 torch, 这里直接按文件加载模块
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "landmark2face_wy", "data", "feature_store.py")
+    spec = importlib.util.spec_from_file_location("feature_store", path)
+    module = sys.modules["feature_store"] = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _build_in_process(root, names, result_queue):
+    feature_store = _load_feature_store()
+    feature_store.ensure_feature_store(root, names)
+    result_queue.put(os.getpid())
+
+
+def test_feature_store_roundtrip():
+    """测试特征存储: 合并写入后内存映射读取与原 .npy 一致, 源文件更新后重建, pickle 后重新映射"""
+    import pickle
+    import shutil
+    import tempfile
+    import time
+    import numpy as np
+
+    feature_store = _load_feature_store()
+    root = tempfile.mkdtemp()
+    try:
+        rng = np.random.default_rng(0)
+        features = rng.normal(size=(37, 147)).astype(np.float32)
+        wenet = rng.normal(size=(20, 93, 256)).astype(np.float16)
+        np.save(os.path.join(root, "3dmm.npy"), features)
+        np.save(os.path.join(root, "audio_wenet_feature.npy"), wenet)
+
+        store = feature_store.FeatureStore(root, ["3dmm", "audio_wenet_feature"])
+        loaded, loaded_wenet = store.arrays()
+        assert isinstance(loaded, np.memmap) and np.array_equal(loaded, features)
+        assert np.array_equal(loaded_wenet, wenet) and loaded_wenet.dtype == np.float16
+        for info in store.index.values():
+            assert info["offset"] % 64 == 0
+        assert not [name for name in os.listdir(root) if name.endswith(".tmp")]
+
+        clone = pickle.loads(pickle.dumps(store))
+        assert clone._arrays is None and np.array_equal(clone["3dmm"], features)
+        assert np.array_equal(feature_store.FeatureStore(root, ["3dmm"], mmap=False)["3dmm"], features)
+
+        # 源 .npy 重新提取后重建
+        time.sleep(0.01)
+        np.save(os.path.join(root, "3dmm.npy"), features * 2)
+        assert np.array_equal(feature_store.FeatureStore(root, ["3dmm", "audio_wenet_feature"])["3dmm"], features * 2)
+        print("✅ 特征存储读写与重建正常")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def test_feature_store_concurrent_build():
+    """测试并发构建: 多个进程同时打开同一身份目录, 文件锁保证只构建一次且结果完整"""
+    import multiprocessing
+    import shutil
+    import tempfile
+    import numpy as np
+
+    root = tempfile.mkdtemp()
+    try:
+        features = np.arange(64 * 147, dtype=np.float32).reshape(64, 147)
+        np.save(os.path.join(root, "3dmm.npy"), features)
+        ctx = multiprocessing.get_context("fork")
+        result_queue = ctx.Queue()
+        workers = [ctx.Process(target=_build_in_process, args=(root, ["3dmm"], result_queue)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        pids = [result_queue.get(timeout=30) for _ in workers]
+        for worker in workers:
+            worker.join()
+        assert len(pids) == 4 and all(worker.exitcode == 0 for worker in workers)
+        assert not [name for name in os.listdir(root) if name.endswith(".tmp")]
+        assert np.array_equal(_load_feature_store().FeatureStore(root, ["3dmm"])["3dmm"], features)
+        print("✅ 特征存储并发构建正常")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_feature_store_roundtrip()
+    test_feature_store_concurrent_build()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试延迟导入: 入口模块导入时不加载重量级模块
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# 只在首次使用时导入的模块, 入口模块导入后不应出现在 sys.modules 中
+HEAVY_MODULES = {"cv2", "onnxruntime", "torch", "gradio", "requests", "flask", "librosa", "model_lib",
+                 "service.trans_dh_service"}
+
+
+def test_lazy_module_proxy():
+    """测试延迟导入代理: 首次访问属性时才导入, 已导入的模块直接复用"""
+    from lazy_imports import LazyModule, lazy_import
+
+    colorsys_proxy = LazyModule("colorsys")
+    assert "not loaded" in repr(colorsys_proxy)
+    assert colorsys_proxy.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+    assert "not loaded" not in repr(colorsys_proxy)
+    assert lazy_import("os") is os
+    print("✅ 延迟导入代理正常")
+
+
+def test_entry_modules_skip_heavy_imports():
+    """测试入口模块: 全新解释器中导入后, 重量级模块都没有被加载"""
+    from lazy_imports import imported_modules
+
+    checked = []
+    for target in ("pose_warp", "pose_render", "audio_motion_planner", "silence_fast_path", "app", "run"):
+        try:
+            modules = imported_modules(target)
+        except ImportError as e:
+            # app / run 依赖的 h_utils / y_utils 不在当前环境时跳过
+            print("⚠️ {}".format(e))
+            continue
+        assert target in modules
+        assert not HEAVY_MODULES & modules, "{} 导入了 {}".format(target, sorted(HEAVY_MODULES & modules))
+        checked.append(target)
+    assert "pose_warp" in checked and "silence_fast_path" in checked
+    print("✅ 入口模块未加载重量级模块: {}".format(checked))
+
+
+def test_parse_importtime():
+    """测试 -X importtime 解析: 累计耗时与按顶层包汇总"""
+    from lazy_imports import cold_import_time, import_breakdown, parse_importtime
+
+    stderr = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       100 |        100 |     numpy.core",
+        "import time:       300 |        400 |   numpy",
+        "import time:        50 |         50 |   colorsys",
+        "import time:       200 |        650 | pose_warp",
+    ])
+    records = parse_importtime(stderr)
+    assert [(r.name, r.depth) for r in records] == [("numpy.core", 2), ("numpy", 1), ("colorsys", 1),
+                                                     ("pose_warp", 0)]
+    assert cold_import_time(records, "pose_warp") == 0.00065
+    assert import_breakdown(records, top=2) == [("numpy", 0.0004, 2), ("pose_warp", 0.0002, 1)]
+    print("✅ 导入耗时解析正常")
+
+
+def test_import_budget():
+    """测试冷启动导入预算: 轻量入口模块在 [startup] 预算内; 超出预算或无法导入时检查失败"""
+    import pytest
+    from lazy_imports import check_import_budget, imported_modules, load_import_budgets
+
+    targets = ["pose_warp", "pose_render", "audio_motion_planner", "silence_fast_path"]
+    for target in ("app", "run"):
+        try:
+            imported_modules(target)
+        except ImportError as e:
+            # app / run 依赖的 h_utils / y_utils 不在当前环境时只检查其余入口
+            print("⚠️ {}".format(e))
+            continue
+        targets.append(target)
+    timings = check_import_budget(load_import_budgets(targets))
+    assert sorted(timings) == sorted(targets)
+
+    with pytest.raises(AssertionError, match="pose_warp"):
+        check_import_budget({"pose_warp": 1e-6})
+    with pytest.raises(AssertionError, match="未检查"):
+        check_import_budget({"pose_warp": 10.0, "no_such_entry_module": 10.0})
+    print("✅ 导入耗时在预算内: {}".format({k: round(v, 3) for k, v in timings.items()}))
+
+
+if __name__ == "__main__":
+    test_lazy_module_proxy()
+    test_entry_modules_skip_heavy_imports()
+    test_parse_importtime()
+    test_import_budget()
@@ -0,0 +1,564 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试 model_lib 的 onnx 封装 (需要 onnxruntime 与 onnx, 以及 base_wrapper/onnx_model.py)
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+pytest.importorskip("onnx")
+pytest.importorskip("model_lib.base_wrapper.onnx_model")
+
+
+def _conv_model(path, channels=4, flat_output=False):
+    """动态 (N, 3, H, W) 输入的 3x3 卷积; flat_output 时再输出一个无批次维的 (N*C*H*W, 1), 与 SCRFD 的输出类似"""
+    import numpy as np
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+
+    weight = np.random.default_rng(0).normal(size=(channels, 3, 3, 3)).astype(np.float32)
+    nodes = [helper.make_node("Conv", ["x", "w"], ["y"], pads=[1, 1, 1, 1])]
+    outputs = [helper.make_tensor_value_info("y", TensorProto.FLOAT, ["n", channels, "h", "w"])]
+    initializers = [numpy_helper.from_array(weight, "w")]
+    if flat_output:
+        initializers.append(numpy_helper.from_array(np.array([-1, 1], dtype=np.int64), "flat_shape"))
+        nodes.append(helper.make_node("Reshape", ["y", "flat_shape"], ["flat"]))
+        outputs.append(helper.make_tensor_value_info("flat", TensorProto.FLOAT, ["m", 1]))
+    graph = helper.make_graph(nodes, "conv", [helper.make_tensor_value_info("x", TensorProto.FLOAT,
+                                                                            ["n", 3, "h", "w"])],
+                              outputs, initializers)
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.save(model, path)
+    return path
+
+
+def _scrfd_model(path, size=160):
+    """batch 1 的小型 scrfd_*_bnkps 结构: 步长 8 / 16 / 32 各输出 score / bbox / kps, Reshape 目标以 1 开头"""
+    import numpy as np
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+
+    rng = np.random.default_rng(6)
+    nodes, initializers = [], []
+
+    def conv(x, cin, cout, stride, name, bias=0.0, relu=True):
+        weight = rng.normal(0, 1 / np.sqrt(cin * 9), (cout, cin, 3, 3)).astype(np.float32)
+        initializers.extend([numpy_helper.from_array(weight, name + "_w"),
+                             numpy_helper.from_array(np.full(cout, bias, np.float32), name + "_b")])
+        nodes.append(helper.make_node("Conv", [x, name + "_w", name + "_b"], [name], strides=[stride, stride],
+                                      pads=[1, 1, 1, 1]))
+        if not relu:
+            return name
+        nodes.append(helper.make_node("Relu", [name], [name + "_relu"]))
+        return name + "_relu"
+
+    x = conv(conv("input.1", 3, 8, 2, "c1"), 8, 8, 2, "c2")
+    features = {8: conv(x, 8, 16, 2, "c3")}
+    features[16] = conv(features[8], 16, 16, 2, "c4")
+    features[32] = conv(features[16], 16, 16, 2, "c5")
+    outputs = []
+    for kind, width in (("score", 1), ("bbox", 4), ("kps", 10)):
+        for stride in (8, 16, 32):
+            name = "{}_{}".format(kind, stride)
+            y = conv(features[stride], 16, 2 * width, 1, name + "_conv", -0.5 if kind == "score" else 0.5, False)
+            if kind == "score":
+                nodes.append(helper.make_node("Sigmoid", [y], [y + "_sigmoid"]))
+                y += "_sigmoid"
+            nodes.append(helper.make_node("Transpose", [y], [y + "_nhwc"], perm=[0, 2, 3, 1]))
+            initializers.append(numpy_helper.from_array(np.array([1, -1, width], np.int64), name + "_shape"))
+            nodes.append(helper.make_node("Reshape", [y + "_nhwc", name + "_shape"], [name]))
+            outputs.append(helper.make_tensor_value_info(name, TensorProto.FLOAT, None))
+    graph = helper.make_graph(nodes, "scrfd_toy", [helper.make_tensor_value_info(
+        "input.1", TensorProto.FLOAT, [1, 3, size, size])], outputs, initializers)
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.save(model, path)
+    return path
+
+
+def test_binding_model_outputs_not_aliased():
+    """测试 io_binding: 输出与 session.run 一致; 默认返回拷贝, 下一次 forward 不会改写已返回的结果"""
+    import numpy as np
+    from model_lib.base_wrapper import ONNXBindingModel, ONNXModel
+
+    workdir = tempfile.mkdtemp()
+    path = _conv_model(os.path.join(workdir, "conv.onnx"))
+    reference = ONNXModel(path, provider="cpu")
+    model = ONNXBindingModel(path, provider="cpu")
+    rng = np.random.default_rng(1)
+    inputs = [rng.random((2, 3, 16, 16), dtype=np.float32) for _ in range(3)]
+    results = [model.forward([x])[0] for x in inputs]
+    for x, result in zip(inputs, results):
+        assert np.allclose(result, reference.forward([x])[0], atol=1e-5)
+    assert model.get_latency_stats()["buffer_allocs"] == 2
+
+    # 显式关闭拷贝时返回的是池化缓冲区本身
+    aliased = ONNXBindingModel(path, provider="cpu", copy_outputs=False)
+    aliased.forward([inputs[0]])
+    first = aliased.forward([inputs[1]])[0]
+    second = aliased.forward([inputs[2]])[0]
+    assert first is second
+    print("✅ io_binding 输出正确且默认不复用缓冲区")
+
+
+def test_micro_batcher_split():
+    """测试 MicroBatcher: 并发请求合批后按请求切回; 无批次维的输出默认报错, 指定 split_flat 后切分正确"""
+    import threading
+    from types import SimpleNamespace
+
+    import numpy as np
+    from model_lib.base_wrapper import ONNXModel
+    from model_lib.micro_batcher import MicroBatcher, split_flat, split_rows
+
+    workdir = tempfile.mkdtemp()
+    model = ONNXModel(_conv_model(os.path.join(workdir, "conv.onnx"), flat_output=True), provider="cpu")
+    rng = np.random.default_rng(2)
+    inputs = [rng.random((rows, 3, 8, 8), dtype=np.float32) for rows in (1, 2, 3)]
+    expected = [model.forward([x]) for x in inputs]
+
+    batcher = MicroBatcher(SimpleNamespace(model=model), max_batch=8, max_delay_ms=200,
+                           split=[split_rows, split_flat])
+    results = [None] * len(inputs)
+    start = threading.Barrier(len(inputs))
+
+    def job(index):
+        start.wait()
+        results[index] = batcher.forward([inputs[index]])
+
+    threads = [threading.Thread(target=job, args=(i,)) for i in range(len(inputs))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    batcher.close()
+    for result, reference in zip(results, expected):
+        assert result[0].shape == reference[0].shape and result[1].shape == reference[1].shape
+        assert np.allclose(result[0], reference[0], atol=1e-5)
+        assert np.allclose(result[1], reference[1], atol=1e-5)
+    assert batcher.get_metrics()["requests"] == len(inputs)
+
+    # 默认按批次维切分, 无批次维的输出直接报错而不是返回错位的切片
+    batcher = MicroBatcher(SimpleNamespace(model=model), max_batch=8, max_delay_ms=0)
+    with pytest.raises(ValueError):
+        batcher.forward([inputs[1]])
+    batcher.close()
+    print("✅ MicroBatcher 输出切分正确")
+
+
+def test_micro_batcher_pad_and_metrics():
+    """测试 MicroBatcher: pow2 补齐不超过 max_batch; 工作线程写入指标时并发读取指标"""
+    import threading
+    from types import SimpleNamespace
+
+    import numpy as np
+    from model_lib.micro_batcher import MicroBatcher, _pad_rows
+
+    assert _pad_rows(9, 12, 'pow2') == 12
+    assert _pad_rows(5, 12, 'pow2') == 8
+    assert _pad_rows(20, 12, 'pow2') == 20
+    assert _pad_rows(3, 12, 'max') == 12 and _pad_rows(3, 12, None) == 3
+
+    calls = []
+    model = SimpleNamespace(forward=lambda inputs: calls.append(len(inputs[0])) or [inputs[0] * 2])
+    batcher = MicroBatcher(SimpleNamespace(model=model), max_batch=12, max_delay_ms=0, pad_to='pow2',
+                           metric_window=8)
+    assert np.array_equal(batcher.forward([np.ones((9, 2))])[0], np.full((9, 2), 2.0))
+    assert calls == [12]
+
+    done = threading.Event()
+    errors = []
+
+    def read_metrics():
+        while not done.is_set():
+            try:
+                batcher.get_metrics()
+            except Exception as e:
+                errors.append(e)
+                return
+
+    reader = threading.Thread(target=read_metrics)
+    reader.start()
+    for rows in range(1, 200):
+        batcher.forward([np.ones((rows % 12 + 1, 2))])
+    done.set()
+    reader.join()
+    batcher.close()
+    assert not errors
+    metrics = batcher.get_metrics()
+    assert metrics["requests"] == 200 and 0 < metrics["mean_batch_fill"] <= 1.0
+    print("✅ MicroBatcher 补齐与指标读取正常")
+
+
+def test_registry_readiness():
+    """测试 ModelRegistry: 加载并按批次预热后就绪; 空注册表与加载失败报错; 未开始加载时等待超时"""
+    from model_lib.model_registry import ModelRegistry
+
+    workdir = tempfile.mkdtemp()
+    path = _conv_model(os.path.join(workdir, "conv.onnx"))
+    registry = ModelRegistry(provider="cpu", batch_sizes=(4, 1))
+    registry.register("conv", {"model_path": path, "input_dynamic_shape": (1, 3, 16, 16)})
+    with pytest.raises(TimeoutError):
+        registry.wait_ready(0.01)
+    assert registry.start().wait_ready(60)
+    assert registry.get("conv").model.forward is not None
+    assert registry.timings["conv"]["warmup_shapes"] == [[[1, 3, 16, 16]], [[4, 3, 16, 16]]]
+    assert registry.health()["status"] == "ready"
+
+    empty = ModelRegistry(provider="cpu")
+    assert not empty.load()
+    with pytest.raises(RuntimeError):
+        empty.wait_ready(1)
+    assert empty.health()["status"] == "error"
+
+    broken = ModelRegistry(provider="cpu")
+    broken.register("missing", {"model_path": os.path.join(workdir, "missing.onnx")})
+    broken.start()
+    with pytest.raises(RuntimeError):
+        broken.get("missing")
+    print("✅ 模型注册表就绪状态正确")
+
+
+def test_graph_cache_single_session():
+    """测试优化图缓存: 冷启动只建一个会话并写入缓存, 热启动加载缓存, 输出一致且不留临时文件"""
+    import numpy as np
+    import onnxruntime
+    from model_lib.base_wrapper import ONNXSessionModel
+    from model_lib.base_wrapper.onnx_graph_cache import commit_optimized_model, get_optimized_model
+
+    workdir = tempfile.mkdtemp()
+    cache_dir = os.path.join(workdir, "ort")
+    path = _conv_model(os.path.join(workdir, "conv.onnx"))
+    sessions = []
+
+    class CountingSession(onnxruntime.InferenceSession):
+        def __init__(self, *args, **kwargs):
+            sessions.append(args[0])
+            super().__init__(*args, **kwargs)
+
+    x = np.random.default_rng(3).random((1, 3, 16, 16), dtype=np.float32)
+
+    session_path, options, status = get_optimized_model(path, "cpu", cache_dir=cache_dir)
+    assert status == "cold"
+    original, onnxruntime.InferenceSession = onnxruntime.InferenceSession, CountingSession
+    try:
+        cold = ONNXSessionModel(session_path, provider="cpu", session_options=options)
+    finally:
+        onnxruntime.InferenceSession = original
+    cached_path = commit_optimized_model(path, "cpu", cache_dir=cache_dir)
+    assert sessions == [path]
+    assert os.path.exists(cached_path)
+
+    session_path, options, status = get_optimized_model(path, "cpu", cache_dir=cache_dir)
+    assert status == "warm" and session_path == cached_path
+    warm = ONNXSessionModel(session_path, provider="cpu", session_options=options)
+    assert np.allclose(cold.forward([x])[0], warm.forward([x])[0], atol=1e-5)
+    assert sorted(os.listdir(cache_dir)) == sorted(["hashes.json", os.path.basename(cached_path)])
+    print("✅ 优化图缓存冷启动只建一个会话")
+
+
+def test_encrypted_model_roundtrip():
+    """测试模型加密: 头部记录填充长度, 解密结果直接建会话, 输出与明文模型一致; 错误密钥报错"""
+    pytest.importorskip("Crypto")
+    import numpy as np
+    from model_lib import ModelBase
+    from model_lib.base_wrapper import ONNXModel
+    from model_lib.base_wrapper.model_encrypt import encrypt_model, load_encrypt_model
+
+    workdir = tempfile.mkdtemp()
+    for channels in (1, 2, 3, 4):
+        path = _conv_model(os.path.join(workdir, "conv{}.onnx".format(channels)), channels=channels)
+        encrypted = encrypt_model(path, key="model key")
+        with open(path, "rb") as f:
+            plain = f.read()
+        model_bytes = load_encrypt_model(encrypted, key="model key")
+        assert isinstance(model_bytes, bytes) and model_bytes.startswith(plain)
+        assert (os.path.getsize(encrypted) - 16) % 16 == 0
+
+        model = ModelBase({"model_path": encrypted, "encrypt": "model key"}, "cpu")
+        x = np.random.default_rng(channels).random((1, 3, 8, 8), dtype=np.float32)
+        assert np.allclose(model.model.forward([x])[0], ONNXModel(path, provider="cpu").forward([x])[0], atol=1e-5)
+        with pytest.raises(ValueError):
+            load_encrypt_model(encrypted, key="other key")
+    with pytest.raises(ValueError):
+        load_encrypt_model(path, key="model key")
+    print("✅ 加密模型解密后直接加载")
+
+
+def test_encrypted_model_legacy_format():
+    """测试模型加密: 旧版 cv2box CVEncrypt 文件 (无头部, 文件名记录填充长度) 仍可解密加载; 未知版本号报错"""
+    pytest.importorskip("Crypto")
+    import struct
+    import numpy as np
+    from Crypto.Cipher import AES
+    from model_lib import ModelBase
+    from model_lib.base_wrapper import ONNXModel
+    from model_lib.base_wrapper.model_encrypt import ENCRYPT_MAGIC, encrypt_model, load_encrypt_model
+
+    workdir = tempfile.mkdtemp()
+    key = b"legacy".ljust(16, b" ")
+    for channels in (1, 2, 3):
+        path = _conv_model(os.path.join(workdir, "conv{}.onnx".format(channels)), channels=channels)
+        with open(path, "rb") as f:
+            plain = f.read()
+        # cv2box CVEncrypt.encrypt_file: 空格补齐到 16 字节, AES-ECB, 文件名 xxx_{pad_len}.bin
+        pad_len = -len(plain) % 16
+        legacy = os.path.join(workdir, "conv{}_{}.bin".format(channels, pad_len))
+        with open(legacy, "wb") as f:
+            f.write(AES.new(key, AES.MODE_ECB).encrypt(plain + b" " * pad_len))
+
+        assert load_encrypt_model(legacy, key="legacy") == plain
+        model = ModelBase({"model_path": legacy, "encrypt": "legacy"}, "cpu")
+        x = np.random.default_rng(channels).random((1, 3, 8, 8), dtype=np.float32)
+        assert np.allclose(model.model.forward([x])[0], ONNXModel(path, provider="cpu").forward([x])[0], atol=1e-5)
+        if pad_len:
+            with pytest.raises(ValueError):
+                load_encrypt_model(legacy, key="other key")
+
+    encrypted = encrypt_model(path, key="legacy")
+    with open(encrypted, "r+b") as f:
+        f.write(struct.pack("<8sI", ENCRYPT_MAGIC, 2))
+    with pytest.raises(ValueError):
+        load_encrypt_model(encrypted, key="legacy")
+    print("✅ 旧版加密模型兼容加载")
+
+
+def test_cpu_profile_session_options():
+    """测试 CPU 配置: 按权重分配线程与互不重叠的核心, 配置直接用于模型唯一的会话"""
+    import onnxruntime
+    from model_lib import model_base
+    from model_lib.base_wrapper.cpu_profile import CpuProfile, _parse_cores
+
+    assert _parse_cores("0-3, 6,8-9") == [0, 1, 2, 3, 6, 8, 9]
+    profile = CpuProfile(reserve_threads=0, model_threads={"scrfd": 1, "face_parsing": 2, "gfpgan": 3},
+                         pin_cores=list(range(6)))
+    assert profile.threads == 6
+    assert [profile.threads_for(name) for name in ("scrfd", "face_parsing", "gfpgan")] == [1, 2, 3]
+    assert profile.cores_for("scrfd", 1) == [0]
+    assert profile.cores_for("face_parsing", 2) == [1, 2]
+    assert profile.cores_for("gfpgan", 3) == [3, 4, 5]
+    options = profile.session_options("gfpgan")
+    assert options.intra_op_num_threads == 3
+    assert options.get_session_config_entry("session.intra_op_thread_affinities") == "5;6"
+    assert CpuProfile(threads=4, reserve_threads=0).threads_for("other") == 4
+
+    workdir = tempfile.mkdtemp()
+    path = _conv_model(os.path.join(workdir, "conv.onnx"))
+    sessions = []
+
+    class CountingSession(onnxruntime.InferenceSession):
+        def __init__(self, *args, **kwargs):
+            sessions.append(args[0])
+            super().__init__(*args, **kwargs)
+
+    original, onnxruntime.InferenceSession = onnxruntime.InferenceSession, CountingSession
+    model_base._cpu_profile = CpuProfile(threads=2, reserve_threads=0, model_threads={"conv": 1, "other": 1})
+    try:
+        model = model_base.ModelBase({"model_path": path, "name": "conv", "graph_cache": False}, "cpu")
+    finally:
+        onnxruntime.InferenceSession = original
+        model_base._cpu_profile = None
+    assert len(sessions) == 1
+    assert model.model.onnx_session.get_session_options().intra_op_num_threads == 1
+    print("✅ CPU 配置只建一个会话")
+
+
+def test_quantized_variants():
+    """测试量化版本: 未构建时回退 fp32; fp16 / int8 版本可由 ModelBase 加载且输出接近 fp32; 精度指标正确"""
+    import numpy as np
+    from model_lib import ModelBase
+    from model_lib.base_wrapper.onnx_quantize import (VideoCalibrationReader, build_fp16, build_int8_dynamic,
+                                                      build_int8_static, resolve_variant, variant_path)
+    from model_lib.quant_harness import box_iou, parsing_miou, restore_psnr
+
+    workdir = tempfile.mkdtemp()
+    path = _conv_model(os.path.join(workdir, "conv.onnx"))
+    assert variant_path(path, "fp16") == os.path.join(workdir, "conv_fp16.onnx")
+    with pytest.raises(ValueError):
+        variant_path(path, "int4")
+    assert resolve_variant(path, "fp16") == path
+    assert ModelBase({"model_path": path, "variant": "fp16", "graph_cache": False}, "cpu").variant == "fp32"
+
+    rng = np.random.default_rng(4)
+    tensors = [rng.random((1, 3, 16, 16), dtype=np.float32) for _ in range(4)]
+    assert build_fp16(path) == variant_path(path, "fp16")
+    assert build_int8_dynamic(path) == variant_path(path, "int8_dynamic")
+    assert build_int8_static(path, VideoCalibrationReader("x", tensors)) == variant_path(path, "int8_static")
+
+    reference = ModelBase({"model_path": path, "graph_cache": False}, "cpu").model.forward([tensors[0]])[0]
+    scale = np.abs(reference).max()
+    for variant, tolerance in (("fp16", 0.01), ("int8_dynamic", 0.1), ("int8_static", 0.1)):
+        model = ModelBase({"model_path": path, "variant": variant, "graph_cache": False}, "cpu")
+        assert model.variant == variant and model.model_path == variant_path(path, variant)
+        output = model.model.forward([tensors[0]])[0]
+        assert output.dtype == np.float32 and np.abs(output - reference).max() < tolerance * scale, variant
+
+    labels = rng.random((1, 1, 5, 8, 8))
+    assert parsing_miou(labels, labels) == 1.0
+    assert restore_psnr(labels, labels) == float("inf")
+    assert restore_psnr(labels, [labels[0] + 0.1]) < 30
+    iou = box_iou(np.array([[0, 0, 10, 10]], dtype=np.float32), np.array([[0, 0, 10, 10], [5, 0, 15, 10]],
+                                                                          dtype=np.float32))
+    assert np.allclose(iou, [[1.0, 1 / 3.0]], atol=1e-6)
+    print("✅ 量化版本加载与精度指标正确")
+
+
+def test_shared_memory_segments():
+    """测试共享内存段: 64 字节对齐布局, 批次变大时换更大的段, 对端按名字重新挂载"""
+    import numpy as np
+    from model_lib.base_wrapper.onnx_process_pool import _Attached, _layout, _Segment
+
+    arrays = [np.arange(5, dtype=np.float32), np.ones((2, 3), dtype=np.int64)]
+    specs, nbytes = _layout(arrays)
+    assert [offset for _, _, offset in specs] == [0, 64] and nbytes == 128
+
+    segment, attached = _Segment(), _Attached()
+    try:
+        name, specs = segment.write(arrays)
+        views = attached.views(name, specs)
+        assert all(np.array_equal(view, array) for view, array in zip(views, arrays))
+        del views
+        assert segment.write([arrays[0] * 2])[0] == name
+        bigger = [np.zeros((64, 64), dtype=np.float32)]
+        new_name, specs = segment.write(bigger)
+        assert new_name != name
+        assert np.array_equal(attached.views(new_name, specs)[0], bigger[0])
+    finally:
+        attached.close()
+        segment.release()
+    print("✅ 共享内存段布局与重新挂载正确")
+
+
+def test_process_pool():
+    """测试进程池: forward 按行拆分与单会话一致, map 保持顺序; 提前停止的 map 不会占住进程池; 错误可恢复"""
+    import threading
+
+    import numpy as np
+    from model_lib.base_wrapper import ONNXModel, ONNXProcessPool
+
+    workdir = tempfile.mkdtemp()
+    path = _conv_model(os.path.join(workdir, "conv.onnx"))
+    reference = ONNXModel(path, provider="cpu")
+    rng = np.random.default_rng(5)
+    batches = [rng.random((rows, 3, 8, 8), dtype=np.float32) for rows in (5, 1, 3, 2, 4)]
+
+    with ONNXProcessPool(path, workers=2) as pool:
+        assert pool.splittable and pool.input_name == reference.input_name
+        output = pool.forward([batches[0]])[0]
+        assert np.allclose(output, reference.forward([batches[0]])[0], atol=1e-5)
+        for batch, result in zip(batches, pool.map([batch] for batch in batches)):
+            assert np.allclose(result[0], reference.forward([batch])[0], atol=1e-5)
+
+        # 消费者中途停止, 其他调用方仍可使用进程池
+        results = pool.map([batch] for batch in batches)
+        next(results)
+        done = []
+        caller = threading.Thread(target=lambda: done.append(pool.forward([batches[1]])))
+        caller.start()
+        caller.join(30)
+        assert done and np.allclose(done[0][0], reference.forward([batches[1]])[0], atol=1e-5)
+        results.close()
+
+        with pytest.raises(RuntimeError):
+            pool.forward([np.zeros((2, 4, 8, 8), dtype=np.float32)])
+        with pytest.raises(RuntimeError):
+            list(pool.map([[batches[1]], [np.zeros((1, 4, 8, 8), dtype=np.float32)], [batches[2]]]))
+        assert np.allclose(pool.forward([batches[2]])[0], reference.forward([batches[2]])[0], atol=1e-5)
+    print("✅ 进程池输出与单会话一致")
+
+
+def test_scrfd_batch_parity():
+    """测试批量 SCRFD: 生成动态批次副本, 批量预处理 / 解码与逐帧路径一致, 批次超过 max_batch 时分段运行"""
+    import cv2
+    import numpy as np
+    from model_lib import ModelBase, SCRFDBatch
+    from model_lib.base_wrapper.onnx_quantize import preprocess_scrfd
+    from model_lib.quant_harness import decode_scrfd
+
+    workdir = tempfile.mkdtemp()
+    path = _scrfd_model(os.path.join(workdir, "scrfd.onnx"))
+    rng = np.random.default_rng(7)
+    frames = [cv2.GaussianBlur(rng.integers(0, 255, (h, w, 3), dtype=np.uint8), (0, 0), 2)
+              for h, w in ((120, 200), (160, 160), (200, 90), (120, 200), (100, 100))]
+
+    detector = SCRFDBatch({"model_path": path, "graph_cache": False}, "cpu", size=160, max_batch=2, threshold=0.4)
+    assert detector.dynamic_batch and detector.model_path.endswith("scrfd_dynbatch.onnx")
+    blob, scales = detector.preprocess(frames[:2])
+    for index in range(2):
+        assert np.allclose(blob[index:index + 1], preprocess_scrfd(frames[index], 160), atol=1e-6)
+
+    reference = ModelBase({"model_path": path, "graph_cache": False}, "cpu")
+    results = detector.detect(frames)
+    assert len(results) == len(frames)
+    detections = 0
+    for frame, (dets, kps) in zip(frames, results):
+        scale = min(160.0 / frame.shape[0], 160.0 / frame.shape[1])
+        expected = decode_scrfd(reference.model.forward([preprocess_scrfd(frame, 160)]), size=160, threshold=0.4)
+        assert dets.shape == (len(expected), 5) and kps.shape == (len(expected), 5, 2)
+        order = np.lexsort(dets.T[::-1])
+        expected = expected[np.lexsort(expected.T[::-1])]
+        assert np.allclose(dets[order, :4], expected[:, :4] / scale, atol=1e-3)
+        assert np.allclose(dets[order, 4], expected[:, 4], atol=1e-5)
+        detections += len(dets)
+    assert detections > 0
+    print("✅ 批量 SCRFD 与逐帧检测一致: {} 个检测框".format(detections))
+
+
+def test_scrfd_batch_threads():
+    """测试批量 SCRFD 多线程: 每个线程使用自己的预处理缓冲区, 并发检测结果与单线程一致"""
+    import threading
+
+    import cv2
+    import numpy as np
+    from model_lib import SCRFDBatch
+
+    workdir = tempfile.mkdtemp()
+    path = _scrfd_model(os.path.join(workdir, "scrfd.onnx"))
+    rng = np.random.default_rng(8)
+    jobs = [[cv2.GaussianBlur(rng.integers(0, 255, (h, 160, 3), dtype=np.uint8), (0, 0), 2) for _ in range(3)]
+            for h in (80, 120, 160, 140)]
+    detector = SCRFDBatch({"model_path": path, "graph_cache": False}, "cpu", size=160, max_batch=3, threshold=0.4)
+    expected = [detector.detect(frames) for frames in jobs]
+
+    barrier = threading.Barrier(len(jobs))
+    results, buffers = {}, {}
+
+    def job(index):
+        barrier.wait()
+        for _ in range(5):
+            results.setdefault(index, []).append(detector.detect(jobs[index]))
+        buffers[index] = detector._thread_buffers().blob
+
+    threads = [threading.Thread(target=job, args=(index,)) for index in range(len(jobs))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(blob) for blob in buffers.values()}) == len(jobs)
+    for index, runs in results.items():
+        for run in runs:
+            for (dets, kps), (ref_dets, ref_kps) in zip(run, expected[index]):
+                assert np.array_equal(dets, ref_dets) and np.array_equal(kps, ref_kps)
+    print("✅ 批量 SCRFD 多线程检测结果一致")
+
+
+if __name__ == "__main__":
+    test_binding_model_outputs_not_aliased()
+    test_micro_batcher_split()
+    test_micro_batcher_pad_and_metrics()
+    test_registry_readiness()
+    test_graph_cache_single_session()
+    test_encrypted_model_roundtrip()
+    test_encrypted_model_legacy_format()
+    test_cpu_profile_session_options()
+    test_quantized_variants()
+    test_shared_memory_segments()
+    test_process_pool()
+    test_scrfd_batch_parity()
+    test_scrfd_batch_threads()
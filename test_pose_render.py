@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试视频写入阶段的头部姿态贴图 (pose_render.py)
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_pose_stream_matches_received_batches():
+    """测试姿态流: 按收到的帧数取姿态, 拼接结果与整段生成一致, 音频结束后补零"""
+    import numpy as np
+    from pose_render import PoseStream
+    from simple_motion_controller import SimpleMotionController
+
+    controller = SimpleMotionController(seed=4)
+    duration, fps = 12.0, 25
+    expected = controller.get_pose_sequence(duration, fps)
+    stream = PoseStream(controller, duration, fps, chunk_frames=16)
+    sizes = [4, 1, 7, 4, 33, 2] * 10
+    poses = [stream.take(size) for size in sizes]
+    assert [len(p) for p in poses] == sizes
+    poses = np.concatenate(poses)
+    assert np.array_equal(poses[:len(expected)], expected)
+    assert not poses[len(expected):].any() and stream.frames == sum(sizes)
+    print("✅ 姿态流按批次大小取姿态正常")
+
+
+def test_pose_job_roi_refresh_and_switch():
+    """测试姿态任务: 头部区域按间隔重新检测, 检测失败沿用上次区域; 配置关闭时不登记任务"""
+    import numpy as np
+    import pose_render
+    from pose_render import PoseJob, PoseRenderConfig, PoseStream
+    from pose_warp import PoseWarper
+    from simple_motion_controller import SimpleMotionConfig, SimpleMotionController
+
+    controller = SimpleMotionController(SimpleMotionConfig(motion_weights={'nod': 1.0}), seed=1)
+    detections = []
+
+    def detect_fn(frame, expand):
+        detections.append(1)
+        return (40, 40, 200, 220) if len(detections) != 2 else None
+
+    config = PoseRenderConfig(enable=True, roi_interval=8)
+    job = PoseJob(PoseStream(controller, 4.0, 25), PoseWarper(), config, detect_fn)
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (256, 256, 3), dtype=np.uint8) for _ in range(4)]
+    for _ in range(6):
+        job.apply([frame.copy() for frame in frames])
+    assert len(detections) == 3 and job.roi == (40, 40, 200, 220)
+    assert job.get_stats()["frames_warped"] == 24
+
+    assert not pose_render.register_job("w0", controller, 4.0, 25, PoseRenderConfig(enable=False))
+    assert pose_render.open_job("w0") is None
+    assert pose_render.register_job("w1", controller, 4.0, 25, config)
+    assert isinstance(pose_render.open_job("w1"), PoseJob)
+    pose_render.release_job("w1")
+    assert pose_render.open_job("w1") is None
+    print("✅ 姿态任务头部区域刷新与开关正常")
+
+
+if __name__ == "__main__":
+    test_pose_stream_matches_received_batches()
+    test_pose_job_roi_refresh_and_switch()
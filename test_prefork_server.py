@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试预派生服务: 模块预导入, 工作进程派生 / 重启 / 停止, 内存报告
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_preload_and_memory_report():
+    """测试模块预导入跳过当前环境没有的模块, 内存报告包含每个进程"""
+    from prefork_server import format_memory_report, memory_report, preload_modules
+
+    assert preload_modules(["colorsys", "no_such_module_for_prefork"]) == ["colorsys"]
+    rows = memory_report([os.getpid()])
+    assert len(rows) == 1 and rows[0]["pid"] == os.getpid()
+    assert rows[0]["rss_mb"] > 0 and rows[0]["uss_mb"] <= rows[0]["rss_mb"]
+    report = format_memory_report(rows)
+    assert str(os.getpid()) in report and "合计" in report
+    print("✅ 预导入与内存报告正常")
+
+
+def test_prefork_workers_restart_and_stop():
+    """测试工作进程: 每个序号派生一次, 退出后按原序号重启, 收到 SIGTERM 后全部停止"""
+    import gc
+    import signal
+    import tempfile
+    from prefork_server import PreforkConfig, PreforkServer
+
+    log_path = os.path.join(tempfile.mkdtemp(), "workers.log")
+
+    def worker_main(index):
+        with open(log_path, "a") as f:
+            f.write("{}\n".format(index))
+        with open(log_path) as f:
+            started = len(f.read().split())
+        # 每个序号重启一次后通知父进程停止
+        if started >= 4:
+            os.kill(os.getppid(), signal.SIGTERM)
+            signal.pause()
+
+    handlers = {signum: signal.getsignal(signum) for signum in (signal.SIGTERM, signal.SIGINT)}
+    server = PreforkServer(worker_main, PreforkConfig(workers=2, preload_modules=("colorsys",), restart=True,
+                                                      restart_backoff=0.05))
+    try:
+        server.serve()
+    finally:
+        gc.unfreeze()
+        for signum, handler in handlers.items():
+            signal.signal(signum, handler)
+    with open(log_path) as f:
+        started = [int(line) for line in f.read().split()]
+    assert server.modules == ["colorsys"]
+    assert not server.workers
+    assert set(started) == {0, 1} and len(started) >= 4
+    print("✅ 工作进程派生 / 重启 / 停止正常: {}".format(started))
+
+
+def test_prefork_restart_backoff():
+    """测试工作进程重启: 连续退出时等待时间按指数增长, 超过重启次数上限后不再重启"""
+    import gc
+    import signal
+    import tempfile
+    import time
+    from prefork_server import PreforkConfig, PreforkServer
+
+    log_path = os.path.join(tempfile.mkdtemp(), "starts.log")
+
+    def worker_main(index):
+        with open(log_path, "a") as f:
+            f.write("{} {}\n".format(index, time.time()))
+
+    config = PreforkConfig(workers=1, preload_modules=(), restart=True, restart_backoff=0.1,
+                           restart_backoff_max=10.0, max_restarts=3)
+    handlers = {signum: signal.getsignal(signum) for signum in (signal.SIGTERM, signal.SIGINT)}
+    server = PreforkServer(worker_main, config)
+    try:
+        server.serve()
+    finally:
+        gc.unfreeze()
+        for signum, handler in handlers.items():
+            signal.signal(signum, handler)
+    with open(log_path) as f:
+        starts = [float(line.split()[1]) for line in f.read().splitlines()]
+    gaps = [b - a for a, b in zip(starts, starts[1:])]
+    assert len(starts) == 4 and server.restarts == {0: 3}
+    assert gaps[0] >= 0.1 and gaps[1] >= 0.2 and gaps[2] >= 0.4
+    assert not server.workers
+    print("✅ 工作进程指数退避重启, 超过上限后停止: {}".format([round(g, 2) for g in gaps]))
+
+
+if __name__ == "__main__":
+    test_preload_and_memory_report()
+    test_prefork_workers_restart_and_stop()
+    test_prefork_restart_backoff()
@@ -43,8 +43,269 @@ def test_random_motion_integration():
         print(f"❌ 测试失败: {e}")
         return False
 
+def test_pose_sequence_vectorized_parity():
+    """向量化姿态序列与逐帧实现结果一致"""
+    import numpy as np
+    from simple_motion_controller import SimpleMotionController, SimpleMotionConfig
+
+    config = SimpleMotionConfig(motion_weights={'still': 0.3, 'nod': 0.4, 'tilt': 0.3})
+    controller = SimpleMotionController(config, seed=0)
+    for duration in (0.5, 8.0, 60.0):
+        timeline = controller.generate_motion_timeline(duration)
+        for fps in (25, 30, 60):
+            expected = controller._generate_pose_sequence_loop(timeline, duration, fps)
+            actual = controller.generate_pose_sequence(timeline, duration, fps)
+            assert actual.shape == expected.shape
+            assert np.array_equal(actual, expected), f"duration={duration} fps={fps}"
+
+    # 段边界恰好落在帧时刻上时归属前一段
+    timeline = [
+        {'id': 0, 'type': 'tilt', 'name': '倾斜', 'start_time': 0.0, 'end_time': 1.0, 'duration': 1.0,
+         'params': {'type': 'tilt', 'head_pose': {'pitch': 0, 'yaw': 0, 'roll': 5.0,
+                                                  'amplitude': 5.0, 'direction': 1}}},
+        {'id': 1, 'type': 'nod', 'name': '点头', 'start_time': 1.0, 'end_time': 2.0, 'duration': 1.0,
+         'params': {'type': 'nod', 'head_pose': {'pitch': 6.0, 'yaw': 0, 'roll': 0,
+                                                 'amplitude': 6.0, 'frequency': 0.8}}},
+    ]
+    expected = controller._generate_pose_sequence_loop(timeline, 3.0, 25)
+    actual = controller.generate_pose_sequence(timeline, 3.0, 25)
+    assert np.array_equal(actual, expected)
+    assert actual[25, 2] == 5.0
+    print("✅ 向量化姿态序列与逐帧实现一致")
+
+
+def test_motion_timeline_array():
+    """数组时间线与字典时间线等价, 并可二进制往返"""
+    import pickle
+    import numpy as np
+    from simple_motion_controller import SimpleMotionController, MotionTimeline
+
+    controller = SimpleMotionController(seed=1)
+    timeline = controller.generate_timeline_array(120.0)
+    assert controller.generate_motion_timeline(120.0) == timeline.to_dicts()
+
+    restored = MotionTimeline.frombytes(timeline.tobytes())
+    assert restored.to_dicts() == timeline.to_dicts()
+    assert pickle.loads(pickle.dumps(timeline)).to_dicts() == timeline.to_dicts()
+
+    dict_timeline = timeline.to_dicts()
+    for time_point in np.linspace(0.0, 121.0, 997).tolist() + [m['start_time'] for m in dict_timeline]:
+        assert controller.get_pose_at_time(timeline, time_point) == \
+            controller.get_pose_at_time(dict_timeline, time_point)
+    print(f"✅ 数组时间线: {len(timeline)}个动作段, {len(timeline.tobytes())}字节")
+
+
+def test_empty_duration():
+    """时长为0时返回空时间线 / 空姿态序列"""
+    from simple_motion_controller import SimpleMotionController
+
+    controller = SimpleMotionController(seed=3)
+    assert controller.generate_motion_timeline(0) == []
+    assert len(controller.generate_timeline_array(-1.0)) == 0
+    assert controller.get_pose_sequence(0.0, 25).shape == (0, 3)
+    assert list(controller.iter_pose_batches(0.0, 25, 4)) == []
+    print("✅ 空时长时间线正常")
+
+
+def test_motion_timeline_from_dicts_roundtrip():
+    """字典时间线转回数组时间线: 点头方向 / 频率, 倾斜角度都不丢失"""
+    import numpy as np
+    from simple_motion_controller import SimpleMotionController, SimpleMotionConfig, MotionTimeline
+
+    config = SimpleMotionConfig(motion_weights={'still': 0.2, 'nod': 0.5, 'tilt': 0.3})
+    controller = SimpleMotionController(config, seed=5)
+    timeline = controller.generate_timeline_array(300.0)
+    restored = MotionTimeline.from_dicts(timeline.to_dicts())
+    assert restored.to_dicts() == timeline.to_dicts()
+    assert np.array_equal(restored.segments, timeline.segments)
+    nods = [m for m in restored if m['type'] == 'nod']
+    assert {np.sign(m['params']['head_pose']['pitch']) for m in nods} == {-1.0, 1.0}
+    print(f"✅ 字典时间线往返: {len(nods)}段点头方向保留")
+
+
+def test_pose_batch_stream():
+    """按批次流式生成的姿态与整段生成一致"""
+    import numpy as np
+    from simple_motion_controller import SimpleMotionController
+
+    controller = SimpleMotionController(seed=2)
+    for duration, fps, batch_size in [(600.0, 25, 4), (37.3, 30, 7), (5.0, 60, 1)]:
+        expected = controller.generate_pose_sequence(controller.generate_timeline_array(duration), duration, fps)
+        batches = list(controller.iter_pose_batches(duration, fps, batch_size))
+        assert all(len(batch) == batch_size for batch in batches[:-1])
+        assert np.array_equal(np.concatenate(batches), expected)
+    print("✅ 流式姿态批次与整段生成一致")
+
+
+def test_job_seed_per_job():
+    """同一主机上先后创建的任务得到不同的随机种子, 同一任务ID种子不变"""
+    import uuid
+    from simple_motion_controller import SimpleMotionController, job_seed
+
+    work_ids = [str(uuid.uuid1()) for _ in range(64)]
+    seeds = [job_seed(work_id) for work_id in work_ids]
+    assert len(set(seeds)) == len(seeds)
+    assert all(0 <= seed < 2 ** 32 for seed in seeds)
+    assert job_seed(work_ids[0]) == seeds[0]
+    first, second = (SimpleMotionController(seed=seed) for seed in seeds[:2])
+    assert first.generate_motion_timeline(60.0) != second.generate_motion_timeline(60.0)
+    print("✅ 每个任务的随机种子不同")
+
+
+def test_seeded_motion_and_pose_cache():
+    """相同配置和种子生成相同动作, 姿态序列命中缓存"""
+    import numpy as np
+    from simple_motion_controller import SimpleMotionController, SimpleMotionConfig
+
+    config = SimpleMotionConfig(motion_weights={'still': 0.4, 'nod': 0.35, 'tilt': 0.25})
+    first = SimpleMotionController(config, seed=42)
+    second = SimpleMotionController(SimpleMotionConfig(motion_weights={'still': 0.4, 'nod': 0.35, 'tilt': 0.25}),
+                                    seed=42)
+    assert first.generate_motion_timeline(300.0) == second.generate_motion_timeline(300.0)
+    assert first.generate_motion_timeline(300.0) != SimpleMotionController(config, seed=43).generate_motion_timeline(300.0)
+
+    # 时间线前缀与总时长无关
+    short = first.generate_motion_timeline(60.0)
+    long = first.generate_motion_timeline(600.0)
+    assert [m['type'] for m in short[:-1]] == [m['type'] for m in long[:len(short) - 1]]
+
+    poses = first.get_pose_sequence(30.0, 25)
+    assert second.get_pose_sequence(30.0, 25) is poses
+    assert not poses.flags.writeable
+    assert np.array_equal(poses, first.generate_pose_sequence(first.generate_timeline_array(30.0), 30.0, 25))
+    print("✅ 种子复现与姿态缓存正常")
+
+
+def test_audio_driven_motion():
+    """测试音频驱动动作: 重音处点头, 停顿处静止"""
+    import numpy as np
+    from audio_motion_planner import AudioMotionPlanner
+
+    fps = 25
+    t = np.arange(10 * fps) / fps
+    # 2秒一个重音, 6-8秒停顿
+    energy_db = -20.0 + 16.0 * np.exp(-((t % 2.0) - 1.0) ** 2 / 0.02)
+    energy_db[(t >= 6.0) & (t < 8.0)] = -60.0
+    energy_db -= energy_db.max()
+
+    planner = AudioMotionPlanner(energy_db, fps, seed=0)
+    poses = planner.generate_pose_sequence(10.0, fps)
+    assert poses.shape == (250, 3)
+    assert list(planner.peak_frames) == [25, 75, 125, 225]
+    assert np.argmax(poses[:50, 0]) in (24, 25)
+    assert np.all(poses[150:200] == 0)
+    assert np.all(poses[:, 1:] == 0)
+    batches = list(planner.iter_pose_batches(10.0, fps, batch_size=4))
+    assert np.array_equal(np.concatenate(batches), poses)
+
+    print("✅ 音频驱动动作规划正常")
+
+
+def test_audio_driven_motion_short_input():
+    """测试音频驱动动作: 帧数少于点头时长时姿态序列仍与能量等长"""
+    import numpy as np
+    from audio_motion_planner import AudioMotionPlanner
+
+    energy_db = np.full(10, -20.0)
+    energy_db[5] = 0.0
+    planner = AudioMotionPlanner(energy_db, 25, seed=0)
+    assert planner.head_poses.shape == (10, 3)
+    assert planner.generate_pose_sequence(0.4, 25).shape == (10, 3)
+    print("✅ 短音频驱动动作正常")
+
+
+def test_pose_warp_roi_cache():
+    """测试头部姿态贴图: 只改动人脸区域, 量化姿态命中映射表缓存"""
+    import numpy as np
+    from pose_warp import PoseWarper
+
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, (320, 240, 3), dtype=np.uint8)
+    roi = (60, 40, 180, 200)
+    warper = PoseWarper()
+
+    assert np.array_equal(warper.apply(frame.copy(), [0.1, 0.0, -0.2], roi), frame)
+
+    warped = warper.apply(frame.copy(), [6.0, 0.0, 3.0], roi)
+    outside = np.ones(frame.shape[:2], dtype=bool)
+    outside[40:200, 60:180] = False
+    assert np.array_equal(warped[outside], frame[outside])
+    assert not np.array_equal(warped[40:200, 60:180], frame[40:200, 60:180])
+    # 羽化边缘保持原值
+    assert np.array_equal(warped[40, 60:180], frame[40, 60:180])
+
+    warper.apply(frame.copy(), [6.1, 0.1, 2.9], roi)
+    stats = warper.get_stats()
+    assert stats['cache_misses'] == 1 and stats['cache_hits'] == 1
+    print("✅ 头部姿态贴图与映射表缓存正常")
+
+
+def test_face_cascade_cached():
+    """测试头部区域检测: 人脸检测器每个线程只加载一次"""
+    import threading
+    import numpy as np
+    import pytest
+    cv2 = pytest.importorskip("cv2")
+    if not hasattr(cv2, "CascadeClassifier"):
+        pytest.skip("cv2 without CascadeClassifier")
+    from pose_warp import _face_cascade, detect_face_roi
+
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    assert detect_face_roi(frame) is None and detect_face_roi(frame) is None
+    cascade = _face_cascade()
+    assert _face_cascade() is cascade
+
+    others = []
+    thread = threading.Thread(target=lambda: others.append(_face_cascade()))
+    thread.start()
+    thread.join()
+    assert others[0] is not cascade
+    print("✅ 人脸检测器按线程缓存")
+
+
+def test_fused_paste_parity():
+    """测试合并仿射贴回: 与整帧贴回后再做姿态变形的结果一致 (容差内)"""
+    import cv2
+    import numpy as np
+    from pose_warp import PoseWarper, expand_roi, paste_back
+
+    rng = np.random.default_rng(0)
+    frame = cv2.GaussianBlur(rng.integers(0, 255, (480, 360, 3), dtype=np.uint8), (0, 0), 4)
+    face = cv2.GaussianBlur(rng.integers(0, 255, (256, 256, 3), dtype=np.uint8), (0, 0), 4)
+    box = (100, 120, 260, 300)
+    roi = expand_roi(box, frame.shape[:2], 0.35)
+    angle = np.radians(4.0)
+    scale = 256 / 160.0
+    align_matrix = scale * np.array([[np.cos(angle), np.sin(angle), 0], [-np.sin(angle), np.cos(angle), 0]])
+    align_matrix[:, 2] = -align_matrix[:, :2] @ np.array([box[0], box[1] + 10])
+
+    warper = PoseWarper()
+    face_mask = warper.get_face_mask(face.shape[:2])
+    for pose in ([0.0, 0.0, 0.0], [6.0, 0.0, 0.0], [4.0, 2.0, -5.0]):
+        expected = warper.apply(paste_back(frame.copy(), face, align_matrix, face_mask), pose, roi)
+        actual = warper.paste_face(frame.copy(), face, align_matrix, pose, roi, face_mask)
+        diff = np.abs(actual.astype(np.int16) - expected.astype(np.int16))
+        assert diff.mean() < 0.5 and np.percentile(diff, 99.9) <= 4, f"pose={pose} mean={diff.mean()}"
+        outside = np.ones(frame.shape[:2], dtype=bool)
+        outside[roi[1]:roi[3], roi[0]:roi[2]] = False
+        assert np.array_equal(actual[outside], frame[outside])
+    print("✅ 合并仿射贴回与两步流程一致")
+
+
 if __name__ == "__main__":
     success = test_random_motion_integration()
+    test_pose_sequence_vectorized_parity()
+    test_motion_timeline_array()
+    test_empty_duration()
+    test_motion_timeline_from_dicts_roundtrip()
+    test_pose_batch_stream()
+    test_job_seed_per_job()
+    test_seeded_motion_and_pose_cache()
+    test_audio_driven_motion()
+    test_audio_driven_motion_short_input()
+    test_pose_warp_roi_cache()
+    test_face_cascade_cached()
+    test_fused_paste_parity()
     if success:
         print("\n🎉 随机动作控制集成测试成功！")
         print("现在可以启动app.py测试Web界面功能")
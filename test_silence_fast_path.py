@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试音频能量与静音区间 (silence_fast_path.py)
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_silent_spans():
+    """测试静音区间: 句间停顿被检出, 语音两侧保留过渡帧, 短停顿不计入"""
+    import numpy as np
+    from silence_fast_path import SilenceConfig, compute_silent_spans, frame_energy_db, silent_mask
+
+    sample_rate, fps = 16000, 25
+    t = np.arange(sample_rate * 4) / sample_rate
+    wav = np.sin(2 * np.pi * 220 * t).astype(np.float32)
+    wav[sample_rate:2 * sample_rate] = 0.0              # 1s 停顿
+    wav[3 * sample_rate:3 * sample_rate + 3200] = 0.0   # 0.2s 短停顿
+    energy_db = frame_energy_db(wav, sample_rate, fps)
+    assert len(energy_db) == 100 and energy_db.max() == 0.0
+
+    spans = compute_silent_spans(energy_db, fps, SilenceConfig(pad=0.12, min_silence=0.4))
+    pad = int(round(0.12 * fps))
+    assert spans.tolist() == [[25 + pad, 50 - pad]]
+    assert silent_mask(energy_db, fps).sum() == 50 - 25 - 2 * pad
+    print("✅ 静音区间检测正常")
+
+
+def test_silent_spans_short_input():
+    """测试短音频: 帧数少于过渡卷积核时结果仍与输入等长"""
+    import numpy as np
+    from silence_fast_path import compute_silent_spans, silent_mask
+
+    energy_db = np.full(4, -60.0)
+    energy_db[1] = 0.0
+    assert len(silent_mask(energy_db, 25)) == 4
+    assert compute_silent_spans(energy_db, 25).shape == (0, 2)
+    assert len(silent_mask(np.zeros(0), 25)) == 0
+    print("✅ 短音频静音检测正常")
+
+
+class FakeTask:
+    """代替 TransDhTask: 把输入视频帧反色写成结果, 记录每次调用的帧数"""
+
+    def __init__(self, result_dir):
+        self.result_dir = result_dir
+        self.task_dic = {}
+        self.calls = []
+
+    def work(self, audio_path, video_path, code, *args):
+        import cv2
+        cap = cv2.VideoCapture(video_path)
+        result_path = os.path.join(self.result_dir, "{}-r.mp4".format(code))
+        writer, frames = None, 0
+        while True:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            if writer is None:
+                writer = cv2.VideoWriter(result_path, cv2.VideoWriter_fourcc(*"mp4v"), 25,
+                                         (frame.shape[1], frame.shape[0]))
+            writer.write(255 - frame)
+            frames += 1
+        writer.release()
+        cap.release()
+        self.calls.append(frames)
+        self.task_dic[code] = (code, audio_path, result_path)
+
+
+def _write_source_video(path, frames):
+    """每帧亮度为帧号的 6 倍, 便于核对循环取帧"""
+    import cv2
+    import numpy as np
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 25, (64, 48))
+    for index in range(frames):
+        writer.write(np.full((48, 64, 3), index * 6, dtype=np.uint8))
+    writer.release()
+
+
+def test_silence_plan_segments():
+    """测试分流计划: 片段按时间顺序覆盖全部帧, 报告中统计跳过的帧数"""
+    import numpy as np
+    from silence_fast_path import SilenceConfig, SilencePlan, split_segments
+
+    assert split_segments(10, np.array([[2, 4], [7, 10]])) == [(0, 2, True), (2, 4, False), (4, 7, True), (7, 10, False)]
+    assert split_segments(5, np.zeros((0, 2))) == [(0, 5, True)]
+
+    sample_rate, fps = 16000, 25
+    t = np.arange(sample_rate * 4) / sample_rate
+    wav = np.sin(2 * np.pi * 220 * t).astype(np.float32)
+    wav[sample_rate:2 * sample_rate] = 0.0
+    plan = SilencePlan.from_wav(wav, sample_rate, fps, SilenceConfig())
+    assert plan.num_frames == 100 and plan.duration == 4.0
+    assert [s[2] for s in plan.segments] == [True, False, True]
+    assert plan.num_silent_frames == 19
+    assert "19/100" in plan.format_report()
+    print("✅ 静音分流计划正常")
+
+
+def test_silence_render_job():
+    """测试分段渲染: 只有语音片段送入服务, 静音片段使用源视频帧, 源视频按帧号循环"""
+    import shutil
+    import tempfile
+    import numpy as np
+    import pytest
+    cv2 = pytest.importorskip("cv2")
+    from silence_fast_path import SilencePlan, prepare_segments, render_voiced, stitch_segments, render_job
+
+    sample_rate, fps = 16000, 25
+    wav = np.ones(sample_rate * 2, dtype=np.float32) * 0.5
+    plan = SilencePlan(wav, sample_rate, fps, np.zeros(50), [(0, 10, True), (10, 30, False), (30, 50, True)])
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        video_path = os.path.join(work_dir, "src.mp4")
+        _write_source_video(video_path, 40)
+        task = FakeTask(work_dir)
+        segments = prepare_segments(plan, video_path, work_dir)
+        render_voiced(task, segments, "job")
+        assert task.calls == [10, 20]
+        assert sorted(task.task_dic) == ["job_v0", "job_v2"]
+
+        class CountingJob:
+            frames = 0
+
+            def apply(self, frames):
+                self.frames += len(frames)
+
+        pose_job = CountingJob()
+        output_path = os.path.join(work_dir, "out.mp4")
+        assert stitch_segments(segments, output_path, fps, pose_job, batch_frames=8) == 50
+        assert pose_job.frames == 50
+
+        cap = cv2.VideoCapture(output_path)
+        levels = []
+        while True:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            levels.append(float(frame.mean()))
+        cap.release()
+        assert len(levels) == 50
+        # 语音片段为服务结果 (反色), 静音片段为源帧, 第 40 帧起循环回源视频开头; mp4v 有压缩误差
+        assert abs(levels[5] - (255 - 30)) < 12
+        assert abs(levels[15] - 90) < 12
+        assert abs(levels[45] - (255 - 30)) < 12
+
+        if shutil.which("ffmpeg"):
+            result_path = render_job(task, plan, segments[0].audio_path, video_path, "job2", work_dir)
+            assert os.path.exists(result_path) and plan.service_calls == 2
+            assert not os.path.exists(os.path.join(work_dir, "job2_v0-r.mp4"))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    print("✅ 静音片段跳过推理的分段渲染正常")
+
+
+if __name__ == "__main__":
+    test_silent_spans()
+    test_silent_spans_short_input()
+    test_silence_plan_segments()
+    test_silence_render_job()
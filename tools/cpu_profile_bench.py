@@ -0,0 +1,62 @@
+# -- coding: utf-8 --
+# @Time : 2026/10/19
+"""
+frames/sec of several models running concurrently, onnxruntime defaults vs [cpu_profile], from the repository root:
+    python tools/cpu_profile_bench.py scrfd:model.onnx:1,3,640,640 gfpgan:model.onnx:1,3,512,512
+"""
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import onnxruntime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model_lib.base_wrapper.cpu_profile import CpuProfile  # noqa: E402
+
+
+def benchmark(model_specs, seconds=10.0, profile=None):
+    """
+    frames/sec of several models running concurrently, one thread per model like the pipeline stages
+    Args:
+        model_specs: [(name, onnx_path, input_shape), ...]
+        profile: CpuProfile, None for onnxruntime defaults
+    """
+    sessions = []
+    for name, onnx_path, shape in model_specs:
+        if profile is None:
+            session_options = onnxruntime.SessionOptions()
+        else:
+            session_options = profile.session_options(name)
+        session = onnxruntime.InferenceSession(onnx_path, session_options, providers=["CPUExecutionProvider"])
+        sessions.append((name, session, np.random.rand(*shape).astype(np.float32)))
+
+    counts = {name: 0 for name, _, _ in sessions}
+    stop = time.perf_counter() + seconds
+
+    def worker(name, session, tensor):
+        feed = {session.get_inputs()[0].name: tensor}
+        while time.perf_counter() < stop:
+            session.run(None, feed)
+            counts[name] += tensor.shape[0]
+
+    threads = [threading.Thread(target=worker, args=spec) for spec in sessions]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return {name: count / seconds for name, count in counts.items()}
+
+
+if __name__ == '__main__':
+    specs = []
+    for arg in sys.argv[1:]:
+        name, path, shape = arg.split(':')
+        specs.append((name, path, [int(d) for d in shape.split(',')]))
+    for label, profile in (('onnxruntime defaults', None),
+                           ('cpu profile', CpuProfile.from_config() or CpuProfile())):
+        fps = benchmark(specs, profile=profile)
+        print('{}: {}, slowest stage {:.1f} frames/sec'.format(
+            label, ', '.join('{} {:.1f}'.format(n, f) for n, f in fps.items()), min(fps.values())))
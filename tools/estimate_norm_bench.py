@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+逐帧 face_lib estimate_norm + cv2.invertAffineTransform vs 批量估计 + 批量求逆, 在仓库根目录运行:
+    python tools/estimate_norm_bench.py --frames 10000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from face_align_batch import align_templates, estimate_norm_batch, invert_affine_batch  # noqa: E402
+from face_lib.face_detect_and_align import estimate_norm  # noqa: E402
+
+
+def synthetic_landmarks(num_frames: int, seed: int = 0, crop_size: int = 512) -> np.ndarray:
+    """模板经随机旋转 / 缩放 / 平移并加噪声得到的 (N, 5, 2) 关键点, 模拟视频逐帧检测结果"""
+    rng = np.random.default_rng(seed)
+    base = align_templates(crop_size)[0] - crop_size / 2.0
+    angle = rng.uniform(-0.6, 0.6, num_frames)
+    scale = rng.uniform(0.3, 1.5, num_frames)
+    rotation = np.stack([np.cos(angle), -np.sin(angle), np.sin(angle), np.cos(angle)], 1).reshape(-1, 2, 2)
+    points = np.einsum("nij,kj->nki", rotation * scale[:, None, None], base)
+    points += rng.uniform(200, 1200, (num_frames, 1, 2)) + rng.normal(0, 3, points.shape)
+    return points
+
+
+def benchmark_estimate_norm(num_frames: int = 10000, crop_size: int = 512, mode: str = "arcface"):
+    lmks = synthetic_landmarks(num_frames, crop_size=crop_size)
+    start = time.perf_counter()
+    singles = []
+    for lmk in lmks:
+        result = estimate_norm(lmk, crop_size, mode)
+        singles.append(result[0] if isinstance(result, tuple) else result)
+    inverses = [cv2.invertAffineTransform(matrix) for matrix in singles]
+    single_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matrices, _ = estimate_norm_batch(lmks, crop_size, mode)
+    batch_inverses = invert_affine_batch(matrices)
+    batch_s = time.perf_counter() - start
+
+    print("{} 帧 ({}): 逐帧 {:.3f}s, 批量 {:.4f}s, 加速 {:.0f}x, 最大矩阵差 {:.2e}, 逆矩阵差 {:.2e}".format(
+        num_frames, mode, single_s, batch_s, single_s / batch_s, np.abs(matrices - np.array(singles)).max(),
+        np.abs(batch_inverses - np.array(inverses)).max()))
+    return single_s, batch_s
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=10000)
+    args = parser.parse_args()
+    benchmark_estimate_norm(args.frames, mode="arcface")
+    benchmark_estimate_norm(args.frames, mode="pose")
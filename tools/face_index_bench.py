@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+人脸分析索引: 首个任务构建 vs 之后任务内存映射打开并读取全部帧, 在仓库根目录运行:
+    python tools/face_index_bench.py --frames 100 --cost-ms 20
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from face_index import FaceIndexCache, FrameAnalysis  # noqa: E402
+
+
+def synthetic_analyzer(cost_ms: float = 20.0):
+    """模拟检测 + 对齐 + 解析: 固定耗时, 由帧内容得到确定的结果"""
+
+    def analyze(frame):
+        time.sleep(cost_ms / 1000.0)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        cy, cx = np.array(gray.shape) / 2 + (gray.mean() - 127) / 4
+        bbox = np.array([cx - 80, cy - 80, cx + 80, cy + 80, 0.9])
+        kps = np.array([[cx - 28, cy - 18], [cx + 28, cy - 18], [cx, cy + 12], [cx - 22, cy + 42], [cx + 22, cy + 42]])
+        affine = np.array([[1.6, 0, 256 - 1.6 * cx], [0, 1.6, 256 - 1.6 * cy]])
+        mask = np.zeros((512, 512), np.uint8)
+        cv2.ellipse(mask, (256, 256), (160, 210), 0, 0, 360, 1, -1)
+        cv2.ellipse(mask, (256, 340), (60, 25), 0, 0, 360, 11, -1)
+        return FrameAnalysis(True, bbox, kps, affine, mask)
+
+    return analyze
+
+
+def benchmark_face_index(frames: int = 100, cost_ms: float = 20.0):
+    workdir = tempfile.mkdtemp()
+    video_path = os.path.join(workdir, "avatar.mp4")
+    cache_dir = os.path.join(workdir, "face_index")
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"mp4v"), 25, (640, 480))
+    rng = np.random.default_rng(0)
+    for _ in range(frames):
+        writer.write(cv2.GaussianBlur(rng.integers(0, 255, (480, 640, 3), dtype=np.uint8), (0, 0), 3))
+    writer.release()
+
+    try:
+        start = time.perf_counter()
+        FaceIndexCache(cache_dir).get(video_path, synthetic_analyzer(cost_ms))
+        build_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index = FaceIndexCache(cache_dir).get(video_path)
+        open_s = time.perf_counter() - start
+        start = time.perf_counter()
+        for i in range(len(index)):
+            index.frame(i)
+        read_s = time.perf_counter() - start
+        size = os.path.getsize(index.path)
+        print("{} 帧: 构建 {:.2f}s ({:.1f} ms/帧), 之后任务打开 {:.2f} ms, 读取 {:.3f} ms/帧 (含掩码解码), "
+              "索引 {:.1f} KB ({:.2f} KB/帧)".format(frames, build_s, build_s / frames * 1000, open_s * 1000,
+                                                     read_s / frames * 1000, size / 1024.0, size / 1024.0 / frames))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--cost-ms", type=float, default=20.0)
+    args = parser.parse_args()
+    benchmark_face_index(args.frames, args.cost_ms)
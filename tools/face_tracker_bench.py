@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+逐帧检测 vs 每 N 帧检测 + 跟踪: 检测调用/秒, 关键点抖动与误差, 在仓库根目录运行:
+    python tools/face_tracker_bench.py --frames 250 --intervals 1 5 10
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from face_tracker import FaceTracker, FaceTrackerConfig, landmark_jitter  # noqa: E402
+
+
+def synthetic_face_video(frames: int = 250, size: Tuple[int, int] = (480, 640), seed: int = 0):
+    """
+    纹理人脸在背景上缓慢平移 / 缩放, 第 frames//2 帧切换到另一背景
+    Returns:
+        (帧列表, 真实人脸框 (T, 4), 真实关键点 (T, 5, 2))
+    """
+    rng = np.random.default_rng(seed)
+    height, width = size
+    backgrounds = [cv2.GaussianBlur(rng.integers(low, low + 128, (height, width, 3), dtype=np.uint8), (0, 0), 3)
+                   for low in (127, 0)]
+    face = cv2.GaussianBlur(rng.integers(0, 255, (160, 160, 3), dtype=np.uint8), (0, 0), 2)
+    face_kps = np.array([[52, 62], [108, 62], [80, 92], [58, 122], [102, 122]], dtype=np.float64)
+    video, boxes, kpss = [], [], []
+    for t in range(frames):
+        scale = 1.0 + 0.05 * math.sin(t / 40.0)
+        cx = width / 2 + 40 * math.sin(t / 30.0)
+        cy = height / 2 + 15 * math.sin(t / 23.0)
+        matrix = np.array([[scale, 0, cx - 80 * scale], [0, scale, cy - 80 * scale]])
+        frame = backgrounds[int(t >= frames // 2)].copy()
+        warped = cv2.warpAffine(face, matrix, (width, height))
+        mask = cv2.warpAffine(np.ones((160, 160), np.uint8), matrix, (width, height)).astype(bool)
+        frame[mask] = warped[mask]
+        video.append(frame)
+        boxes.append(np.array([0, 0, 160, 160]).reshape(2, 2) @ matrix[:, :2].T + matrix[:, 2])
+        kpss.append(face_kps @ matrix[:, :2].T + matrix[:, 2])
+    return video, np.array(boxes).reshape(-1, 4), np.array(kpss)
+
+
+class NoisyDetector:
+    """模拟检测器: 真实值 + 高斯噪声 (逐帧检测的关键点抖动), 输出格式与 SCRFD.detect 相同"""
+
+    def __init__(self, boxes, kpss, noise=1.5, seed=0):
+        self.boxes, self.kpss, self.noise = boxes, kpss, noise
+        self.rng = np.random.default_rng(seed)
+        self.index = 0
+
+    def __call__(self, frame):
+        box = self.boxes[self.index] + self.rng.normal(0, self.noise, 4)
+        kps = self.kpss[self.index] + self.rng.normal(0, self.noise, (5, 2))
+        return np.concatenate([box, [0.9]])[None], kps[None]
+
+
+def benchmark_tracker(frames: int = 250, fps: float = 25.0, intervals: List[int] = (1, 5, 10)):
+    """逐帧检测 vs 跟踪: 检测调用/秒, 关键点抖动与误差 (相对双眼间距)"""
+    video, boxes, kpss = synthetic_face_video(frames)
+    eye_distance = np.linalg.norm(kpss[:, 1] - kpss[:, 0], axis=1).mean()
+    for interval in intervals:
+        detector = NoisyDetector(boxes, kpss)
+        tracker = FaceTracker(detector, fps, FaceTrackerConfig(detect_interval=interval))
+        results = []
+        start = time.perf_counter()
+        for index, frame in enumerate(video):
+            detector.index = index
+            results.append(tracker.update(frame))
+        elapsed = time.perf_counter() - start
+        tracked = np.array([r.kps for r in results])
+        error = np.linalg.norm(tracked - kpss, axis=2).mean() / eye_distance
+        stats = tracker.get_stats()
+        print("N={:2d}: 检测 {:5.1f} 次/秒视频 ({} 次 {}), 抖动 {:.4f}, 误差 {:.4f}, 跟踪耗时 {:.2f} ms/帧".format(
+            interval, stats["detect_calls"] / (frames / fps), stats["detect_calls"], stats["detect_reasons"],
+            landmark_jitter(tracked), error, elapsed / frames * 1000))
+    print("真实轨迹抖动 {:.4f}".format(landmark_jitter(kpss)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=250)
+    parser.add_argument("--fps", type=float, default=25.0)
+    parser.add_argument("--intervals", type=int, nargs="+", default=[1, 5, 10])
+    args = parser.parse_args()
+    benchmark_tracker(args.frames, args.fps, args.intervals)
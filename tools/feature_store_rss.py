@@ -0,0 +1,77 @@
+"""Per-worker memory of DataLoader-like workers reading the feature store, legacy np.load vs mmap.
+
+Usage (from the repository root):
+    python tools/feature_store_rss.py --feature_path ../AnnI_feature --idts id1,id2 --num_workers 4 --start_method spawn
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'landmark2face_wy', 'data'))
+from feature_store import FeatureStore  # noqa: E402
+
+
+def _touch_worker(stores, num_steps, seed, result_queue):
+    import psutil
+    rng = np.random.default_rng(seed)
+    checksum = 0.0
+    for _ in range(num_steps):
+        store = stores[rng.integers(len(stores))]
+        features, features1 = store.arrays()
+        idx = int(rng.integers(features.shape[0]))
+        checksum += float(features[max(idx - 10, 0):idx + 10, 80:144].sum())
+        checksum += float(features1[:, idx % features1.shape[1]].sum())
+    info = psutil.Process().memory_full_info()
+    result_queue.put((os.getpid(), info.rss, getattr(info, 'uss', 0), getattr(info, 'shared', 0), checksum))
+
+
+def report_worker_rss(feature_path, idts, audio_feature='3dmm', num_workers=4, num_steps=2000, mmap=True,
+                      start_method='fork'):
+    """Simulate DataLoader workers sampling feature windows and report per-worker memory.
+
+    With 'spawn' (or distributed training) each worker receives a pickled copy of the dataset,
+    which is where the legacy np.load arrays got duplicated per worker.
+    """
+    import multiprocessing
+    stores = [FeatureStore(os.path.join(feature_path, idt), [audio_feature, 'audio_wenet_feature'], mmap=mmap)
+              for idt in idts]
+    if not mmap:
+        # legacy path loads in the parent, the same as Dataset.__init__ did
+        for store in stores:
+            store.arrays()
+    ctx = multiprocessing.get_context(start_method)
+    result_queue = ctx.Queue()
+    workers = [ctx.Process(target=_touch_worker, args=(stores, num_steps, seed, result_queue))
+               for seed in range(num_workers)]
+    for w in workers:
+        w.start()
+    results = [result_queue.get() for _ in workers]
+    for w in workers:
+        w.join()
+    return results
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--feature_path', type=str, required=True)
+    parser.add_argument('--idts', type=str, required=True, help='comma separated identity names')
+    parser.add_argument('--audio_feature', type=str, default='3dmm')
+    parser.add_argument('--num_workers', type=int, default=4)
+    parser.add_argument('--num_steps', type=int, default=2000)
+    parser.add_argument('--start_method', type=str, default='fork', choices=['fork', 'spawn'])
+    args = parser.parse_args()
+
+    idts = args.idts.split(',')
+    for mmap in (False, True):
+        results = report_worker_rss(args.feature_path, idts, args.audio_feature, args.num_workers,
+                                    args.num_steps, mmap=mmap, start_method=args.start_method)
+        print('---------- %s, %s ----------' % ('mmap feature store' if mmap else 'np.load (legacy)',
+                                               args.start_method))
+        for pid, rss, uss, shared, _ in results:
+            print('worker %d: rss %.1f MB, uss %.1f MB, shared %.1f MB' % (pid, rss / 2 ** 20, uss / 2 ** 20,
+                                                                         shared / 2 ** 20))
+        print('total rss %.1f MB, total uss %.1f MB' % (sum(r[1] for r in results) / 2 ** 20,
+                                                        sum(r[2] for r in results) / 2 ** 20))
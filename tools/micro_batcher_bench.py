@@ -0,0 +1,67 @@
+# -- coding: utf-8 --
+# @Time : 2026/10/19
+"""
+per-job direct calls vs MicroBatcher on a simulated model, run from the repository root:
+    python tools/micro_batcher_bench.py
+"""
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model_lib.micro_batcher import MicroBatcher  # noqa: E402
+
+
+class _SimulatedModel:
+    """stand-in for ModelBase: fixed launch overhead + per-row cost, serialized like one GPU"""
+
+    def __init__(self, launch_ms=4.0, row_ms=0.5):
+        self.model = self
+        self.launch = launch_ms / 1000.0
+        self.row = row_ms / 1000.0
+        self.lock = threading.Lock()
+
+    def forward(self, inputs):
+        with self.lock:
+            time.sleep(self.launch + self.row * inputs[0].shape[0])
+        return [inputs[0].mean(axis=(1, 2, 3))]
+
+
+def benchmark(job_counts=(1, 4, 16), job_batch=4, calls_per_job=50, max_batch=16, max_delay_ms=5.0):
+    """direct per-job calls vs micro-batched, rows/s and batcher metrics"""
+    for jobs in job_counts:
+        results = {}
+        for mode in ('direct', 'batched'):
+            model = _SimulatedModel()
+            batcher = MicroBatcher(model, max_batch=max_batch, max_delay_ms=max_delay_ms, name='sim') \
+                if mode == 'batched' else None
+            call = batcher.forward if batcher else model.forward
+
+            def job():
+                frames = np.random.rand(job_batch, 3, 8, 8).astype(np.float32)
+                for _ in range(calls_per_job):
+                    call([frames])
+
+            threads = [threading.Thread(target=job) for _ in range(jobs)]
+            start = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - start
+            results[mode] = jobs * calls_per_job * job_batch / elapsed
+            if batcher:
+                metrics = batcher.get_metrics()
+                batcher.close()
+        print('jobs {:2d}: direct {:7.1f} rows/s, batched {:7.1f} rows/s, batches {}, mean rows {:.1f}, '
+              'fill {:.2f}, queue delay mean {:.2f} ms p95 {:.2f} ms'.format(
+                  jobs, results['direct'], results['batched'], metrics['batches'], metrics['mean_batch_rows'],
+                  metrics['mean_batch_fill'], metrics['mean_queue_delay_ms'], metrics['p95_queue_delay_ms']))
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,50 @@
+# -- coding: utf-8 --
+# @Time : 2026/10/19
+"""
+session.run vs io_binding latency and numpy allocations per call, run from the repository root:
+    python tools/onnx_binding_churn.py model.onnx 512,512,3
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model_lib.base_wrapper import ONNXBindingModel, ONNXModel  # noqa: E402
+
+
+def compare_allocation_churn(onnx_path, image_shape, provider='cpu', times=200):
+    """
+    session.run vs io_binding fed the way the face models are (HWC image, trans=True),
+    report latency and the numpy bytes allocated per call
+    """
+    import tracemalloc
+
+    image = np.random.rand(*image_shape).astype(np.float32)
+    results = {}
+    for name, model in (('session.run', ONNXModel(onnx_path, provider=provider)),
+                        ('io_binding', ONNXBindingModel(onnx_path, provider=provider, copy_outputs=False))):
+        for _ in range(3):
+            model.forward(image, trans=True)
+        start = time.perf_counter()
+        for _ in range(times):
+            model.forward(image, trans=True)
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        for _ in range(times):
+            model.forward(image, trans=True)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[name] = {'ms_per_call': elapsed / times * 1000, 'traced_peak_bytes': peak}
+    return results
+
+
+if __name__ == '__main__':
+    onnx_path = sys.argv[1]
+    image_shape = [int(d) for d in sys.argv[2].split(',')] if len(sys.argv) > 2 else [512, 512, 3]
+    for name, result in compare_allocation_churn(onnx_path, image_shape).items():
+        print('{}: {:.3f} ms/call, traced numpy peak {:.1f} KB'.format(name, result['ms_per_call'],
+                                                                       result['traced_peak_bytes'] / 1024))
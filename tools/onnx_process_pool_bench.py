@@ -0,0 +1,46 @@
+# -- coding: utf-8 --
+# @Time : 2026/10/19
+"""
+frames/sec of one in-process session vs ONNXProcessPool, from the repository root:
+    python tools/onnx_process_pool_bench.py model.onnx 8,3,640,640
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model_lib.base_wrapper import ONNXModel, ONNXProcessPool  # noqa: E402
+
+
+def benchmark(onnx_path, input_shape, batches=32, workers=(1, 2, 4), threads_per_worker=1):
+    """frames/sec of one in-process session vs the pool (forward split and map pipelining)"""
+    tensors = [np.random.rand(*input_shape).astype(np.float32) for _ in range(batches)]
+    frames = batches * input_shape[0]
+
+    model = ONNXModel(onnx_path, provider='cpu')
+    model.forward([tensors[0]])
+    start = time.perf_counter()
+    for tensor in tensors:
+        model.forward([tensor])
+    print('in-process session   : {:8.1f} frames/sec'.format(frames / (time.perf_counter() - start)))
+
+    for count in workers:
+        with ONNXProcessPool(onnx_path, workers=count, threads_per_worker=threads_per_worker) as pool:
+            pool.forward([tensors[0]])
+            start = time.perf_counter()
+            for tensor in tensors:
+                pool.forward([tensor])
+            split_fps = frames / (time.perf_counter() - start)
+            start = time.perf_counter()
+            for _ in pool.map([tensor] for tensor in tensors):
+                pass
+            map_fps = frames / (time.perf_counter() - start)
+        print('pool {} x {} threads : {:8.1f} frames/sec forward, {:8.1f} frames/sec map'.format(
+            count, threads_per_worker, split_fps, map_fps))
+
+
+if __name__ == '__main__':
+    benchmark(sys.argv[1], [int(d) for d in sys.argv[2].split(',')])
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+逐帧全分辨率解析 vs 降分辨率 + 时间复用, 在仓库根目录运行 (默认用颜色聚类替身, --onnx 使用 FaceParsing onnx):
+    python tools/parsing_cache_bench.py --frames 200 [--onnx]
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Callable, Optional
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from face_align_batch import align_templates  # noqa: E402
+from face_parsing_cache import (NUM_CLASSES, CachedFaceParser, ParsingCacheConfig, mask_iou,  # noqa: E402
+                                onnx_parse_fn)
+from roi_restore_bench import synthetic_talking_face  # noqa: E402
+
+
+def color_parse_fn(batch: np.ndarray) -> np.ndarray:
+    """解析替身: 每类一个原型颜色, logits 为平滑后的负颜色距离"""
+    prototypes = np.random.default_rng(7).normal(0, 1, (NUM_CLASSES, 3)).astype(np.float32)
+    logits = -((batch[:, None] - prototypes[None, :, :, None, None]) ** 2).sum(axis=2)
+    size = batch.shape[-1]
+    kernel = (size // 16, size // 16)
+    blurred = [cv2.blur(np.ascontiguousarray(image.transpose(1, 2, 0)), kernel) for image in logits]
+    return np.stack(blurred).reshape(len(batch), size, size, NUM_CLASSES).transpose(0, 3, 1, 2)
+
+
+def synthetic_parsing_clip(num_frames: int = 200, size: int = 512, seed: int = 0):
+    """
+    对齐人脸片段: 说话时嘴部开合, 偶尔的对齐抖动 / 小幅头部移动
+    Returns:
+        裁剪列表, (N, 5, 2) 对齐坐标系关键点
+    """
+    rng = np.random.default_rng(seed)
+    faces = synthetic_talking_face(num_frames, size, seed)
+    template = align_templates(size)[0]
+    crops, landmarks = [], []
+    offset = np.zeros(2)
+    for index, face in enumerate(faces):
+        if index % 50 == 25:
+            offset = rng.uniform(-0.03, 0.03, 2) * size
+        shift = offset + rng.normal(0, 0.5, 2)
+        matrix = np.float32([[1, 0, shift[0]], [0, 1, shift[1]]])
+        crops.append(cv2.warpAffine(face, matrix, (size, size), borderMode=cv2.BORDER_REFLECT))
+        landmarks.append(template + shift + rng.normal(0, 0.5, template.shape))
+    return crops, np.array(landmarks)
+
+
+def benchmark_parsing_cache(num_frames: int = 200, parse_fn: Optional[Callable] = None,
+                            config: Optional[ParsingCacheConfig] = None, full_size: int = 512):
+    """每帧耗时, 复用比例, 与逐帧全分辨率解析的掩码 IoU 漂移"""
+    parse_fn = parse_fn or color_parse_fn
+    crops, landmarks = synthetic_parsing_clip(num_frames)
+
+    reference_parser = CachedFaceParser(parse_fn, config)
+    references = [reference_parser.parse_full(crop, full_size) for crop in crops]
+    full_ms = reference_parser.get_stats()["parse_ms"]
+
+    parser = CachedFaceParser(parse_fn, config)
+    start = time.perf_counter()
+    masks = [parser.parse(crop, kps, "clip", index) for index, (crop, kps) in enumerate(zip(crops, landmarks))]
+    cached_ms = (time.perf_counter() - start) / num_frames * 1000
+    stats = parser.get_stats()
+
+    low_res = CachedFaceParser(parse_fn, config)
+    low_res_iou = [mask_iou(ref, low_res.parse_full(crop)) for ref, crop in zip(references, crops)]
+    iou = np.array([mask_iou(ref, mask) for ref, mask in zip(references, masks)])
+    print("逐帧 {} 解析 {:.1f} ms/帧; 缓存模式 {:.1f} ms/帧, 复用 {:.0%}; 掩码 IoU 漂移: 仅降分辨率 {:.3f}, "
+          "缓存模式 平均 {:.3f} / 最差 {:.3f}".format(full_size, full_ms, cached_ms, stats["reuse_ratio"],
+                                                 np.mean(low_res_iou), iou.mean(), iou.min()))
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--onnx", action="store_true", help="FaceParsing onnx (model_lib DEFAULT_MODEL_INFOS)")
+    args = parser.parse_args()
+    if args.onnx:
+        parse_fn, input_size = onnx_parse_fn()
+        # 输入尺寸固定的模型只能在该尺寸上解析, 逐帧对照也用该尺寸
+        full_size = 512 if input_size == ParsingCacheConfig.input_size else input_size
+        benchmark_parsing_cache(args.frames, parse_fn, ParsingCacheConfig(input_size=input_size), full_size)
+    else:
+        benchmark_parsing_cache(args.frames)
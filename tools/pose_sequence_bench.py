@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+姿态序列生成: 向量化实现 vs 逐帧循环, 在仓库根目录运行:
+    python tools/pose_sequence_bench.py --duration 3600 --fps 25 30 60
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from simple_motion_controller import SimpleMotionController  # noqa: E402
+
+
+def benchmark_pose_sequence(duration: float = 3600.0, fps_list=(25, 30, 60), sample_frames: int = 2000):
+    """
+    姿态序列生成性能对比: 向量化实现 vs 逐帧循环
+
+    逐帧循环在1小时时长下需要数分钟, 这里在全时长上均匀抽取 sample_frames 帧计时,
+    按帧数线性外推整段耗时
+    """
+    controller = SimpleMotionController()
+    timeline = controller.generate_motion_timeline(duration)
+    print(f"时长: {duration:.0f}s, 动作段数: {len(timeline)}")
+
+    for fps in fps_list:
+        total_frames = int(duration * fps)
+
+        start = time.perf_counter()
+        head_poses = controller.generate_pose_sequence(timeline, duration, fps)
+        vectorized_time = time.perf_counter() - start
+
+        frame_ids = np.linspace(0, total_frames - 1, min(sample_frames, total_frames)).astype(int)
+        loop_poses = np.zeros((len(frame_ids), 3))
+        start = time.perf_counter()
+        for i, frame_idx in enumerate(frame_ids):
+            head_pose = controller.get_pose_at_time(timeline, frame_idx / fps)['head_pose']
+            loop_poses[i] = [head_pose['pitch'], head_pose['yaw'], head_pose['roll']]
+        loop_time = (time.perf_counter() - start) / len(frame_ids) * total_frames
+
+        max_diff = np.abs(head_poses[frame_ids] - loop_poses).max()
+        print(f"{fps}fps ({total_frames}帧): 向量化 {vectorized_time * 1000:.1f}ms, "
+              f"逐帧循环(外推) {loop_time:.1f}s, 加速 {loop_time / vectorized_time:.0f}x, 最大误差 {max_diff:.2e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type=float, default=3600.0)
+    parser.add_argument("--fps", type=int, nargs="+", default=[25, 30, 60])
+    parser.add_argument("--sample-frames", type=int, default=2000)
+    args = parser.parse_args()
+    benchmark_pose_sequence(args.duration, args.fps, args.sample_frames)
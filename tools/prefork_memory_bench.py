@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+工作进程内存对比: 各自加载同一个 onnx 模型 vs 父进程加载后 fork, 在仓库根目录运行:
+prefork_server.py 不在父进程加载模型 (模型由各工作进程的 TransDhTask 加载), 这里只衡量会话能否跨 fork 共享
+    python tools/prefork_memory_bench.py model.onnx --workers 3
+"""
+
+import gc
+import os
+import sys
+import traceback
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from prefork_server import format_memory_report, memory_report  # noqa: E402
+
+
+def benchmark_memory(onnx_path: str, workers: int = 3, runs: int = 3):
+    """
+    工作进程内存对比: 各自加载模型 vs 父进程加载后 fork
+    Returns:
+        {模式: memory_report 行列表}
+    """
+    import numpy as np
+    import onnxruntime
+
+    def make_session():
+        session = onnxruntime.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+        feed = {}
+        for node in session.get_inputs():
+            shape = [d if isinstance(d, int) and d > 0 else 1 for d in node.shape]
+            feed[node.name] = np.random.rand(*shape).astype(np.float32)
+        return session, feed
+
+    results = {}
+    for mode in ("per-worker load", "prefork"):
+        parent_session = make_session() if mode == "prefork" else None
+        gc.collect()
+        gc.freeze()
+        pids, ready_fds = [], []
+        stop_r, stop_w = os.pipe()
+        for _ in range(workers):
+            ready_r, ready_w = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                code = 0
+                try:
+                    session, feed = parent_session or make_session()
+                    for _ in range(runs):
+                        session.run(None, feed)
+                except BaseException:
+                    traceback.print_exc()
+                    code = 1
+                finally:
+                    os.write(ready_w, b"1")
+                    os.read(stop_r, 1)
+                    os._exit(code)
+            os.close(ready_w)
+            pids.append(pid)
+            ready_fds.append(ready_r)
+        for fd in ready_fds:
+            os.read(fd, 1)
+            os.close(fd)
+        # 父进程一并计入, prefork 模式下权重由父进程持有
+        results[mode] = memory_report([os.getpid()] + pids)
+        os.write(stop_w, b"x" * workers)
+        for pid in pids:
+            os.waitpid(pid, 0)
+        os.close(stop_r)
+        os.close(stop_w)
+        gc.unfreeze()
+        print(format_memory_report(results[mode], "{} x {}".format(mode, workers)))
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="工作进程内存: 各自加载 vs fork 共享")
+    parser.add_argument("onnx_path")
+    parser.add_argument("--workers", type=int, default=3)
+    args = parser.parse_args()
+    benchmark_memory(args.onnx_path, workers=args.workers)
@@ -0,0 +1,71 @@
+# -- coding: utf-8 --
+# @Time : 2026/10/19
+"""
+cpu throughput of batched scrfd against the per-frame path, run from the repository root:
+    python tools/scrfd_batch_bench.py video.mp4 [video.mp4 ...] [--frames 64]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model_lib import ModelBase, SCRFDBatch  # noqa: E402
+from model_lib.base_wrapper.onnx_quantize import preprocess_scrfd, sample_video_frames  # noqa: E402
+from model_lib.model_registry import DEFAULT_MODEL_INFOS  # noqa: E402
+from model_lib.quant_harness import box_iou, decode_scrfd  # noqa: E402
+
+
+def benchmark(model_info, frames, batch_sizes=(1, 4, 8, 16), provider='cpu', rounds=3):
+    """
+    cpu throughput of the per-frame path (letterbox / normalize / decode one frame at a time)
+    against SCRFDBatch at each batch size, detections checked against the per-frame path
+    Returns:
+        {mode: frames per second}
+    """
+    base = ModelBase(dict(model_info), provider)
+
+    def per_frame():
+        dets = []
+        for frame in frames:
+            blob = preprocess_scrfd(frame)
+            scale = min(640.0 / frame.shape[0], 640.0 / frame.shape[1])
+            out = decode_scrfd(base.model.forward([blob]))
+            dets.append(np.concatenate([out[:, :4] / scale, out[:, 4:]], 1))
+        return dets
+
+    report = {}
+    per_frame()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        reference = per_frame()
+    report['per-frame'] = rounds * len(frames) / (time.perf_counter() - start)
+
+    detector = SCRFDBatch(model_info, provider, max_batch=max(batch_sizes))
+    for batch_size in batch_sizes:
+        detector.run_batch = min(batch_size, detector.max_batch)
+        detector.detect(frames[:detector.run_batch])
+        start = time.perf_counter()
+        for _ in range(rounds):
+            results = detector.detect(frames)
+        report['batch {}'.format(batch_size)] = rounds * len(frames) / (time.perf_counter() - start)
+        for ref, (dets, _) in zip(reference, results):
+            if len(ref) != len(dets) or (len(ref) and box_iou(ref, dets).max(axis=1).min() < 0.99):
+                print('batch {}: detections differ from the per-frame path'.format(batch_size))
+                break
+
+    for mode, fps in report.items():
+        print('{:<10s} {:8.1f} frames/s  x{:.2f}'.format(mode, fps, fps / report['per-frame']))
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='batched scrfd cpu throughput, batch 1/4/8/16 vs per-frame')
+    parser.add_argument('video', nargs='+')
+    parser.add_argument('--frames', type=int, default=64)
+    args = parser.parse_args()
+
+    benchmark(DEFAULT_MODEL_INFOS['scrfd'], sample_video_frames(args.video, max_frames=args.frames))